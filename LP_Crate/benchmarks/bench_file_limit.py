@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark interface crate builds at different file limits.
+
+Runs interface_crate.py once per limit in a fresh process and output
+directory, then counts the entities written to every ro-crate-metadata.json
+(the interface crate and its sub-crates) and reports entities per second.
+The default limits compare the capped build (2), a medium inventory (100)
+and the full inventory (none).
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+LP_CRATE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(LP_CRATE_DIR))
+
+from config import parse_file_limit
+
+DEFAULT_LIMITS = ["2", "100", "none"]
+
+
+def count_entities(output_dir: Path) -> tuple[int, int]:
+    """Return (all entities, File entities) across every crate written under output_dir."""
+    entities = 0
+    files = 0
+    for metadata_path in output_dir.rglob("ro-crate-metadata.json"):
+        with open(metadata_path, encoding="utf-8") as f:
+            graph = json.load(f)["@graph"]
+        entities += len(graph)
+        for entity in graph:
+            types = entity.get("@type", [])
+            if entity.get("@type") == "File" or (isinstance(types, list) and "File" in types):
+                files += 1
+    return entities, files
+
+
+def run_build(coastsat_dir: Path, output_dir: Path, limit: Optional[int], cache_dir: Optional[Path]) -> float:
+    """Build the interface crate in a subprocess and return the wall time in seconds."""
+    cmd = [
+        sys.executable, str(LP_CRATE_DIR / "interface_crate.py"),
+        "--coastsat-dir", str(coastsat_dir),
+        "--output-dir", str(output_dir),
+        "--limit", "none" if limit is None else str(limit),
+    ]
+    if cache_dir:
+        cmd += ["--cache-dir", str(cache_dir)]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=LP_CRATE_DIR)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report interface crate entities per second at several file limits.")
+    parser.add_argument(
+        "--coastsat-dir",
+        type=Path,
+        default=LP_CRATE_DIR.parent / "CoastSat",
+        help="Path to CoastSat project directory."
+    )
+    parser.add_argument(
+        "--limits",
+        nargs="+",
+        default=DEFAULT_LIMITS,
+        help="File limits to benchmark; 'none' builds the full inventory (default: 2 100 none)."
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Builds per limit; the fastest is reported.")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Persistent cache directory passed to every build (default: no persistent cache)."
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    coastsat_dir = args.coastsat_dir.resolve()
+    limits = [parse_file_limit(value) for value in args.limits]
+    results = []
+
+    print(f"{'limit':>8} {'entities':>10} {'files':>8} {'seconds':>9} {'entities/s':>11}")
+    for limit in limits:
+        timings = []
+        for _ in range(max(1, args.repeat)):
+            output_dir = Path(tempfile.mkdtemp(prefix="lp_crate_bench_"))
+            try:
+                timings.append(run_build(coastsat_dir, output_dir, limit, args.cache_dir))
+                entities, files = count_entities(output_dir)
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+        seconds = min(timings)
+        rate = entities / seconds if seconds else float("inf")
+        label = "none" if limit is None else str(limit)
+        print(f"{label:>8} {entities:>10} {files:>8} {seconds:>9.2f} {rate:>11.1f}")
+        results.append({
+            "limit": limit,
+            "entities": entities,
+            "file_entities": files,
+            "seconds": round(seconds, 3),
+            "entities_per_second": round(rate, 1),
+        })
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for LP_Crate.
+
+Builds (or reuses) a synthetic CoastSat repository and times:
+
+- build_e1_crate
+- build_e2_2_crate for each notebook driven by update.sh
+- interface_crate.main
+- the summary tools in tools/ (interface, batch processes, notebooks)
+
+Every run happens in a fresh process so in-memory caches never carry over
+between runs; the time reported is the call itself, excluding interpreter
+start-up and imports. Each target is run --repeat times and the min, median
+and max are reported.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+LP_CRATE_DIR = BENCHMARK_DIR.parent
+TOOLS_DIR = LP_CRATE_DIR / "tools"
+for path in (LP_CRATE_DIR, TOOLS_DIR, BENCHMARK_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from config import parse_file_limit
+from synthetic_repo import generate
+
+NOTEBOOKS = ("tidal_correction.ipynb", "slope_estimation.ipynb", "linear_models.ipynb")
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the builders' progress output and keep runs offline (no Gist uploads)."""
+    os.environ.pop("GITHUB_TOKEN", None)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_main(main, argv: list[str]) -> float:
+    original_argv = sys.argv
+    sys.argv = argv
+    try:
+        start = time.perf_counter()
+        main()
+        return time.perf_counter() - start
+    finally:
+        sys.argv = original_argv
+
+
+# --- Targets (each runs in a fresh worker process) ---
+
+def time_build_e1_crate(repo: str, output_dir: str, limit: Optional[int]) -> float:
+    from config import set_file_limit
+    from e1_crate import build_e1_crate
+
+    set_file_limit(limit)
+    with quiet():
+        start = time.perf_counter()
+        build_e1_crate(output_dir, repo)
+        return time.perf_counter() - start
+
+
+def time_build_e2_2_crate(repo: str, output_dir: str, notebook: str) -> float:
+    from e2_2_crate import build_e2_2_crate
+
+    os.makedirs(output_dir, exist_ok=True)
+    with quiet():
+        start = time.perf_counter()
+        build_e2_2_crate(output_dir, repo, os.path.join(repo, notebook))
+        return time.perf_counter() - start
+
+
+def time_interface_crate(repo: str, output_dir: str, limit: Optional[int]) -> float:
+    from interface_crate import main
+
+    argv = ["interface_crate.py", "--coastsat-dir", repo, "--output-dir", output_dir,
+            "--limit", "none" if limit is None else str(limit)]
+    with quiet():
+        return run_main(main, argv)
+
+
+def time_summary_tool(module_name: str, argv: list[str]) -> float:
+    module = __import__(module_name)
+    with quiet():
+        return run_main(module.main, [f"{module_name}.py"] + argv)
+
+
+def run_isolated(func, *args) -> float:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(func, *args).result()
+
+
+def benchmark(name: str, repeat: int, func, make_args) -> dict:
+    """Run func(*make_args(run)) `repeat` times in fresh processes and summarise the timings."""
+    timings = [run_isolated(func, *make_args(run)) for run in range(repeat)]
+    result = {
+        "target": name,
+        "runs": len(timings),
+        "min_seconds": round(min(timings), 4),
+        "median_seconds": round(statistics.median(timings), 4),
+        "max_seconds": round(max(timings), 4),
+    }
+    print(f"{name:<40} {result['min_seconds']:>9.3f} {result['median_seconds']:>9.3f} {result['max_seconds']:>9.3f}")
+    return result
+
+
+def run_suite(repo: Path, workdir: Path, limit: Optional[int], repeat: int) -> list[dict]:
+    repo_str = str(repo)
+    results = []
+    print(f"{'target':<40} {'min (s)':>9} {'median':>9} {'max':>9}")
+
+    results.append(benchmark(
+        "build_e1_crate", repeat, time_build_e1_crate,
+        lambda run: (repo_str, str(workdir / f"e1-{run}"), limit)
+    ))
+    for notebook in NOTEBOOKS:
+        stem = Path(notebook).stem
+        results.append(benchmark(
+            f"build_e2_2_crate[{notebook}]", repeat, time_build_e2_2_crate,
+            lambda run, stem=stem, notebook=notebook: (repo_str, str(workdir / f"e2_2-{run}" / stem), notebook)
+        ))
+    results.append(benchmark(
+        "interface_crate.main", repeat, time_interface_crate,
+        lambda run: (repo_str, str(workdir / f"interface-{run}"), limit)
+    ))
+
+    # The summary tools read the last interface crate built above
+    crate_dir = workdir / f"interface-{repeat - 1}"
+    summaries_dir = workdir / "summaries"
+    results.append(benchmark(
+        "generate_interface_summary", repeat, time_summary_tool,
+        lambda run: ("generate_interface_summary", [
+            "--input", str(crate_dir / "ro-crate-metadata.json"),
+            "--output", str(summaries_dir / "interface-crate-summary.json")])
+    ))
+    results.append(benchmark(
+        "generate_batch_summary", repeat, time_summary_tool,
+        lambda run: ("generate_batch_summary", [
+            "--input", str(crate_dir / "batch_processes" / "ro-crate-metadata.json"),
+            "--output", str(summaries_dir / "batch-processes-summary.json")])
+    ))
+    results.append(benchmark(
+        "generate_notebook_summary", repeat, time_summary_tool,
+        lambda run: ("generate_notebook_summary", ["--interface-crate", str(crate_dir), "--all"])
+    ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time LP_Crate builds and summary tools against a synthetic CoastSat repository.")
+    parser.add_argument("--repo", type=Path, default=None,
+                        help="Existing CoastSat-like repository to benchmark (default: generate one).")
+    parser.add_argument("--workdir", type=Path, default=None,
+                        help="Directory for the generated repository and build outputs (default: a temporary directory).")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory afterwards.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target (default: 3).")
+    parser.add_argument("--limit", type=parse_file_limit, default=None,
+                        help="File limit for the crate builds; 'none' describes the full inventory (default: none).")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results to this JSON file.")
+    generator = parser.add_argument_group("synthetic repository")
+    generator.add_argument("--nz-sites", type=int, default=200, help="Number of nzd* sites.")
+    generator.add_argument("--sar-sites", type=int, default=50, help="Number of sar* sites.")
+    generator.add_argument("--pacific-sites", type=int, default=100, help="Number of csv_run7 sites.")
+    generator.add_argument("--commits", type=int, default=5, help="Number of 'auto update' commits.")
+    generator.add_argument("--rows", type=int, default=200, help="Rows per transect time series.")
+    generator.add_argument("--changed-per-commit", type=int, default=20, help="Sites rewritten by each commit.")
+    generator.add_argument("--plots", type=int, default=5, help="Plotly outputs in linear_models.ipynb.")
+    generator.add_argument("--plot-points", type=int, default=2000, help="Points in each Plotly output.")
+    generator.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="lp_crate_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        if args.repo:
+            repo = args.repo.resolve()
+        else:
+            repo = generate(workdir / "CoastSat", args.nz_sites, args.sar_sites, args.pacific_sites,
+                            args.commits, args.rows, args.changed_per_commit, args.plots,
+                            args.plot_points, args.seed)
+            print(f"Generated synthetic repository at {repo}")
+        results = run_suite(repo, workdir, args.limit, max(1, args.repeat))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"repo": str(repo), "limit": args.limit, "results": results}, f, indent=2)
+            print(f"Results written to {args.json}")
+    finally:
+        if args.keep:
+            print(f"Work directory kept at {workdir}")
+        elif args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
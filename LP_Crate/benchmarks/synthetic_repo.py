@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic CoastSat repository for benchmarking LP_Crate.
+
+The generated repository mirrors the layout the crate builders expect:
+NZ (nzd*) and Sardinia (sar*) site directories with raw and tidally
+corrected transect time series and tides, the csv_run7 Pacific Rim inputs,
+the geojson inputs, stand-in notebooks (with Plotly outputs) driven by
+update.sh and a history of "auto update" commits. File contents are deterministic
+for a given seed.
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+
+UPDATE_SH = """#!/bin/bash -l
+git pull
+./batch_process_NZ.py
+./batch_process_sar.py
+# For new sites, first we need to run tidal_correction to fetch the tides, then we can run slope_estimation, then we can use the slopes to apply the tidal correction
+# This is why tidal_correction.ipynb is run twice
+jupyter nbconvert --to notebook --execute --inplace tidal_correction.ipynb slope_estimation.ipynb tidal_correction.ipynb linear_models.ipynb
+./make_xlsx.py
+git add .
+git commit -am "auto update" --author="coastsat-bot <ubuntu@wave.storm-surge.cloud.edu.au>"
+git push
+"""
+
+MAKE_XLSX = """#!/usr/bin/env python3
+import pandas as pd
+import geopandas as gpd
+
+transects = gpd.read_file("transects_extended.geojson")
+transects.to_excel("transects.xlsx")
+for site_id, group in transects.groupby("site_id"):
+    df = pd.read_csv(f"data/{site_id}/transect_time_series_tidally_corrected.csv")
+    with pd.ExcelWriter(f"data/{site_id}/{site_id}.xlsx") as writer:
+        df.to_excel(writer, sheet_name="Intersects")
+"""
+
+BATCH_PROCESS = """#!/usr/bin/env python3
+import geopandas as gpd
+import pandas as pd
+
+polygons = gpd.read_file("polygons.geojson")
+shorelines = gpd.read_file("shorelines.geojson")
+transects = gpd.read_file("transects_extended.geojson")
+for site_id in polygons.id:
+    df = pd.read_csv(f"data/{site_id}/transect_time_series.csv")
+    df.to_csv(f"data/{site_id}/transect_time_series.csv", index=False)
+"""
+
+NOTEBOOK_CELLS = {
+    "tidal_correction.ipynb": [
+        "%load_ext autotime\nimport pandas as pd\nimport geopandas as gpd\nfrom glob import glob",
+        'poly = gpd.read_file("polygons.geojson")\ntransects = gpd.read_file("transects_extended.geojson")',
+        "def get_tide_for_dt(dt):\n    return 0.0",
+        'for site_id in poly.id:\n    df = pd.read_csv(f"data/{site_id}/transect_time_series.csv")\n'
+        '    tides = pd.read_csv(f"data/{site_id}/tides.csv")\n'
+        '    df["tide"] = df.dates.apply(get_tide_for_dt)\n'
+        '    df.to_csv(f"data/{site_id}/transect_time_series_tidally_corrected.csv")',
+    ],
+    "slope_estimation.ipynb": [
+        "import pandas as pd\nimport geopandas as gpd",
+        'transects = gpd.read_file("transects_extended.geojson")',
+        'for site_id in transects.site_id.unique():\n    tides = pd.read_csv(f"data/{site_id}/tides.csv")\n'
+        '    transects.loc[transects.site_id == site_id, "beach_slope"] = 0.1',
+        'transects.to_file("transects_extended.geojson", driver="GeoJSON")',
+    ],
+    "linear_models.ipynb": [
+        "%reload_ext autotime\nimport geopandas as gpd\nimport pandas as pd\nfrom glob import glob\nimport plotly.express as px",
+        'transects = gpd.read_file("transects_extended.geojson")',
+        'vos_files = pd.Series(sorted(glob("csv_run7/*/time_series_tidally_corrected.csv")))',
+        'my_nz_files = pd.Series(sorted(glob("data/*/transect_time_series_tidally_corrected.csv")))',
+        'sar_files = pd.Series(sorted(glob("data/sar*/transect_time_series.csv")))',
+        'files = pd.concat([vos_files, my_nz_files, sar_files])\ndf = pd.read_csv(files.iloc[0])\npx.line(df)',
+        'transects.to_file("transects_extended.geojson", driver="GeoJSON")',
+    ],
+}
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(repo), *args], text=True)
+
+
+def plotly_output(rng: random.Random, points: int) -> dict:
+    start = datetime(2000, 1, 1)
+    return {
+        "output_type": "display_data",
+        "metadata": {},
+        "data": {
+            "application/vnd.plotly.v1+json": {
+                "config": {"plotlyServerURL": "https://plot.ly"},
+                "data": [{
+                    "mode": "lines",
+                    "name": "raw",
+                    "type": "scatter",
+                    "x": [(start + timedelta(days=16 * i)).isoformat() for i in range(points)],
+                    "y": [round(rng.uniform(-50, 50), 3) for _ in range(points)],
+                }],
+                "layout": {"template": {"data": {}}, "title": {"text": "Synthetic transect"}},
+            }
+        },
+    }
+
+
+def write_notebook(path: Path, sources: list[str], rng: random.Random, plot_points: int) -> None:
+    cells = []
+    for i, src in enumerate(sources):
+        outputs = [{"output_type": "stream", "name": "stdout", "text": [f"time: {rng.randint(1, 900)} ms\n"]}]
+        if "px." in src:
+            outputs.append(plotly_output(rng, plot_points))
+        cells.append({
+            "cell_type": "code",
+            "execution_count": i + 1,
+            "id": f"cell-{i + 1:04d}",
+            "metadata": {},
+            "outputs": outputs,
+            "source": src.splitlines(keepends=True),
+        })
+    notebook = {
+        "cells": cells,
+        "metadata": {
+            "kernelspec": {"display_name": "Python 3", "language": "python", "name": "python3"},
+            "language_info": {"name": "python", "version": "3.12.3"},
+        },
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.write_text(json.dumps(notebook, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def write_geojson(path: Path, site_ids: list[str], rng: random.Random) -> None:
+    features = [{
+        "type": "Feature",
+        "properties": {"id": site_id, "site_id": site_id, "beach_slope": round(rng.uniform(0, 0.2), 4)},
+        "geometry": {"type": "LineString", "coordinates": [[rng.uniform(160, 180), rng.uniform(-47, -34)] for _ in range(2)]},
+    } for site_id in site_ids]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+
+
+def write_time_series(path: Path, rng: random.Random, rows: int, transects: int = 5) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = datetime(1999, 1, 1)
+    lines = ["dates,satname," + ",".join(f"t{i}" for i in range(transects))]
+    for r in range(rows):
+        values = ",".join(f"{rng.uniform(0, 300):.3f}" for _ in range(transects))
+        lines.append(f"{(start + timedelta(days=8 * r)).isoformat()},L8,{values}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def generate(output: Path, nz_sites: int = 10, sar_sites: int = 5, pacific_sites: int = 10,
+             commits: int = 3, rows: int = 200, changed_per_commit: int = 2,
+             plots: int = 1, plot_points: int = 500, seed: int = 0) -> Path:
+    """Create the repository at `output` and return its path."""
+    rng = random.Random(seed)
+    if output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True)
+    git(output, "init", "-q", "-b", "main")
+    git(output, "config", "user.name", "coastsat-bot")
+    git(output, "config", "user.email", "bot@example.invalid")
+    git(output, "config", "commit.gpgsign", "false")
+    git(output, "remote", "add", "origin", "https://github.com/example/CoastSat.git")
+
+    nz_ids = [f"nzd{i:04d}" for i in range(nz_sites)]
+    sar_ids = [f"sar{i:04d}" for i in range(sar_sites)]
+    site_ids = nz_ids + sar_ids
+
+    (output / "update.sh").write_text(UPDATE_SH)
+    (output / "make_xlsx.py").write_text(MAKE_XLSX)
+    (output / "batch_process_NZ.py").write_text(BATCH_PROCESS)
+    (output / "batch_process_sar.py").write_text(BATCH_PROCESS.replace("polygons.geojson", "polygons_sar.geojson"))
+    for name in ("polygons.geojson", "shorelines.geojson", "transects_extended.geojson"):
+        write_geojson(output / name, site_ids, rng)
+    for name, sources in NOTEBOOK_CELLS.items():
+        if name == "linear_models.ipynb":
+            # Extra figure cells before the final write, like the per-site plots in the real notebook
+            extra = [f"fig = px.scatter(df, title=\"site {i}\")\nfig" for i in range(1, plots)]
+            sources = sources[:-1] + extra + sources[-1:]
+        write_notebook(output / name, sources, rng, plot_points)
+    (output / "transects.xlsx").write_bytes(rng.randbytes(2048))
+    for site_id in site_ids:
+        site_dir = output / "data" / site_id
+        write_time_series(site_dir / "transect_time_series.csv", rng, rows)
+        write_time_series(site_dir / "transect_time_series_tidally_corrected.csv", rng, rows)
+        write_time_series(site_dir / "tides.csv", rng, rows, transects=1)
+        if site_id.startswith("nzd"):
+            (site_dir / f"{site_id}.xlsx").write_bytes(rng.randbytes(1024))
+    for i in range(pacific_sites):
+        write_time_series(output / "csv_run7" / f"pac{i:04d}" / "time_series_tidally_corrected.csv", rng, rows)
+    git(output, "add", "-A")
+    git(output, "commit", "-q", "-m", "initial import")
+
+    for _ in range(commits):
+        for site_id in rng.sample(site_ids, min(changed_per_commit, len(site_ids))):
+            extra_rows = rows + rng.randint(1, 20)
+            write_time_series(output / "data" / site_id / "transect_time_series.csv", rng, extra_rows)
+            write_time_series(output / "data" / site_id / "transect_time_series_tidally_corrected.csv", rng, extra_rows)
+        git(output, "add", "-A")
+        git(output, "commit", "-q", "-m", "auto update")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic CoastSat repository.")
+    parser.add_argument("output", type=Path, help="Directory to create the repository in (replaced if it exists).")
+    parser.add_argument("--nz-sites", type=int, default=10, help="Number of nzd* sites.")
+    parser.add_argument("--sar-sites", type=int, default=5, help="Number of sar* sites.")
+    parser.add_argument("--pacific-sites", type=int, default=10, help="Number of csv_run7 sites.")
+    parser.add_argument("--commits", type=int, default=3, help="Number of 'auto update' commits.")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per transect time series.")
+    parser.add_argument("--changed-per-commit", type=int, default=2, help="Sites rewritten by each 'auto update' commit.")
+    parser.add_argument("--plots", type=int, default=1, help="Plotly outputs in linear_models.ipynb.")
+    parser.add_argument("--plot-points", type=int, default=500, help="Points in each stand-in Plotly output.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    path = generate(args.output, args.nz_sites, args.sar_sites, args.pacific_sites, args.commits,
+                    args.rows, args.changed_per_commit, args.plots, args.plot_points, args.seed)
+    print(f"Synthetic CoastSat repository written to {path}")
+
+
+if __name__ == "__main__":
+    main()
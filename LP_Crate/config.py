@@ -6,14 +6,36 @@ allowing easy adjustment of settings like file limits without modifying
 multiple files.
 """
 
+import os
 from typing import Optional
 
+# Storage encodings for Plotly results in notebook provenance crates
+PLOTLY_ENCODINGS = ("json", "typed")
+
 class GlobalConfig:
     """Global configuration class for LP_Crate operations."""
     
     # Default limit for file operations (e.g., how many example files to include)
     # Set to None for no limit, or an integer for a specific limit
     DEFAULT_FILE_LIMIT: Optional[int] = 2
+
+    # Directory for caches that persist between builds (e.g. resolved commits)
+    # Set to None to keep caches in memory for the current build only
+    CACHE_DIR: Optional[str] = os.environ.get("LP_CRATE_CACHE_DIR")
+
+    # Number of threads used to resolve file metadata (git reads and hashing)
+    MAX_WORKERS: int = min(8, (os.cpu_count() or 1) + 4)
+
+    # Number of processes used to build notebook provenance crates in parallel
+    MAX_PROCESSES: int = os.cpu_count() or 1
+
+    # How Plotly results are stored in notebook provenance crates: "json" copies the
+    # figure from the notebook as is, "typed" stores trace arrays as Plotly typed arrays
+    PLOTLY_ENCODING: str = "json"
+
+    # Directory the build writes crate summaries to as it writes the crates
+    # Set to None to build the crates without summaries
+    SUMMARY_DIR: Optional[str] = None
     
     @classmethod
     def get_file_limit(cls) -> Optional[int]:
@@ -29,6 +51,78 @@ class GlobalConfig:
         """
         cls.DEFAULT_FILE_LIMIT = limit
 
+    @classmethod
+    def get_cache_dir(cls) -> Optional[str]:
+        """Get the persistent cache directory setting."""
+        return cls.CACHE_DIR
+
+    @classmethod
+    def set_cache_dir(cls, cache_dir: Optional[str]) -> None:
+        """Set the persistent cache directory setting.
+        
+        Args:
+            cache_dir: Directory to store caches in, or None to disable persistence
+        """
+        cls.CACHE_DIR = str(cache_dir) if cache_dir is not None else None
+
+    @classmethod
+    def get_max_workers(cls) -> int:
+        """Get the number of worker threads for file metadata resolution."""
+        return cls.MAX_WORKERS
+
+    @classmethod
+    def set_max_workers(cls, max_workers: int) -> None:
+        """Set the number of worker threads for file metadata resolution.
+        
+        Args:
+            max_workers: Number of threads; 1 resolves files sequentially
+        """
+        cls.MAX_WORKERS = max(1, int(max_workers))
+
+    @classmethod
+    def get_max_processes(cls) -> int:
+        """Get the number of worker processes for notebook provenance crates."""
+        return cls.MAX_PROCESSES
+
+    @classmethod
+    def set_max_processes(cls, max_processes: int) -> None:
+        """Set the number of worker processes for notebook provenance crates.
+        
+        Args:
+            max_processes: Number of processes; 1 builds the crates in the current process
+        """
+        cls.MAX_PROCESSES = max(1, int(max_processes))
+
+    @classmethod
+    def get_plotly_encoding(cls) -> str:
+        """Get the storage encoding for Plotly results."""
+        return cls.PLOTLY_ENCODING
+
+    @classmethod
+    def set_plotly_encoding(cls, encoding: str) -> None:
+        """Set the storage encoding for Plotly results.
+        
+        Args:
+            encoding: "json" to copy figures verbatim, or "typed" for typed trace arrays
+        """
+        if encoding not in PLOTLY_ENCODINGS:
+            raise ValueError(f"Plotly encoding must be one of {', '.join(PLOTLY_ENCODINGS)}, got {encoding!r}")
+        cls.PLOTLY_ENCODING = encoding
+
+    @classmethod
+    def get_summary_dir(cls) -> Optional[str]:
+        """Get the crate summary directory setting."""
+        return cls.SUMMARY_DIR
+
+    @classmethod
+    def set_summary_dir(cls, summary_dir: Optional[str]) -> None:
+        """Set the crate summary directory setting.
+        
+        Args:
+            summary_dir: Directory to write crate summaries to, or None to skip summaries
+        """
+        cls.SUMMARY_DIR = str(summary_dir) if summary_dir is not None else None
+
 # Convenience function for quick access
 def get_file_limit() -> Optional[int]:
     """Get the current global file limit setting."""
@@ -41,3 +135,76 @@ def set_file_limit(limit: Optional[int]) -> None:
         limit: Maximum number of files to process, or None for no limit
     """
     GlobalConfig.set_file_limit(limit)
+
+def parse_file_limit(value: str) -> Optional[int]:
+    """Parse a command-line file limit: an integer, or 'none' for no limit (full inventory).
+    
+    Args:
+        value: The raw argument value
+    """
+    if value.lower() in ("none", "null", "unlimited"):
+        return None
+    limit = int(value)
+    if limit < 0:
+        raise ValueError(f"File limit must be non-negative, got {limit}")
+    return limit
+
+def get_cache_dir() -> Optional[str]:
+    """Get the global persistent cache directory setting."""
+    return GlobalConfig.get_cache_dir()
+
+def set_cache_dir(cache_dir: Optional[str]) -> None:
+    """Set the global persistent cache directory setting.
+    
+    Args:
+        cache_dir: Directory to store caches in, or None to disable persistence
+    """
+    GlobalConfig.set_cache_dir(cache_dir)
+
+def get_max_workers() -> int:
+    """Get the global number of file metadata worker threads."""
+    return GlobalConfig.get_max_workers()
+
+def set_max_workers(max_workers: int) -> None:
+    """Set the global number of file metadata worker threads.
+    
+    Args:
+        max_workers: Number of threads; 1 resolves files sequentially
+    """
+    GlobalConfig.set_max_workers(max_workers)
+
+def get_max_processes() -> int:
+    """Get the global number of notebook provenance worker processes."""
+    return GlobalConfig.get_max_processes()
+
+def set_max_processes(max_processes: int) -> None:
+    """Set the global number of notebook provenance worker processes.
+    
+    Args:
+        max_processes: Number of processes; 1 builds the crates in the current process
+    """
+    GlobalConfig.set_max_processes(max_processes)
+
+def get_plotly_encoding() -> str:
+    """Get the global storage encoding for Plotly results."""
+    return GlobalConfig.get_plotly_encoding()
+
+def set_plotly_encoding(encoding: str) -> None:
+    """Set the global storage encoding for Plotly results.
+    
+    Args:
+        encoding: "json" to copy figures verbatim, or "typed" for typed trace arrays
+    """
+    GlobalConfig.set_plotly_encoding(encoding)
+
+def get_summary_dir() -> Optional[str]:
+    """Get the global crate summary directory setting."""
+    return GlobalConfig.get_summary_dir()
+
+def set_summary_dir(summary_dir: Optional[str]) -> None:
+    """Set the global crate summary directory setting.
+    
+    Args:
+        summary_dir: Directory to write crate summaries to, or None to skip summaries
+    """
+    GlobalConfig.set_summary_dir(summary_dir)
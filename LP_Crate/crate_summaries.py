@@ -0,0 +1,104 @@
+"""
+Summaries of the crates a build writes (interface_crate.py --summaries).
+
+The summarizers in tools/ classify the entities of a crate's @graph and keep
+counts and a few examples of each kind. During a build they are fed the
+graph rocrate serializes into ro-crate-metadata.json (`metadata.generate()`,
+with keys sorted as in the written file), right after the crate is written,
+so the file is never read back. Crates the build copies through from the
+previous build or the provenance cache have no graph in memory and are
+streamed from disk instead.
+
+Summaries are written to the configured summary directory under the names
+tools/generate_all_summaries.py uses, and match what it would produce. Once
+the build is done, summary-manifest.json records them the way that tool does,
+so its next run only summarizes crates that changed since.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional
+
+from rocrate.rocrate import ROCrate
+
+from config import get_summary_dir
+from profiling import profiled
+
+TOOLS_DIR = Path(__file__).parent / "tools"
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOLS_DIR))
+
+from crate_stream import CrateGraph, CrateStream
+from generate_all_summaries import (
+    BATCH_SUMMARY,
+    INTERFACE_SUMMARY,
+    METADATA_FILENAME,
+    SUMMARIZER_VERSIONS,
+    SUMMARIZERS,
+    file_sha256,
+    find_summary_jobs,
+    load_manifest,
+    notebook_summary_name,
+    save_manifest,
+    write_overview,
+)
+from summary_json import dump_summary
+
+
+@profiled()
+def write_crate_summary(kind: str, filename: str, crate: Optional[ROCrate] = None, crate_dir=None) -> Optional[Path]:
+    """
+    Summarize a crate as filename in the summary directory and return its path (None without one).
+    kind is "interface", "batch" or "notebook". Pass the ROCrate that was just written to summarize
+    it from memory, or the directory of a crate that was copied rather than written.
+    """
+    summary_dir = get_summary_dir()
+    if not summary_dir:
+        return None
+    if crate is not None:
+        summary = SUMMARIZERS[kind](CrateGraph(crate.metadata.generate(), sort_keys=True))
+    else:
+        with CrateStream(Path(crate_dir) / METADATA_FILENAME) as stream:
+            summary = SUMMARIZERS[kind](stream)
+    target = Path(summary_dir) / filename
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        dump_summary(summary, f)
+    return target
+
+
+def copy_crate_summary(source_filename: str, filename: str) -> None:
+    """Reuse the summary of a crate for an identical copy of it."""
+    summary_dir = get_summary_dir()
+    if summary_dir:
+        shutil.copyfile(Path(summary_dir) / source_filename, Path(summary_dir) / filename)
+
+
+def write_summary_overview(interface_crate_dir) -> Optional[Path]:
+    """
+    Record the summaries of the crates in interface_crate_dir in summary-manifest.json and write
+    summary-overview.md for them. Called once the build is done: notebook summaries are written by
+    worker processes, which would otherwise race on the manifest.
+    """
+    summary_dir = get_summary_dir()
+    if not summary_dir:
+        return None
+    summary_dir = Path(summary_dir)
+    interface_crate_dir = Path(interface_crate_dir).resolve()
+    previous = load_manifest(summary_dir)
+    entries = {}
+    for kind, input_path, filename in find_summary_jobs(interface_crate_dir):
+        if (summary_dir / filename).exists():
+            entries[filename] = {
+                "input": input_path.relative_to(interface_crate_dir).as_posix(),
+                "sha256": file_sha256(input_path),
+                "summarizer": SUMMARIZER_VERSIONS[kind],
+                "size": (summary_dir / filename).stat().st_size,
+            }
+    # Summaries of crates that are no longer part of the build
+    for filename in set(previous) - set(entries):
+        (summary_dir / filename).unlink(missing_ok=True)
+    save_manifest(summary_dir, entries)
+    sizes = {filename: entry["size"] for filename, entry in entries.items()}
+    return write_overview(summary_dir, interface_crate_dir, sizes)
@@ -1,13 +1,18 @@
 from rocrate.rocrate import ROCrate
 from rocrate.model.contextentity import ContextEntity
 from helper import GitURL
-from config import get_file_limit
+from config import get_file_limit, set_cache_dir
+from crate_summaries import BATCH_SUMMARY, write_crate_summary
+from profiling import phase, profiled
 import argparse
 import os
 from typing import Optional
 import requests
 import hashlib
 
+# Bump whenever the generated batch_processes crate changes, so incremental builds rebuild it
+PROCESS_RUN_CRATE_VERSION = 1
+
 def add_create_action(crate: ROCrate, action_id: str, name: str, description: str) -> ContextEntity:
     """
     Helper function to create a CreateAction entity in the RO-Crate.
@@ -151,6 +156,26 @@ def add_file_entity(crate: ROCrate, identifier: str, content_size, description,
     
     return file_entity  # type: ignore
 
+GEOJSON_INPUTS = ("polygons.geojson", "shorelines.geojson", "transects_extended.geojson")
+
+def select_sites(URL: GitURL, tag: str, limit: Optional[int]) -> list[str]:
+    """Return up to 'limit' site directories under data/ starting with 'tag', in sorted order."""
+    matched_dirs = [d for d in URL.list_dir("data") if d.startswith(tag)]
+    return matched_dirs if limit is None else matched_dirs[:limit]
+
+def expected_file_identifiers(URL: GitURL, limit: Optional[int]) -> set[str]:
+    """
+    Return the @ids of the File entities build_e1_crate would create, without hashing anything.
+    Used to check whether a previously built crate still describes the same files.
+    """
+    identifiers = {URL.get_previous(name)["permalink_url"] for name in GEOJSON_INPUTS}
+    for tag in ("nzd", "sar"):
+        for site_id in select_sites(URL, tag, limit):
+            remote_path = f"data/{site_id}/transect_time_series.csv"
+            identifiers.add(URL.get(remote_path)["permalink_url"])
+            identifiers.add(URL.get_previous(remote_path)["permalink_url"])
+    return identifiers
+
 def add_time_series_outputs(crate: ROCrate, limit: Optional[int], action: ContextEntity, URL: GitURL, coastsat_dir) -> list[ContextEntity]:
     """
     Adds up to 'limit' example transect_time_series.csv output files for the given CreateAction
@@ -164,21 +189,20 @@ def add_time_series_outputs(crate: ROCrate, limit: Optional[int], action: Contex
     else:
         return []  # unrecognized action id
 
-    site_root = os.path.join(URL.repo_path, "data")
-    matched_dirs = sorted([d for d in os.listdir(site_root) if d.startswith(tag)])
-    selected = matched_dirs if limit is None else matched_dirs[:limit]
+    selected = select_sites(URL, tag, limit)
+
+    remote_paths = [f"data/{site_id}/transect_time_series.csv" for site_id in selected]
+    metadata = URL.resolve_file_metadata([(remote_path, False) for remote_path in remote_paths])
 
     file_entities = []
-    for site_id in selected:        
-        remote_path = f"data/{site_id}/transect_time_series.csv"
-        local_path = f"{coastsat_dir}/data/{site_id}/transect_time_series.csv"
+    for site_id, file_metadata in zip(selected, metadata):
         file_entity = add_file_entity(
             crate,
             name=f"{site_id} transect time series",
-            identifier=URL.get(remote_path)["permalink_url"],
-            content_size=URL.get_size(remote_path), 
+            identifier=file_metadata.info["permalink_url"],
+            content_size=file_metadata.size, 
             description=f"Transect time series for {site_id}",
-            sha_256=URL.get_file_hash(local_path),
+            sha_256=file_metadata.sha256,
             encoding_format="text/csv"
         )
         file_entities.append(file_entity)
@@ -203,21 +227,20 @@ def add_time_series_inputs(crate: ROCrate, limit: Optional[int], action: Context
     else:
         return []  # unrecognized action id
 
-    site_root = os.path.join(URL.repo_path, "data")
-    matched_dirs = sorted([d for d in os.listdir(site_root) if d.startswith(tag)])
-    selected = matched_dirs if limit is None else matched_dirs[:limit]
+    selected = select_sites(URL, tag, limit)
+
+    remote_paths = [f"data/{site_id}/transect_time_series.csv" for site_id in selected]
+    metadata = URL.resolve_file_metadata([(remote_path, True) for remote_path in remote_paths])
 
     file_entities = []
-    for site_id in selected:
-        remote_path = f"data/{site_id}/transect_time_series.csv"
-        local_path = f"data/{site_id}/transect_time_series.csv"
+    for site_id, file_metadata in zip(selected, metadata):
         file_entity = add_file_entity(
             crate,
             name=f"{site_id} transect time series",
-            identifier=URL.get_previous(remote_path)["permalink_url"],
-            content_size=URL.get_size_at_commit(remote_path, URL.get_previous(remote_path)['commit_hash']), 
+            identifier=file_metadata.info["permalink_url"],
+            content_size=file_metadata.size, 
             description=f"Transect time series for {site_id}",
-            sha_256=URL.get_file_hash(local_path, "previous"),
+            sha_256=file_metadata.sha256,
             encoding_format="text/csv"
         )
         file_entities.append(file_entity)
@@ -225,9 +248,12 @@ def add_time_series_inputs(crate: ROCrate, limit: Optional[int], action: Context
 
     return file_entities
 
-def build_e1_crate(output_dir: str, coastsat_dir: str):
+@profiled()
+def build_e1_crate(output_dir: str, coastsat_dir: str, URL: Optional[GitURL] = None):
     
-    URL = GitURL(repo_path=coastsat_dir, remote_name="origin")
+    # Reuse the caller's GitURL when given so git processes and caches are shared
+    if URL is None:
+        URL = GitURL(repo_path=coastsat_dir, remote_name="origin")
     crate = ROCrate()
 
     # Add minimal metadata
@@ -292,29 +318,30 @@ def build_e1_crate(output_dir: str, coastsat_dir: str):
         affiliation=Organisation,
         orcid="https://orcid.org/example")
     
+    previous = dict(zip(GEOJSON_INPUTS, URL.resolve_file_metadata([(name, True) for name in GEOJSON_INPUTS])))
     input_files = [
         add_file_entity(
             crate=crate,
             name="Polygons GeoJSON",
-            identifier=URL.get_previous("polygons.geojson")['permalink_url'],
-            content_size=URL.get_size_at_commit("polygons.geojson", URL.get_previous("polygons.geojson")['commit_hash']),
+            identifier=previous["polygons.geojson"].info['permalink_url'],
+            content_size=previous["polygons.geojson"].size,
             description="Polygon bounding boxes defining where to download imagery.",
-            sha_256=URL.get_file_hash("polygons.geojson", "previous"),
+            sha_256=previous["polygons.geojson"].sha256,
             encoding_format="application/geo+json"),
         add_file_entity(
             crate=crate,
             name="Shorelines GeoJSON",
-            identifier=URL.get_previous("shorelines.geojson")['permalink_url'],
-            content_size=URL.get_size_at_commit("shorelines.geojson", URL.get_previous("shorelines.geojson")['commit_hash']),
+            identifier=previous["shorelines.geojson"].info['permalink_url'],
+            content_size=previous["shorelines.geojson"].size,
             description="Reference shorelines for transects.",
-            sha_256=URL.get_file_hash("shorelines.geojson", "previous"),
+            sha_256=previous["shorelines.geojson"].sha256,
             encoding_format="application/geo+json"
             ),
         add_file_entity(
             crate=crate,
             name="Transects Extended GeoJSON",
-            identifier=URL.get_previous("transects_extended.geojson")['permalink_url'],
-            content_size=URL.get_size_at_commit("transects_extended.geojson", URL.get_previous("transects_extended.geojson")['commit_hash']),
+            identifier=previous["transects_extended.geojson"].info['permalink_url'],
+            content_size=previous["transects_extended.geojson"].size,
             description="Transects with extended geometry for processing.",
             sha_256=URL.get_file_hash("transects_extended.geojson"),
             encoding_format="application/geo+json")
@@ -337,14 +364,20 @@ def build_e1_crate(output_dir: str, coastsat_dir: str):
             action["result"] = sar_timeseries_outputs
 
     # Write to output
-    crate.write(output_dir)
+    with phase("crate.write"):
+        crate.write(output_dir)
+    write_crate_summary("batch", BATCH_SUMMARY, crate=crate)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--output-dir", required=True, help="Output directory for E1 RO-Crate")
     parser.add_argument("--coastsat-dir", required=True, help="CoastSat directory path")
+    parser.add_argument("--cache-dir", default=None, help="Directory for caches persisted between builds")
     args = parser.parse_args()
 
+    if args.cache_dir:
+        set_cache_dir(args.cache_dir)
+
     output_path = os.path.abspath(args.output_dir)
     os.makedirs(output_path, exist_ok=True)
     
@@ -1,25 +1,64 @@
-from notebook_provenance.notebook_to_provcrate import generate_provenance_crate_for_notebook
-from notebook_provenance.provenance_types import NotebookCellProvenance, ProspectiveIndex
+from notebook_provenance.notebook_to_provcrate import generate_provenance_crate_for_notebook, load_cell_provenance
+from notebook_provenance.notebook_model import NotebookModel
+from notebook_provenance.provenance_types import NotebookCellProvenance, ProspectiveIndex, CellProvenanceResult
 
+from crate_summaries import notebook_summary_name, write_crate_summary
+from profiling import phase, profiled
+import profiling
+from provenance_cache import get_provenance_cache
 from rocrate.rocrate import ROCrate
 from pathlib import Path
 import argparse
-from typing import List, Union
+import tempfile
+from typing import List, Optional, Tuple, Union
 
-def build_e2_2_crate(output_dir: str, coastsat_dir: str, notebook_path: str) -> List[NotebookCellProvenance]:
+@profiled()
+def build_e2_2_crate(output_dir: str, coastsat_dir: str, notebook_path: str, scratch_dir: Optional[str] = None) -> List[CellProvenanceResult]:
     """
     Build a provenance RO-Crate describing the WMS layer (E2.2).
     This crate may later be linked into the interface crate.
+    With a cache directory configured, the crate of a notebook whose code cells, metadata and Plotly
+    outputs are unchanged is restored from the cache.
     """
+    cache = get_provenance_cache()
+    summary_name = notebook_summary_name(Path(output_dir).name)
+    if cache is not None:
+        notebook = NotebookModel.load(notebook_path)
+        key = cache.notebook_key(notebook)
+        cells = cache.restore(key, output_dir, notebook)
+        if cells is not None:
+            write_crate_summary("notebook", summary_name, crate_dir=output_dir)
+            return cells
 
-    crate, cell_prov = generate_provenance_crate_for_notebook(notebook_path, output_dir)
-    crate.write(output_dir)
+    crate, cell_prov = generate_provenance_crate_for_notebook(notebook_path, output_dir, scratch_dir, plot_cache=cache)
+    with phase("crate.write"):
+        crate.write(output_dir)
+    write_crate_summary("notebook", summary_name, crate=crate)
     
     # Handle both ProspectiveIndex and List[NotebookCellProvenance] return types
-    if hasattr(cell_prov, 'steps'):
-        return cell_prov.steps  # type: ignore
-    else:
-        return cell_prov  # type: ignore
+    steps = cell_prov.steps if hasattr(cell_prov, 'steps') else cell_prov  # type: ignore
+    cells = [CellProvenanceResult.from_cell(cell) for cell in steps]
+    if cache is not None:
+        cache.store(key, output_dir, cells, notebook)
+    return cells
+
+def build_e2_2_crate_isolated(output_dir: str, coastsat_dir: str, notebook_path: str) -> Tuple[List[CellProvenanceResult], list]:
+    """
+    Worker-process entry point for build_e2_2_crate: stage files in a private scratch
+    directory and return plain, picklable cell provenance, together with the profile data
+    the worker recorded for it (empty unless profiling is enabled, see profiling.collect).
+    """
+    with tempfile.TemporaryDirectory(prefix="e2_2_scratch_") as scratch_dir:
+        cells = build_e2_2_crate(output_dir, coastsat_dir, notebook_path, scratch_dir)
+    return cells, profiling.collect()
+
+@profiled()
+def load_e2_2_crate(output_dir: str, notebook_path: str) -> List[NotebookCellProvenance]:
+    """
+    Return the cell provenance of a provenance RO-Crate already written to output_dir
+    by build_e2_2_crate, so an unchanged notebook does not have to be processed again.
+    """
+    return load_cell_provenance(output_dir, notebook_path)
 
 def main():
     parser = argparse.ArgumentParser(description="Build LivePublication provenance crate.")
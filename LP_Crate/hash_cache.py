@@ -0,0 +1,142 @@
+"""
+Shared SHA-256 cache for LP_Crate.
+
+Hashes are stored in a SQLite database keyed by git blob ID for content read
+from git objects, and by (path, size, mtime_ns, inode) for files on disk.
+Working-tree files are keyed by path even when git tracks them: checkout
+filters (eol conversion, LFS) can make them differ from the blob bytes.
+Unchanged files are therefore hashed once and looked up on every later
+build. The database lives in the configured cache directory; without one it is
+kept in memory for the current process only.
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+from config import get_cache_dir
+from profiling import count
+
+# Files modified this recently are not cached: a second write within the same
+# mtime tick would otherwise leave a stale entry with a matching stat key
+RACY_WINDOW_NS = 2_000_000_000
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class HashCache:
+    # v2: blob_hashes only holds hashes of blob content (v1 also stored working-tree hashes there)
+    FILENAME = "hash_cache.v2.sqlite3"
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.path = os.path.join(cache_dir, self.FILENAME)
+        else:
+            self.path = ":memory:"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        if cache_dir:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blob_hashes (blob_id TEXT PRIMARY KEY, sha256 TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, sha256 TEXT NOT NULL)"
+        )
+
+    def get_blob(self, blob_id) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM blob_hashes WHERE blob_id = ?", (blob_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_blob(self, blob_id, sha256):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blob_hashes (blob_id, sha256) VALUES (?, ?)", (blob_id, sha256)
+            )
+
+    def get_file(self, path, stat: os.stat_result) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_file(self, path, stat: os.stat_result, sha256):
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, inode, sha256) VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, stat.st_ino, sha256)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_hash_cache: Optional[HashCache] = None
+_hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache() -> HashCache:
+    """Return the process-wide hash cache for the configured cache directory."""
+    global _hash_cache
+    cache_dir = get_cache_dir()
+    with _hash_cache_lock:
+        if _hash_cache is None or _hash_cache.cache_dir != cache_dir:
+            if _hash_cache is not None:
+                _hash_cache.close()
+            _hash_cache = HashCache(cache_dir)
+        return _hash_cache
+
+
+@atexit.register
+def close_hash_cache():
+    global _hash_cache
+    with _hash_cache_lock:
+        if _hash_cache is not None:
+            _hash_cache.close()
+            _hash_cache = None
+
+
+def hash_file(path) -> tuple[str, int]:
+    """Compute the SHA-256 and size of a file in one chunked pass, without consulting the cache."""
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+    count("bytes_hashed", size)
+    return sha256.hexdigest(), size
+
+
+def file_digest(path) -> tuple[str, int]:
+    """Return the (SHA-256, size in bytes) of a file on disk, using the shared cache."""
+    cache = get_hash_cache()
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    sha256 = cache.get_file(path, stat)
+    if sha256 is None:
+        sha256, size = hash_file(path)
+        cache.put_file(path, stat, sha256)
+        return sha256, size
+    return sha256, stat.st_size
+
+
+def file_sha256(path) -> str:
+    """Return the SHA-256 of a file on disk, using the shared cache (see `file_digest`)."""
+    return file_digest(path)[0]
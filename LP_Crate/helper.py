@@ -1,14 +1,315 @@
 import os
+import json
+import atexit
 import subprocess
+import threading
 import logging
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from typing import NamedTuple, Optional
 from urllib.parse import quote
 
+from config import get_cache_dir, get_max_workers
+from hash_cache import CHUNK_SIZE, get_hash_cache, file_digest
+from profiling import bind, count, profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def format_size_kb(size_bytes: int) -> str:
+    """Format a byte count the way crate File entities record "size"."""
+    return f"{size_bytes / 1024:.2f}"
+
+
+class CatFile:
+    """
+    Long-lived `git cat-file --batch` / `--batch-check` processes for one repository.
+
+    Objects are requested as "<rev>:<path>" lines on stdin. `--batch-check`
+    answers with a "<sha> <type> <size>" header only, so sizes and existence
+    checks never read a blob body; `--batch` follows the header with the
+    object content.
+
+    Each request checks a process out of an idle pool, so concurrent callers
+    run in parallel on separate processes; the pool only grows to the number
+    of requests in flight at once.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        self._idle: dict[str, list[subprocess.Popen]] = {"--batch": [], "--batch-check": []}
+        self._processes: list[subprocess.Popen] = []
+
+    def _start(self, mode):
+        return subprocess.Popen(
+            ["git", "-C", self.repo_path, "cat-file", mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def _checkout(self, mode) -> subprocess.Popen:
+        with self._lock:
+            if self._idle[mode]:
+                return self._idle[mode].pop()
+            process = self._start(mode)
+            self._processes.append(process)
+            return process
+
+    def _checkin(self, mode, process):
+        with self._lock:
+            self._idle[mode].append(process)
+
+    def _discard(self, process):
+        # A failed request may leave unread output behind, so the process cannot be reused
+        with self._lock:
+            self._processes.remove(process)
+        process.kill()
+        process.wait()
+
+    @staticmethod
+    def _request(process, rev):
+        process.stdin.write(rev.encode("utf-8") + b"\n")
+        process.stdin.flush()
+        header = process.stdout.readline()
+        if not header:
+            raise RuntimeError(f"git cat-file exited unexpectedly in {process.args[2]}")
+        header = header.rstrip(b"\n")
+        # Missing objects answer "<rev> missing" (and ambiguous ones "<rev> ambiguous"); rev may contain spaces
+        if header.endswith((b" missing", b" ambiguous")):
+            return None
+        sha, object_type, size = header.rsplit(None, 2)
+        return sha.decode(), object_type.decode(), int(size)
+
+    def info(self, rev):
+        """
+        Return (object sha, object type, size in bytes) for `rev`, or None if it does not exist.
+        """
+        if "\n" in rev:
+            raise ValueError(f"Cannot request object with a newline in its name: {rev!r}")
+        process = self._checkout("--batch-check")
+        try:
+            header = self._request(process, rev)
+        except BaseException:
+            self._discard(process)
+            raise
+        self._checkin("--batch-check", process)
+        return header
+
+    def stream(self, rev, consume, chunk_size=CHUNK_SIZE):
+        """
+        Pass the content of blob `rev` to `consume` in chunks of at most `chunk_size`
+        bytes and return its size, or None if it does not exist or is not a blob.
+        The whole object is always drained so the process stays in sync.
+        """
+        if "\n" in rev:
+            raise ValueError(f"Cannot request object with a newline in its name: {rev!r}")
+        process = self._checkout("--batch")
+        try:
+            header = self._request(process, rev)
+            if header is None:
+                self._checkin("--batch", process)
+                return None
+            _, object_type, size = header
+            remaining = size
+            while remaining:
+                chunk = process.stdout.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise RuntimeError(f"git cat-file ended before the end of {rev}")
+                remaining -= len(chunk)
+                if object_type == "blob":
+                    consume(chunk)
+            process.stdout.read(1)  # trailing newline after the object body
+        except BaseException:
+            self._discard(process)
+            raise
+        self._checkin("--batch", process)
+        return size if object_type == "blob" else None
+
+    def read(self, rev):
+        """
+        Return the content of blob `rev` as bytes, or None if it does not exist or is not a blob.
+        """
+        chunks = []
+        if self.stream(rev, chunks.append) is None:
+            return None
+        return b"".join(chunks)
+
+    def close(self):
+        with self._lock:
+            for process in self._processes:
+                process.stdin.close()
+                process.wait()
+                process.stdout.close()
+            self._processes = []
+            self._idle = {"--batch": [], "--batch-check": []}
+
+
+# One CatFile per repository root, shared by every GitURL pointing at it
+_cat_files: dict[str, CatFile] = {}
+_cat_files_lock = threading.Lock()
+
+
+def get_cat_file(repo_root) -> CatFile:
+    with _cat_files_lock:
+        if repo_root not in _cat_files:
+            _cat_files[repo_root] = CatFile(repo_root)
+        return _cat_files[repo_root]
+
+
+@atexit.register
+def close_cat_files():
+    with _cat_files_lock:
+        for cat_file in _cat_files.values():
+            cat_file.close()
+        _cat_files.clear()
+
+
+class CommitCache:
+    """
+    Resolved commit lookups keyed by (repo root, HEAD, grep pattern).
+
+    History reachable from a given HEAD never changes, so an entry stays valid
+    for as long as HEAD does and can safely be persisted between builds.
+    """
+
+    FILENAME = "commit_cache.json"
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, self.FILENAME) if cache_dir else None
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        if self.path and os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f).get("entries", {})
+            except (OSError, ValueError):
+                logger.warning(f"Ignoring unreadable commit cache at {self.path}")
+
+    @staticmethod
+    def _key(repo_root, head, pattern):
+        return "\0".join((repo_root, head, pattern))
+
+    def get(self, repo_root, head, pattern) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(self._key(repo_root, head, pattern))
+
+    def set(self, repo_root, head, pattern, entry: dict):
+        """Store `entry` ({"limit": git log -n value, "commits": [...]}) for the key."""
+        with self._lock:
+            self._entries[self._key(repo_root, head, pattern)] = entry
+            if self.path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"entries": self._entries}, f)
+                os.replace(tmp_path, self.path)
+
+
+_commit_cache: Optional[CommitCache] = None
+_commit_cache_lock = threading.Lock()
+
+
+def get_commit_cache() -> CommitCache:
+    """Return the process-wide commit cache for the configured cache directory."""
+    global _commit_cache
+    cache_dir = get_cache_dir()
+    with _commit_cache_lock:
+        if _commit_cache is None or _commit_cache.cache_dir != cache_dir:
+            _commit_cache = CommitCache(cache_dir)
+        return _commit_cache
+
+
+class TreeEntry(NamedTuple):
+    sha: str
+    size: int
+    mode: str
+
+
+class TreeSnapshot:
+    """
+    In-memory index of every blob in a commit, keyed by path relative to the repo root.
+
+    Built from a single `git ls-tree -r -l` so that existence checks, sizes and
+    directory listings for a whole commit are dictionary lookups.
+    """
+
+    def __init__(self, commit_hash: str, entries: dict[str, TreeEntry]):
+        self.commit_hash = commit_hash
+        self.entries = entries
+        self._children: Optional[dict[str, set[str]]] = None
+
+    @classmethod
+    @profiled("TreeSnapshot.from_git")
+    def from_git(cls, repo_path, commit_hash) -> "TreeSnapshot":
+        output = subprocess.check_output(
+            ["git", "-C", repo_path, "ls-tree", "-r", "-l", "-z", "--full-tree", commit_hash]
+        )
+        entries = {}
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            # "<mode> <type> <sha> <size>\t<path>"; submodules have no size and are skipped
+            meta, path = record.split(b"\t", 1)
+            mode, object_type, sha, size = meta.split()
+            if object_type != b"blob":
+                continue
+            entries[path.decode("utf-8", "surrogateescape")] = TreeEntry(sha.decode(), int(size), mode.decode())
+        return cls(commit_hash, entries)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, path) -> Optional[TreeEntry]:
+        return self.entries.get(path)
+
+    def children(self, directory="") -> list[str]:
+        """Return the sorted names of files and directories directly inside `directory`."""
+        if self._children is None:
+            children: dict[str, set[str]] = {}
+            for path in self.entries:
+                parts = path.split("/")
+                for depth in range(len(parts)):
+                    children.setdefault("/".join(parts[:depth]), set()).add(parts[depth])
+            self._children = children
+        return sorted(self._children.get(directory.strip("/"), ()))
+
+    def is_dir(self, path) -> bool:
+        self.children()
+        return path.strip("/") in self._children  # type: ignore
+
+    def glob(self, pattern) -> list[str]:
+        """
+        Return the sorted paths matching a glob pattern. As with `glob.glob`,
+        wildcards never match across "/".
+        """
+        parts = pattern.strip("/").split("/")
+        return sorted(
+            path for path in self.entries
+            if path.count("/") == len(parts) - 1
+            and all(fnmatchcase(name, part) for name, part in zip(path.split("/"), parts))
+        )
+
+
+class FileMetadata(NamedTuple):
+    """Everything a crate File entity records about one file."""
+    info: dict  # as returned by GitURL.get / GitURL.get_previous
+    sha256: Optional[str]
+    size: str
+
+
 class GitURL:
+    # Commit message marking the CoastSat "auto update" runs (see update.sh)
+    AUTO_UPDATE_PATTERN = "auto update"
+
     def __init__(self, repo_path=".", remote_name="origin", branch_name=None):
         self.repo_path = os.path.abspath(repo_path)  # Normalize the path
         self.remote_name = remote_name
@@ -18,6 +319,12 @@ class GitURL:
         self.commit_hash = self._get_commit_hash()
         if not self.branch_name:
             self.branch_name = self._get_branch_name()
+        self.cat_file = get_cat_file(self.repo_root)
+        self._snapshots: dict[str, TreeSnapshot] = {}
+        self._snapshots_lock = threading.Lock()
+        # Digests computed through this instance, recorded for the next incremental build
+        self.worktree_digests: dict[str, tuple[str, int]] = {}
+        self.blob_digests: dict[str, str] = {}
 
     def _get_remote_url(self):
         remote_url = subprocess.check_output(
@@ -48,9 +355,61 @@ class GitURL:
             text=True
         ).strip()
 
-    def get(self, local_path):
+    def _rel_path(self, local_path):
         abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
-        rel_path = os.path.relpath(abs_path, self.repo_root)
+        return os.path.relpath(abs_path, self.repo_root)
+
+    def snapshot(self, commit_hash=None) -> TreeSnapshot:
+        """
+        Return the tree snapshot of `commit_hash` (HEAD by default), listing it on first use.
+        """
+        commit_hash = commit_hash or self.commit_hash
+        with self._snapshots_lock:
+            if commit_hash not in self._snapshots:
+                self._snapshots[commit_hash] = TreeSnapshot.from_git(self.repo_path, commit_hash)
+            return self._snapshots[commit_hash]
+
+    def current_snapshot(self) -> TreeSnapshot:
+        return self.snapshot(self.commit_hash)
+
+    def previous_snapshot(self) -> TreeSnapshot:
+        return self.snapshot(self.get_previous_commit_hash())
+
+    def get_blob_info(self, local_path, commit_hash) -> Optional[tuple[str, int]]:
+        """
+        Return (blob sha, size in bytes) of the file at the given commit, or None if it
+        does not exist there.
+        """
+        entry = self.snapshot(commit_hash).get(self._rel_path(local_path))
+        if entry is None:
+            return None
+        return entry.sha, entry.size
+
+    def exists(self, local_path, commit_hash=None) -> bool:
+        """Return True if the file is tracked at the given commit (HEAD by default)."""
+        return self._rel_path(local_path) in self.snapshot(commit_hash)
+
+    @profiled()
+    def list_dir(self, local_dir, commit_hash=None) -> list[str]:
+        """Return the sorted names inside a directory at the given commit (HEAD by default)."""
+        return self.snapshot(commit_hash).children(self._rel_path(local_dir))
+
+    @profiled()
+    def glob(self, pattern, commit_hash=None) -> list[str]:
+        """
+        Return the sorted local paths (relative to repo_path) of files matching `pattern`
+        at the given commit (HEAD by default).
+        """
+        prefix = os.path.relpath(self.repo_path, self.repo_root)
+        rel_pattern = self._rel_path(pattern)
+        matches = self.snapshot(commit_hash).glob(rel_pattern)
+        if prefix == ".":
+            return matches
+        return [os.path.relpath(path, prefix) for path in matches]
+
+    @profiled()
+    def get(self, local_path):
+        rel_path = self._rel_path(local_path)
         encoded_path = quote(rel_path)
         latest_url = f"{self.remote_url}/blob/{self.branch_name}/{encoded_path}"
         permalink_url = f"{self.remote_url}/blob/{self.commit_hash}/{encoded_path}"
@@ -60,65 +419,146 @@ class GitURL:
             "commit_hash": self.commit_hash
         }
 
+    @profiled()
     def get_size(self, local_path):
         abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
         if not os.path.isfile(abs_path):
             raise FileNotFoundError(f"{abs_path} is not a file.")
-        size_bytes = os.path.getsize(abs_path)
-        size_kb = size_bytes / 1024
-        return f"{size_kb:.2f}"
+        return format_size_kb(os.path.getsize(abs_path))
     
 
+    @profiled()
+    def find_commits(self, pattern, count):
+        """
+        Return up to `count` most recent commits reachable from HEAD whose message
+        matches `pattern`. Results are memoized in the commit cache.
+        """
+        cache = get_commit_cache()
+        entry = cache.get(self.repo_root, self.commit_hash, pattern)
+        if entry is None or entry["limit"] < count:
+            commits = subprocess.check_output(
+                ["git", "-C", self.repo_path, "log", f"--grep={pattern}", "-n", str(count),
+                 "--pretty=format:%H", self.commit_hash],
+                text=True
+            ).strip().splitlines()
+            entry = {"limit": count, "commits": commits}
+            cache.set(self.repo_root, self.commit_hash, pattern, entry)
+        return entry["commits"][:count]
+
     def get_previous_commit_hash(self):
         # Find the second most recent commit with message "auto update"
-        log_output = subprocess.check_output(
-            ["git", "-C", self.repo_path, "log", "--grep=auto update", "--pretty=format:%H"],
-            text=True
-        ).strip().splitlines()
-        if len(log_output) < 2:
+        commits = self.find_commits(self.AUTO_UPDATE_PATTERN, 2)
+        if len(commits) < 2:
             raise ValueError("Less than two 'auto update' commits found.")
-        return log_output[1]
+        return commits[1]
 
+    @profiled()
     def get_previous(self, local_path):
         previous_hash = self.get_previous_commit_hash()
-        abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
-        rel_path = os.path.relpath(abs_path, self.repo_root)
-        encoded_path = quote(rel_path)
+        encoded_path = quote(self._rel_path(local_path))
         # Check if file exists at previous commit
-        try:
-            subprocess.check_output(
-                ["git", "-C", self.repo_path, "show", f"{previous_hash}:{rel_path}"],
-                stderr=subprocess.DEVNULL
-            )
+        if self.get_blob_info(local_path, previous_hash) is not None:
             permalink_url = f"{self.remote_url}/blob/{previous_hash}/{encoded_path}"
             return {
                 "permalink_url": permalink_url,
                 "commit_hash": previous_hash,
                 "exists": True
             }
-        except subprocess.CalledProcessError:
-            # Fallback to current file
-            permalink_url = f"{self.remote_url}/blob/{self.commit_hash}/{encoded_path}"
-            return {
-                "permalink_url": permalink_url,
-                "commit_hash": self.commit_hash,
-                "exists": False
-            }
+        # Fallback to current file
+        permalink_url = f"{self.remote_url}/blob/{self.commit_hash}/{encoded_path}"
+        return {
+            "permalink_url": permalink_url,
+            "commit_hash": self.commit_hash,
+            "exists": False
+        }
 
+    @profiled()
     def get_size_at_commit(self, local_path, commit_hash):
-        rel_path = os.path.relpath(
-            os.path.abspath(os.path.join(self.repo_path, local_path)),
-            self.repo_root
-        )
+        blob = self.get_blob_info(local_path, commit_hash)
+        if blob is None:
+            raise FileNotFoundError(f"{self._rel_path(local_path)} does not exist at commit {commit_hash}")
+        return format_size_kb(blob[1])
+
+    @profiled()
+    def get_file_digest(self, local_path, which="current") -> Optional[tuple[str, int]]:
+        """
+        Return (SHA-256, size in bytes) of the file for the specified commit state, or None
+        if it does not exist there.
+        which: "current" for working directory file, "previous" for the second most recent 'auto update' commit.
+        Content is hashed in bounded chunks and only when the shared hash cache misses. Working-tree files
+        are cached by path and stat, git blobs by blob ID, so the two never share an entry.
+        """
+        if which == "current":
+            abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
+            if not os.path.isfile(abs_path):
+                return None
+            digest = file_digest(abs_path)
+            self.worktree_digests[self._rel_path(local_path)] = digest
+            return digest
+        elif which == "previous":
+            blob = self.get_blob_info(local_path, self.get_previous_commit_hash())
+            if blob is None:
+                return None
+            blob_id, size = blob
+            cache = get_hash_cache()
+            sha256 = cache.get_blob(blob_id)
+            if sha256 is None:
+                hasher = hashlib.sha256()
+                if self.cat_file.stream(blob_id, hasher.update) is None:
+                    return None
+                count("bytes_hashed", size)
+                sha256 = hasher.hexdigest()
+                cache.put_blob(blob_id, sha256)
+            self.blob_digests[blob_id] = sha256
+            return sha256, size
+        return None
+
+    @profiled()
+    def get_file_metadata(self, local_path, which="current") -> tuple[Optional[str], str]:
+        """
+        Return (SHA-256, size in KB) for the file in the specified commit state, read in one pass.
+        If the file is absent from the previous commit the hash is None and the size is taken
+        from the current commit, which is where get_previous() points in that case.
+        """
         try:
-            content = subprocess.check_output(
-                ["git", "-C", self.repo_path, "show", f"{commit_hash}:{rel_path}"],
-                stderr=subprocess.DEVNULL
-            )
-            size_kb = len(content) / 1024
-            return f"{size_kb:.2f}"
-        except subprocess.CalledProcessError:
-            raise FileNotFoundError(f"{rel_path} does not exist at commit {commit_hash}")
+            digest = self.get_file_digest(local_path, which)
+        except Exception:
+            digest = None
+        if digest is not None:
+            return digest[0], format_size_kb(digest[1])
+        if which == "previous":
+            return None, self.get_size_at_commit(local_path, self.commit_hash)
+        return None, self.get_size(local_path)
+
+    @profiled()
+    def resolve_file_metadata(self, requests, max_workers=None) -> list[FileMetadata]:
+        """
+        Resolve permalink info, SHA-256 and size for each (local_path, previous) request.
+        `previous` selects the previous 'auto update' commit instead of the working tree.
+        The git reads and hashing run on a bounded thread pool; results come back in
+        request order so crate output stays deterministic.
+        """
+        requests = [(local_path, bool(previous)) for local_path, previous in requests]
+        # Resolve the shared lazily-built state once, before fanning out
+        self.current_snapshot()
+        if any(previous for _, previous in requests):
+            self.previous_snapshot()
+
+        max_workers = min(max_workers or get_max_workers(), len(requests))
+        if max_workers <= 1:
+            return [self._resolve_one(local_path, previous) for local_path, previous in requests]
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resolve") as executor:
+            resolve = bind(lambda request: self._resolve_one(*request))
+            return list(executor.map(resolve, requests))
+
+    def _resolve_one(self, local_path, previous) -> FileMetadata:
+        if previous:
+            info = self.get_previous(local_path)
+            sha256, size = self.get_file_metadata(local_path, which="previous")
+        else:
+            info = self.get(local_path)
+            sha256, size = self.get_file_metadata(local_path)
+        return FileMetadata(info, sha256, size)
 
     def get_file_hash(self, local_path, which="current"):
         """
@@ -127,40 +567,38 @@ class GitURL:
         Returns None if the file does not exist.
         """
         try:
-            if which == "current":
-                abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
-                if not os.path.isfile(abs_path):
-                    return None
-                with open(abs_path, "rb") as f:
-                    content = f.read()
-            elif which == "previous":
-                previous_hash = self.get_previous_commit_hash()
-                rel_path = os.path.relpath(
-                    os.path.abspath(os.path.join(self.repo_path, local_path)),
-                    self.repo_root
-                )
-                try:
-                    content = subprocess.check_output(
-                        ["git", "-C", self.repo_path, "show", f"{previous_hash}:{rel_path}"],
-                        stderr=subprocess.DEVNULL
-                    )
-                except subprocess.CalledProcessError:
-                    return None
-            else:
-                return None
-            return hashlib.sha256(content).hexdigest()
+            digest = self.get_file_digest(local_path, which)
         except Exception:
             return None
-
-        return hashlib.sha256(content).hexdigest()
+        return digest[0] if digest else None
     
+    def get_commit_url(self, commit_hash=None):
+        """Return the remote URL of `commit_hash` (HEAD by default)."""
+        return f"{self.remote_url}/commit/{commit_hash or self.commit_hash}"
+
+    def has_commit(self, commit_hash) -> bool:
+        """Return True if `commit_hash` names a commit in this repository."""
+        info = self.cat_file.info(f"{commit_hash}^{{commit}}")
+        return info is not None and info[1] == "commit"
+
+    @profiled()
+    def changed_paths(self, commit_hash) -> set[str]:
+        """
+        Return the repo-relative paths whose working-tree content differs from
+        `commit_hash`, covering both later commits and uncommitted changes.
+        """
+        output = subprocess.check_output(
+            ["git", "-C", self.repo_path, "diff", "--name-only", "--no-renames", "-z", commit_hash]
+        )
+        return {p.decode("utf-8", "surrogateescape") for p in output.split(b"\0") if p}
+
+    @profiled()
     def get_commit_info_for_file(self, local_path):
         """
         Returns the latest commit hash that modified the given file
         and a link to the GitHub page for that commit.
         """
-        abs_path = os.path.abspath(os.path.join(self.repo_path, local_path))
-        rel_path = os.path.relpath(abs_path, self.repo_root)
+        rel_path = self._rel_path(local_path)
 
         try:
             commit_hash = subprocess.check_output(
@@ -177,6 +615,7 @@ class GitURL:
         except subprocess.CalledProcessError:
             raise ValueError(f"Could not retrieve commit info for file: {rel_path}")
 
+    @profiled()
     def get_commit_date(self):
         """
         Returns the ISO 8601 timestamp of the current commit.
@@ -0,0 +1,209 @@
+"""
+Incremental interface crate builds.
+
+A previous build is read from its ro-crate-metadata.json and the commit it
+was built from (the isBasedOn of its root dataset) is diffed against the
+working tree of the CoastSat checkout. Nothing is trusted blindly:
+
+- Notebook provenance crates are copied through when their notebook did not
+  change since the previous build, they were made by the current
+  PROVENANCE_GENERATOR_VERSION and their Plotly results use the current
+  encoding.
+- The batch_processes crate is copied through when it was made by the current
+  PROCESS_RUN_CRATE_VERSION and the commit, the working tree and the set of
+  described files are all unchanged.
+
+Everything else is rebuilt as usual.
+
+The generator version of each sub-crate is recorded in a sidecar file next to
+the interface crate's metadata (GENERATORS_FILENAME), which is not part of the
+crate; sub-crates it does not list are rebuilt.
+
+File hashes are not taken from the previous crate's entities: an entity's
+sha256 need not be that of the blob its permalink names (working-tree files are
+described under HEAD permalinks), and it cannot be checked without hashing the
+blob. Each build instead records the digests it computed in DIGESTS_FILENAME:
+blob digests by blob ID, and working-tree digests only for files identical to
+their HEAD blob, together with that blob's ID and the file size. The next build
+puts a working-tree digest into the hash cache only if the file is still
+identical to a HEAD blob with the same ID and still has the same size, so files
+that are unchanged across commits are not hashed again even in a fresh checkout.
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from config import get_plotly_encoding
+from hash_cache import get_hash_cache
+from helper import GitURL
+from e1_crate import PROCESS_RUN_CRATE_VERSION, expected_file_identifiers
+from notebook_provenance.notebook_to_provcrate import PROVENANCE_GENERATOR_VERSION
+from notebook_provenance.prospective_helper import PLOTLY_MIME_TYPE, TYPED_PLOTLY_DESCRIPTION
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILENAME = "ro-crate-metadata.json"
+# Maps each sub-crate directory to the version of the generator that made it
+GENERATORS_FILENAME = ".lp_crate_generators.json"
+# SHA-256 digests computed by a build (see the module docstring)
+DIGESTS_FILENAME = ".lp_crate_digests.json"
+
+
+def load_graph(metadata_path: Path) -> list[dict]:
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("@graph", [])
+
+
+def load_generator_versions(crate_dir: Path) -> dict[str, int]:
+    path = Path(crate_dir) / GENERATORS_FILENAME
+    if not path.is_file():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_generator_versions(crate_dir, generator_versions: dict[str, int]) -> None:
+    with open(Path(crate_dir) / GENERATORS_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(generator_versions, f, indent=2, sort_keys=True)
+
+
+def write_digests(crate_dir, URL: GitURL) -> None:
+    """Record the digests URL computed during this build for the next incremental build."""
+    changed_paths = URL.changed_paths(URL.commit_hash)
+    snapshot = URL.current_snapshot()
+    files = {}
+    for rel_path, (sha256, size) in sorted(URL.worktree_digests.items()):
+        entry = snapshot.get(rel_path)
+        if entry is not None and rel_path not in changed_paths:
+            files[rel_path] = {"blob": entry.sha, "size": size, "sha256": sha256}
+    with open(Path(crate_dir) / DIGESTS_FILENAME, "w", encoding="utf-8") as f:
+        json.dump({"blobs": dict(sorted(URL.blob_digests.items())), "files": files}, f, indent=2)
+
+
+def is_file_entity(entity: dict) -> bool:
+    types = entity.get("@type", [])
+    return "File" in (types if isinstance(types, list) else [types])
+
+
+class PreviousBuild:
+    """A previously written interface crate and the commit it was built from."""
+
+    def __init__(self, crate_dir: Path, graph: list[dict], commit_hash: str, URL: GitURL):
+        self.crate_dir = crate_dir
+        self.graph = graph
+        self.entities = {entity.get("@id"): entity for entity in graph}
+        self.commit_hash = commit_hash
+        self.URL = URL
+        self.changed_paths = URL.changed_paths(commit_hash)
+        self.generator_versions = load_generator_versions(crate_dir)
+
+    @classmethod
+    def load(cls, crate_dir, URL: GitURL) -> Optional["PreviousBuild"]:
+        """Return the previous build in crate_dir, or None if it cannot be used for an incremental build."""
+        crate_dir = Path(crate_dir)
+        metadata_path = crate_dir / METADATA_FILENAME
+        if not metadata_path.is_file():
+            logger.info(f"No previous crate at {metadata_path}; running a full build.")
+            return None
+        graph = load_graph(metadata_path)
+
+        root = next((entity for entity in graph if entity.get("@id") == "./"), {})
+        based_on = root.get("isBasedOn") or {}
+        commit_url = based_on.get("@id", "") if isinstance(based_on, dict) else ""
+        commit_prefix = f"{URL.remote_url}/commit/"
+        commit_hash = commit_url[len(commit_prefix):] if commit_url.startswith(commit_prefix) else ""
+        if not commit_hash or not URL.has_commit(commit_hash):
+            logger.info(f"Previous crate is not based on a commit of {URL.remote_url} ({commit_url!r}); running a full build.")
+            return None
+        return cls(crate_dir, graph, commit_hash, URL)
+
+    def reuse_digests(self) -> int:
+        """
+        Put the digests recorded by the previous build into the hash cache where they still hold.
+        Return the number of working-tree files that will not be hashed again.
+        """
+        path = self.crate_dir / DIGESTS_FILENAME
+        if not path.is_file():
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            digests = json.load(f)
+        cache = get_hash_cache()
+        for blob_id, sha256 in digests.get("blobs", {}).items():
+            cache.put_blob(blob_id, sha256)
+
+        # Only files still identical to the same HEAD blob have the content that was hashed
+        changed_paths = self.URL.changed_paths(self.URL.commit_hash)
+        snapshot = self.URL.current_snapshot()
+        reused = 0
+        for rel_path, record in digests.get("files", {}).items():
+            entry = snapshot.get(rel_path)
+            if entry is None or entry.sha != record["blob"] or rel_path in changed_paths:
+                continue
+            abs_path = os.path.join(self.URL.repo_root, rel_path)
+            try:
+                stat = os.stat(abs_path)
+            except OSError:
+                continue
+            if stat.st_size != record["size"]:
+                continue
+            cache.put_file(abs_path, stat, record["sha256"])
+            reused += 1
+        return reused
+
+    def is_unchanged(self, local_path) -> bool:
+        """Return True if the file is tracked and identical to the previous build's commit."""
+        rel_path = self.URL._rel_path(local_path)
+        return rel_path not in self.changed_paths and self.URL.exists(local_path, self.commit_hash)
+
+    def has_version(self, rel_dir: str, version: int) -> bool:
+        """Return True if the previous build recorded the sub-crate in rel_dir as made by generator version."""
+        return self.generator_versions.get(rel_dir) == version
+
+    def _copy_subcrate(self, rel_dir: str, output_dir) -> bool:
+        source = self.crate_dir / rel_dir
+        if not (source / METADATA_FILENAME).is_file():
+            return False
+        target = Path(output_dir) / rel_dir
+        if source.resolve() != target.resolve():
+            if target.exists():
+                shutil.rmtree(target)
+            shutil.copytree(source, target)
+        return True
+
+    def copy_notebook_crate(self, rel_dir: str, notebook_path, output_dir) -> bool:
+        """
+        Copy the notebook provenance crate in rel_dir through if its notebook is unchanged,
+        it was made by the current generator and its Plotly results are stored in the current encoding.
+        """
+        if not self.has_version(rel_dir, PROVENANCE_GENERATOR_VERSION) or not self.is_unchanged(notebook_path):
+            return False
+        metadata_path = self.crate_dir / rel_dir / METADATA_FILENAME
+        if metadata_path.is_file():
+            typed = get_plotly_encoding() == "typed"
+            for entity in load_graph(metadata_path):
+                if entity.get("encodingFormat") != PLOTLY_MIME_TYPE:
+                    continue
+                if (entity.get("description") == TYPED_PLOTLY_DESCRIPTION) != typed:
+                    return False
+        return self._copy_subcrate(rel_dir, output_dir)
+
+    def copy_batch_crate(self, rel_dir: str, output_dir, limit: Optional[int]) -> bool:
+        """
+        Copy the batch_processes crate in rel_dir through if it would be rebuilt identically:
+        same generator, same commit, no working-tree changes and the same File entities for the current limit.
+        """
+        if not self.has_version(rel_dir, PROCESS_RUN_CRATE_VERSION):
+            return False
+        if self.commit_hash != self.URL.commit_hash or self.changed_paths:
+            return False
+        metadata_path = self.crate_dir / rel_dir / METADATA_FILENAME
+        if not metadata_path.is_file():
+            return False
+        previous_ids = {entity["@id"] for entity in load_graph(metadata_path) if is_file_entity(entity)}
+        if previous_ids != expected_file_identifiers(self.URL, limit):
+            return False
+        return self._copy_subcrate(rel_dir, output_dir)
@@ -6,20 +6,30 @@ from rocrate.model.data_entity import DataEntity
 from pathlib import Path
 from collections import Counter, defaultdict
 
-from helper import GitURL
-from e1_crate import build_e1_crate
-from e2_2_crate import build_e2_2_crate
-from notebook_provenance.provenance_types import NotebookCellProvenance
-from config import get_file_limit
+from helper import GitURL, FileMetadata
+from e1_crate import build_e1_crate, PROCESS_RUN_CRATE_VERSION
+from e2_2_crate import build_e2_2_crate, build_e2_2_crate_isolated, load_e2_2_crate
+from notebook_provenance.notebook_to_provcrate import PROVENANCE_GENERATOR_VERSION
+from notebook_provenance.provenance_types import CellProvenanceResult
+from config import get_file_limit, set_file_limit, parse_file_limit, get_cache_dir, set_cache_dir, get_max_processes, get_plotly_encoding, set_plotly_encoding, PLOTLY_ENCODINGS, get_summary_dir, set_summary_dir
+from crate_summaries import BATCH_SUMMARY, INTERFACE_SUMMARY, notebook_summary_name, write_crate_summary, copy_crate_summary, write_summary_overview
+from hash_cache import file_sha256
+from incremental import PreviousBuild, write_digests, write_generator_versions
+from profiling import phase, profiled
+import profiling
 
 import os
 import re
+import copy
 import shutil
 import argparse
-import hashlib
-from glob import glob
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-def build_e1(crate: ROCrate, coastsat_dir: str, URL: GitURL, E1, output_dir):
+@profiled()
+def build_e1(crate: ROCrate, coastsat_dir: str, URL: GitURL, E1, output_dir, generator_versions: dict,
+             previous_build: Optional[PreviousBuild] = None):
     """
     Build metadata for E1: Data Producer.
     - Identify and describe data production scripts and data outputs.
@@ -30,7 +40,12 @@ def build_e1(crate: ROCrate, coastsat_dir: str, URL: GitURL, E1, output_dir):
     prc_dir = "batch_processes"
     prc_manifest = prc_dir + "/ro-crate-metadata.json"
     e1_output_dir = Path(output_dir) / prc_dir
-    build_e1_crate(str(e1_output_dir), coastsat_dir)
+    if previous_build is not None and previous_build.copy_batch_crate(prc_dir, output_dir, get_file_limit()):
+        print(f"Reusing unchanged {prc_dir} crate from the previous build")
+        write_crate_summary("batch", BATCH_SUMMARY, crate_dir=e1_output_dir)
+    else:
+        build_e1_crate(str(e1_output_dir), coastsat_dir, URL)
+    generator_versions[prc_dir] = PROCESS_RUN_CRATE_VERSION
 
     process_run_crate = crate.add(DataEntity(crate, prc_manifest, properties={
         "@type": ["RO-Crate", "ProcessRunCrate"],
@@ -54,6 +69,7 @@ def build_e1(crate: ROCrate, coastsat_dir: str, URL: GitURL, E1, output_dir):
 
     E1["hasPart"] = [process_run_crate, external_data]
 
+@profiled()
 def build_e2_1(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_1):
     """
     Build metadata for E2.1: Workflow Infrastructure.
@@ -79,6 +95,7 @@ def parse_update_script(update_script_path: Path) -> tuple[list[str], list[str]]
                 step_files.append("make_xlsx.py")
     return comments, step_files
 
+@profiled()
 def create_update_workflow_entity(crate: ROCrate, update_script_path: Path, comments: list[str], URL: GitURL) -> ContextEntity:
     programming_language = crate.add(ContextEntity(crate, "Bash", properties={
         "@type": "ComputerLanguage",
@@ -99,13 +116,10 @@ def create_update_workflow_entity(crate: ROCrate, update_script_path: Path, comm
     )
 
 def compute_sha256(filepath: Path) -> str:
-    """Compute the SHA256 hash of a file."""
-    hash_sha256 = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            hash_sha256.update(chunk)
-    return hash_sha256.hexdigest()
+    """Compute the SHA256 hash of a file, reusing the shared hash cache."""
+    return file_sha256(filepath)
 
+@profiled()
 def create_workflow_step_entities(crate: ROCrate, coastsat_dir: Path, step_files: list[str], URL: GitURL) -> list[dict]:
 
     python_language = crate.add(ContextEntity(crate, "Python", properties={
@@ -219,26 +233,18 @@ def add_parameter_to_entities(param, notebook_entity, workflow_entity, io_type):
         if param not in entity[io_type]:
             entity.append_to(io_type, param)
 
-def create_file_entity(crate, file_path, URL, name_override=None, description_override=None, previous=False):
+def create_file_entity(crate, file_path, URL, name_override=None, description_override=None, previous=False, metadata: Optional[FileMetadata] = None):
 
-    if previous:
-        # Collect information from the previous commit
-        info = URL.get_previous(file_path)
-        hash = URL.get_file_hash(file_path, which="previous")
-        size = URL.get_size_at_commit(file_path, info['commit_hash'])
-        # print(f"[create_file_entity] Using previous commit info for {file_path}: hash={hash}, size={size}")
-    else:
-        # Collect information from the current commit
-        info = URL.get(file_path)
-        hash = URL.get_file_hash(file_path)
-        size = URL.get_size(file_path)
-        # print(f"[create_file_entity] Using current commit info for {file_path}: hash={hash}, size={size}")
+    if metadata is None:
+        # Collect information from the previous commit or the current working tree
+        metadata = URL.resolve_file_metadata([(file_path, previous)])[0]
+    info = metadata.info
 
     props = {
         "@type": "File",
         "name": name_override or file_path.name,
-        "sha256": hash,
-        "size": size,
+        "sha256": metadata.sha256,
+        "size": metadata.size,
     }
     if not info.get("exists", True):
         props["description"] = description_override or "This file did not exist in the current git commit."
@@ -247,28 +253,30 @@ def create_file_entity(crate, file_path, URL, name_override=None, description_ov
     crate.root_dataset.append_to("hasPart", file_entity)
     return file_entity
 
-def add_file_entities(crate, file_list, coastsat_dir, URL, limit=None, previous=False):
+def expand_file_list(file_list, coastsat_dir, URL, limit=None) -> list[Path]:
+    """Return the paths for `file_list`, expanding glob patterns against the current commit's tree."""
     if limit is None:
         limit = get_file_limit()
-    file_entities = set()
-
+    paths = []
     for file in file_list:
         file_path = coastsat_dir / file
-        file_name = Path(file).name
-        # If the file is a glob pattern, expand it
         if "*" in str(file_path):
-            matched_paths = glob(str(file_path))
+            matched_paths = [coastsat_dir / path for path in URL.glob(file)]
             if limit is not None:
                 matched_paths = matched_paths[:limit]
-            # print(f"[add_file_entities] Glob pattern detected. Matched files (limited): {matched_paths}")
-            for matched_path in matched_paths:
-                matched_path = Path(matched_path)
-                file_entities.add(create_file_entity(crate, matched_path, URL, previous=previous))
+            paths.extend(matched_paths)
         else:
-            file_entities.add(create_file_entity(crate, file_path, URL, previous=previous))
+            paths.append(file_path)
+    return paths
 
-    # print(f"[add_file_entities] Total file entities added: {len(file_entities)}")
-    return file_entities
+@profiled()
+def add_file_entities(crate, file_list, coastsat_dir, URL, limit=None, previous=False):
+    paths = expand_file_list(file_list, coastsat_dir, URL, limit)
+    metadata = URL.resolve_file_metadata([(path, previous) for path in paths])
+    return [
+        create_file_entity(crate, path, URL, previous=previous, metadata=file_metadata)
+        for path, file_metadata in zip(paths, metadata)
+    ]
 
 def link_files_to_parameters(files, parameters):
     for file in files:
@@ -276,7 +284,8 @@ def link_files_to_parameters(files, parameters):
             if is_fuzzy_match(Path(file["@id"]).name, param["@id"]):
                 file.append_to("exampleOfWork", param)
 
-def add_files_to_parameters(crate, cell_provenance: dict[str, List[NotebookCellProvenance]], workflow_fp, coastsat_dir, URL, limit=None):
+@profiled()
+def add_files_to_parameters(crate, cell_provenance: dict[str, List[CellProvenanceResult]], workflow_fp, coastsat_dir, URL, limit=None):
     if limit is None:
         limit = get_file_limit()
 
@@ -290,24 +299,31 @@ def add_files_to_parameters(crate, cell_provenance: dict[str, List[NotebookCellP
             if hasattr(cell, "output_files") and cell.output_files:
                 output_files.update(cell.output_files)
 
+    # Collect every (parameter, files, previous) link first so all files are resolved in one batch
+    links = []
     for fp in workflow_fp["input"]:
-        # print("Linking input files to formal parameters...")
-        for file in input_files:
+        for file in sorted(input_files):
             if is_fuzzy_match(fp["@id"], Path(file).name):
-                # print(f"Linking input file {file} to formal parameter {fp['@id']}")
-                file_entities = add_file_entities(crate, [file], coastsat_dir, URL, limit=limit, previous=True)
-                link_files_to_parameters(file_entities, [fp])
+                links.append((fp, expand_file_list([file], coastsat_dir, URL, limit), True))
 
     for fp in workflow_fp["output"]:
-        # print("Linking output files to formal parameters...")
-        for file in output_files:
+        for file in sorted(output_files):
             if is_fuzzy_match(fp["@id"], Path(file).name):
-                # print(f"Linking output file {file} to formal parameter {fp['@id']}")
-                file_entities = add_file_entities(crate, [file], coastsat_dir, URL, limit=limit)
-                link_files_to_parameters(file_entities, [fp])
+                links.append((fp, expand_file_list([file], coastsat_dir, URL, limit), False))
+
+    metadata = iter(URL.resolve_file_metadata(
+        [(path, previous) for _, paths, previous in links for path in paths]
+    ))
+    for fp, paths, previous in links:
+        file_entities = [
+            create_file_entity(crate, path, URL, previous=previous, metadata=next(metadata))
+            for path in paths
+        ]
+        link_files_to_parameters(file_entities, [fp])
 
     
-def generate_formal_parameters(crate: ROCrate, cell_provenance: dict[str, List[NotebookCellProvenance]], coastsat_dir, URL: GitURL):
+@profiled()
+def generate_formal_parameters(crate: ROCrate, cell_provenance: dict[str, List[CellProvenanceResult]], coastsat_dir, URL: GitURL):
     workflow_entity = crate.get("update.sh")
     if not workflow_entity:
         raise ValueError("Workflow entity (update.sh) not found in the crate.")
@@ -388,9 +404,57 @@ def generate_formal_parameters(crate: ROCrate, cell_provenance: dict[str, List[N
     add_files_to_parameters(crate, cell_provenance, workflow_fp, coastsat_dir, URL, get_file_limit())
     
 
-def create_notebook_provenance_crates(crate: ROCrate, step_entities: list[dict], coastsat_dir: Path, output_dir: Path):
+def init_notebook_worker(cache_dir: Optional[str], plotly_encoding: str, summary_dir: Optional[str], profile: bool):
+    set_cache_dir(cache_dir)
+    set_plotly_encoding(plotly_encoding)
+    set_summary_dir(summary_dir)
+    if profile:
+        profiling.enable()
+
+def build_notebook_crates(jobs: list[tuple[str, str, str]]) -> list[List[CellProvenanceResult]]:
+    """
+    Build notebook provenance crates for (output_dir, coastsat_dir, notebook_path) jobs, in parallel
+    worker processes when there is more than one, and return their results in job order.
+    """
+    max_processes = min(len(jobs), get_max_processes())
+    if max_processes <= 1:
+        with tempfile.TemporaryDirectory(prefix="e2_2_scratch_") as scratch_dir:
+            return [build_e2_2_crate(*job, scratch_dir) for job in jobs]
+    # Spawned workers start clean (no inherited git pipes or SQLite handles) and need the notebook settings
+    with ProcessPoolExecutor(
+        max_workers=max_processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_notebook_worker,
+        initargs=(get_cache_dir(), get_plotly_encoding(), get_summary_dir(), profiling.is_enabled()),
+    ) as executor:
+        futures = [executor.submit(build_e2_2_crate_isolated, *job) for job in jobs]
+        results = []
+        for future in futures:
+            cells, profile = future.result()
+            # Worker phases are reported under the phase that started the pool
+            profiling.merge(profile)
+            results.append(cells)
+        return results
+
+def duplicate_notebook_crate(source: Path, target: Path):
+    """
+    Recreate the notebook crate in source at target. Files are copied, not hard-linked:
+    later builds rewrite code blocks and metadata in place, which would change every link.
+    """
+    if target.exists():
+        shutil.rmtree(target)
+    shutil.copytree(source, target)
+
+@profiled()
+def create_notebook_provenance_crates(crate: ROCrate, step_entities: list[dict], coastsat_dir: Path, output_dir: Path,
+                                      generator_versions: dict, previous_build: Optional[PreviousBuild] = None):
     notebook_crates = []
-    cell_prov: dict[str, List[NotebookCellProvenance]] = {}
+    cell_prov: dict[str, List[CellProvenanceResult]] = {}
+    notebook_steps = []
+    jobs = {}
+    # Steps that run the same notebook share one crate, keyed by notebook content and name
+    first_steps: dict[tuple[str, str], tuple[str, Path]] = {}
+    repeated_steps = []
     for i, filename in enumerate(step_entities):
         fileid = filename["@id"]
         if not fileid.endswith(".ipynb"):
@@ -399,38 +463,68 @@ def create_notebook_provenance_crates(crate: ROCrate, step_entities: list[dict],
 
         e2_2_directory = "notebooks"
         e2_2_subdirectory = Path(output_dir) / e2_2_directory / stem
-        e2_2_subdirectory.mkdir(parents=True, exist_ok=True)
         notebook_path = coastsat_dir / crate.get(fileid)["name"]  # type: ignore
-        result = build_e2_2_crate(str(e2_2_subdirectory), str(coastsat_dir), str(notebook_path))
-        cell_prov[fileid] = result
+        rel_subdirectory = f"{e2_2_directory}/{stem}"
+        notebook_key = (file_sha256(notebook_path), notebook_path.name)
+        notebook_steps.append((fileid, e2_2_subdirectory))
+        if notebook_key in first_steps:
+            repeated_steps.append((fileid, e2_2_subdirectory, first_steps[notebook_key]))
+            continue
+        first_steps[notebook_key] = (fileid, e2_2_subdirectory)
+        if previous_build is not None and previous_build.copy_notebook_crate(rel_subdirectory, notebook_path, output_dir):
+            print(f"Reusing unchanged {rel_subdirectory} crate from the previous build")
+            write_crate_summary("notebook", notebook_summary_name(stem), crate_dir=e2_2_subdirectory)
+            cell_prov[fileid] = [
+                CellProvenanceResult.from_cell(cell)
+                for cell in load_e2_2_crate(str(e2_2_subdirectory), str(notebook_path))
+            ]
+        else:
+            e2_2_subdirectory.mkdir(parents=True, exist_ok=True)
+            jobs[fileid] = (str(e2_2_subdirectory), str(coastsat_dir), str(notebook_path))
+
+    # Notebook crates are independent of each other, so they are built concurrently
+    with phase("build_notebook_crates"):
+        built = build_notebook_crates(list(jobs.values()))
+    cell_prov.update(zip(jobs, built))
+
+    for fileid, e2_2_subdirectory, (first_fileid, first_subdirectory) in repeated_steps:
+        print(f"Reusing the {first_fileid} notebook crate for {fileid}")
+        duplicate_notebook_crate(first_subdirectory, e2_2_subdirectory)
+        copy_crate_summary(notebook_summary_name(first_subdirectory.name), notebook_summary_name(e2_2_subdirectory.name))
+        # Formal parameters are resolved per step, so each step gets its own copy of the cells
+        cell_prov[fileid] = copy.deepcopy(cell_prov[first_fileid])
+
+    for fileid, e2_2_subdirectory in notebook_steps:
         crate_manifest_path = Path(e2_2_subdirectory) / "ro-crate-metadata.json"
         crate_manifest = crate_manifest_path.relative_to(output_dir).as_posix()
         notebook_crate_entity = crate.add(DataEntity(crate, crate_manifest, properties={
             "@type": "RO-Crate",
             "name": f"{fileid} Provenance Crate",
-            "description": f"Provenance RO-Crate for notebook/script {fileid}."        
+            "description": f"Provenance RO-Crate for notebook/script {fileid}.",
         }))
+        generator_versions[Path(crate_manifest).parent.as_posix()] = PROVENANCE_GENERATOR_VERSION
         notebook_crates.append(notebook_crate_entity)
         
         # Link the notebook crate to its associated step entity
         step_entity = crate.get(fileid)
         step_entity["exampleOfWork"] = notebook_crate_entity  # type: ignore
-    return notebook_crates, cell_prov
+    # Keep the update.sh step order, which formal parameter versions depend on
+    return notebook_crates, {fileid: cell_prov[fileid] for fileid, _ in notebook_steps}
 
-def get_nzd_xlsx_files(data_dir, limit=None):
+def get_nzd_xlsx_files(data_dir, URL: GitURL, limit=None):
     if limit is None:
         limit = get_file_limit()
     count = 0
-    for site_id in os.listdir(data_dir):
-        site_path = os.path.join(data_dir, site_id)
-        if os.path.isdir(site_path) and site_id.startswith("nzd"):
-            xlsx_file = os.path.join(site_path, f"{site_id}.xlsx")
-            if os.path.isfile(xlsx_file):
+    for site_id in URL.list_dir(data_dir):
+        if site_id.startswith("nzd"):
+            xlsx_file = os.path.join(data_dir, site_id, f"{site_id}.xlsx")
+            if URL.exists(xlsx_file):
                 yield xlsx_file
                 count += 1
                 if limit is not None and count >= limit:
                     break
 
+@profiled()
 def add_pacific_rim_data(crate: ROCrate, coastsat_dir: str, URL: GitURL, limit: Optional[int] = None) -> ContextEntity:
     """
     Add Pacific Rim external dataset to the crate with file limit applied.
@@ -467,20 +561,16 @@ def add_pacific_rim_data(crate: ROCrate, coastsat_dir: str, URL: GitURL, limit:
     external_data["hasPart"] = pacific_rim_data  # type: ignore
 
     # Loop over directories in csv_run7 within coastsat_dir (with limit)
-    csv_run7_dir = Path(coastsat_dir) / "csv_run7"
-    file_entities = []
-    if csv_run7_dir.exists() and csv_run7_dir.is_dir():
-        files_to_add = []
-        count = 0
-        for subdir in csv_run7_dir.iterdir():
-            if subdir.is_dir():
-                target_file = subdir / "time_series_tidally_corrected.csv"
-                if target_file.exists():
-                    files_to_add.append(target_file.relative_to(coastsat_dir).as_posix())
-                    count += 1
-                    if limit is not None and count >= limit:
-                        break
-        file_entities = add_file_entities(crate, files_to_add, Path(coastsat_dir), URL, limit)
+    files_to_add = []
+    count = 0
+    for subdir in URL.list_dir("csv_run7"):
+        target_file = f"csv_run7/{subdir}/time_series_tidally_corrected.csv"
+        if URL.exists(target_file):
+            files_to_add.append(target_file)
+            count += 1
+            if limit is not None and count >= limit:
+                break
+    file_entities = add_file_entities(crate, files_to_add, Path(coastsat_dir), URL, limit)
     
     for file in file_entities:
         pacific_rim_data.append_to("hasPart", file)  # type: ignore
@@ -488,6 +578,7 @@ def add_pacific_rim_data(crate: ROCrate, coastsat_dir: str, URL: GitURL, limit:
     return pacific_rim_data  # type: ignore
 
 
+@profiled()
 def add_xlsx_outputs(crate: ROCrate, make_xlsx_entity: DataEntity, coastsat_dir: Path, URL: GitURL):
     transects_path = coastsat_dir / "transects.xlsx"
     if not transects_path.is_file():
@@ -499,12 +590,16 @@ def add_xlsx_outputs(crate: ROCrate, make_xlsx_entity: DataEntity, coastsat_dir:
         "additionalType": "File",
         "valueRequired": False
     }))  # type: ignore  
-    info = URL.get(transects_path)
+    xlsx_files = list(get_nzd_xlsx_files(coastsat_dir / "data", URL, get_file_limit()))
+    transects_metadata, *xlsx_metadata = URL.resolve_file_metadata(
+        [(transects_path, False)] + [(file, False) for file in xlsx_files]
+    )
+    info = transects_metadata.info
     props = {
         "@type": "File",
         "name": transects_path.name,
-        "sha256": URL.get_file_hash(transects_path),
-        "size": URL.get_size_at_commit(transects_path, info['commit_hash'])
+        "sha256": transects_metadata.sha256,
+        "size": transects_metadata.size
     }
     if not info.get("exists", True):
         props["description"] = (
@@ -523,13 +618,13 @@ def add_xlsx_outputs(crate: ROCrate, make_xlsx_entity: DataEntity, coastsat_dir:
         "valueRequired": False
     }))  # type: ignore
     make_xlsx_entity.append_to("output", transect_site_xlsx)
-    for file in get_nzd_xlsx_files(coastsat_dir / "data", get_file_limit()):
-        info = URL.get(file)
+    for file, metadata in zip(xlsx_files, xlsx_metadata):
+        info = metadata.info
         props = {
             "@type": "File",
             "name": Path(file).name,
-            "sha256": URL.get_file_hash(file),
-            "size": URL.get_size_at_commit(file, info['commit_hash'])
+            "sha256": metadata.sha256,
+            "size": metadata.size
         }
         if not info.get("exists", True):
             props["description"] = (
@@ -544,7 +639,9 @@ def add_xlsx_outputs(crate: ROCrate, make_xlsx_entity: DataEntity, coastsat_dir:
     update_script.append_to("output", transects_fp)  # type: ignore
     update_script.append_to("output", transect_site_xlsx)  # type: ignore
 
-def build_e2_2(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_2, output_dir):
+@profiled()
+def build_e2_2(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_2, output_dir, generator_versions: dict,
+               previous_build: Optional[PreviousBuild] = None):
     """
     Build metadata for E2.2: Workflow Management System.
     - Link to external provenance crate or describe internal WMS behavior.
@@ -558,7 +655,7 @@ def build_e2_2(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_2, output_dir
     workflow_entity["step"] = step_entities
 
     # --- Add notebook provenance crates for each step file ---
-    notebook_crates, cell_prov = create_notebook_provenance_crates(crate, step_entities, coastsat_dir, output_dir)
+    notebook_crates, cell_prov = create_notebook_provenance_crates(crate, step_entities, coastsat_dir, output_dir, generator_versions, previous_build)
 
     formal_params = generate_formal_parameters(crate, cell_prov, coastsat_dir, URL)
     
@@ -570,11 +667,6 @@ def build_e2_2(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_2, output_dir
     make_xlsx["input"] = [txfp, ttstcfp]  # type: ignore
     add_xlsx_outputs(crate, make_xlsx, coastsat_dir, URL)  # type: ignore
 
-    # Remove code_blocks directory from {output_dir}/notebooks if it exists
-    code_blocks_dir = Path(output_dir) / "notebooks" / "code_blocks"
-    if code_blocks_dir.exists() and code_blocks_dir.is_dir():
-        shutil.rmtree(code_blocks_dir)
-
     # Remove plotly_results directory from {output_dir}/notebooks if it exists
     plotly_results_dir = Path(output_dir) / "notebooks" / "plotly_results"
     if plotly_results_dir.exists() and plotly_results_dir.is_dir():
@@ -587,6 +679,7 @@ def build_e2_2(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E2_2, output_dir
         E2_2["hasPart"] = [workflow_entity]
     
 
+@profiled()
 def build_e3(crate: ROCrate, coastsat_dir: Path, URL: GitURL, E3):
     """
     Build metadata for E3: Experimental Results and Outcomes.
@@ -608,6 +701,7 @@ def add_metadata(crate: ROCrate):
         "organisation": UoA_org
     }
     
+@profiled()
 def add_aggregate_entities(crate: ROCrate, URL: GitURL):
 
     crate.name = "LivePublication Interface Crate"
@@ -619,6 +713,8 @@ def add_aggregate_entities(crate: ROCrate, URL: GitURL):
         "datePublished": URL.get_commit_date(),
         "version": URL.get_commit_info_for_file("update.sh")["commit_url"]}
         ))
+    # The commit this crate was built from, which an incremental build diffs against
+    crate.root_dataset["isBasedOn"] = {"@id": URL.get_commit_url()}
     
     E1 = crate.add(ContextEntity(crate, "E1-data-producer", properties={
         "@type": "Thing",
@@ -667,6 +763,62 @@ def get_parser() -> argparse.ArgumentParser:
         default=Path(__file__).parent / "interface.crate", 
         help="Directory to write the interface RO-Crate."
     ) 
+    parser.add_argument(
+        "--limit",
+        type=parse_file_limit,
+        required=False,
+        default=argparse.SUPPRESS,
+        help="Maximum number of example files per file group; 'none' describes the full inventory "
+             "(default: config.py setting)."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the previous build: sub-crates whose inputs did not change since the commit it is "
+             "based on (root isBasedOn) are copied through, and files it hashed that are unchanged are not hashed again."
+    )
+    parser.add_argument(
+        "--previous-crate",
+        type=Path,
+        required=False,
+        default=None,
+        help="Previous interface crate for --incremental (default: the output directory)."
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=True,
+        default=None,
+        metavar="PREFIX",
+        help="Record wall time, subprocesses, bytes hashed and entities per build phase and write "
+             "PREFIX.json and PREFIX.folded (default PREFIX: <output-dir>.profile)."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        required=False,
+        default=None,
+        help="Directory for caches persisted between builds (resolved 'auto update' commits, file hashes, notebook provenance crates)."
+    )
+    parser.add_argument(
+        "--plotly-encoding",
+        choices=PLOTLY_ENCODINGS,
+        default=argparse.SUPPRESS,
+        help="How notebook Plotly results are stored: 'json' copies them from the notebook as is, "
+             "'typed' stores numeric trace arrays as Plotly typed arrays (smaller, faster to load; "
+             "needs plotly.js >= 2.28). Default: config.py setting."
+    )
+    parser.add_argument(
+        "--summaries",
+        type=Path,
+        nargs="?",
+        const=Path(__file__).parent / "summaries",
+        default=None,
+        metavar="DIR",
+        help="Also write summaries of the interface, batch_processes and notebook crates to DIR "
+             "(default DIR: LP_Crate/summaries), made from each crate in memory as it is written."
+    )
     return parser
 
 def main():
@@ -676,25 +828,65 @@ def main():
     # Parse command line arguments
     parser = get_parser()
     args = parser.parse_args()
+    output_dir = args.output_dir
+    if args.cache_dir:
+        set_cache_dir(args.cache_dir)
+    if "limit" in vars(args):
+        set_file_limit(args.limit)
+    if "plotly_encoding" in vars(args):
+        set_plotly_encoding(args.plotly_encoding)
+    if args.summaries:
+        set_summary_dir(args.summaries)
+
+    if args.profile:
+        profiling.enable()
+    try:
+        with profiling.phase("interface_crate.main"):
+            build_interface_crate(args)
+    finally:
+        if args.profile:
+            profiling.disable()
+            prefix = Path(f"{output_dir}.profile") if args.profile is True else args.profile
+            json_path, folded_path = profiling.write_report(prefix)
+            print(f"Profile written to {json_path} and {folded_path}")
+
+def build_interface_crate(args: argparse.Namespace):
     coastsat_dir = args.coastsat_dir
     output_dir = args.output_dir
 
     # Setup GitURL for the repo
     URL = GitURL(repo_path=args.coastsat_dir, remote_name="origin")
 
+    # Load the previous build before any of it is overwritten
+    previous_build = None
+    if args.incremental:
+        previous_build = PreviousBuild.load(args.previous_crate or output_dir, URL)
+        if previous_build is not None:
+            print(f"Incremental build from {previous_build.commit_hash}: "
+                  f"{len(previous_build.changed_paths)} changed paths, "
+                  f"{previous_build.reuse_digests()} file digests reused")
+
     crate = ROCrate()
+    # Sub-crate directory -> generator version, for the next incremental build
+    generator_versions = {}
     
     infrastructure_entities = add_aggregate_entities(crate, URL)
     contextual_entities = add_metadata(crate)
 
     # Build experiment infrastructure layers
-    build_e1(crate, coastsat_dir, URL, infrastructure_entities["E1"], output_dir)
+    build_e1(crate, coastsat_dir, URL, infrastructure_entities["E1"], output_dir, generator_versions, previous_build)
     build_e2_1(crate, coastsat_dir, URL, infrastructure_entities["E2_1"])
-    build_e2_2(crate, coastsat_dir, URL, infrastructure_entities["E2_2"], output_dir)
+    build_e2_2(crate, coastsat_dir, URL, infrastructure_entities["E2_2"], output_dir, generator_versions, previous_build)
     build_e3(crate, coastsat_dir, URL, infrastructure_entities["E3"])
 
     # Write crate to specified output directory
-    crate.write(output_dir)
+    with profiling.phase("crate.write"):
+        crate.write(output_dir)
+    write_generator_versions(output_dir, generator_versions)
+    write_digests(output_dir, URL)
+    if get_summary_dir():
+        write_crate_summary("interface", INTERFACE_SUMMARY, crate=crate)
+        print(f"Summaries written to {write_summary_overview(output_dir).parent}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
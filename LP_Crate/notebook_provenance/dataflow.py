@@ -0,0 +1,222 @@
+"""
+Def/use dataflow between notebook code cells.
+
+`scan_names` walks a parsed cell in execution order and records the
+top-level names it binds (assignments, imports, function and class
+definitions, loop and `with` targets) and the names it reads before
+binding them itself. Names read inside functions and classes count as
+uses unless bound there or later in the cell. Mutating a name through an
+attribute or subscript (`df["a"] = ...`) both uses and redefines it.
+
+`build_dataflow_graph` links every use to the latest earlier cell that
+defines the name, giving for each cell the cells it depends on and the
+names that flow along each edge. An executor that re-runs a changed cell
+must re-run everything reachable from it along these edges.
+"""
+
+import ast
+import builtins
+from typing import Dict, FrozenSet, List, Sequence, Set, Tuple
+
+_BUILTINS = frozenset(dir(builtins))
+
+
+def _stored_names(node: ast.AST) -> Set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load)}
+
+
+def _local_names(body: Sequence[ast.AST]) -> Set[str]:
+    """Names bound anywhere in a function or class body."""
+    local: Set[str] = set()
+    for statement in body:
+        for child in ast.walk(statement):
+            if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load):
+                local.add(child.id)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                local.add(child.name)
+            elif isinstance(child, (ast.Import, ast.ImportFrom)):
+                local.update(alias.asname or alias.name.split(".")[0] for alias in child.names)
+            elif isinstance(child, ast.ExceptHandler) and child.name:
+                local.add(child.name)
+    return local
+
+
+def _loaded_names(nodes: Sequence[ast.AST]) -> Set[str]:
+    return {
+        child.id
+        for node in nodes
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)
+    }
+
+
+def _argument_names(args: ast.arguments) -> Set[str]:
+    arguments = args.posonlyargs + args.args + args.kwonlyargs
+    arguments += [argument for argument in (args.vararg, args.kwarg) if argument is not None]
+    return {argument.arg for argument in arguments}
+
+
+def _root_name(target: ast.expr):
+    while isinstance(target, (ast.Attribute, ast.Subscript, ast.Starred)):
+        target = target.value
+    return target.id if isinstance(target, ast.Name) else None
+
+
+class _NameScanner(ast.NodeVisitor):
+    """Collect the names a cell defines and the names it uses from earlier cells."""
+
+    def __init__(self):
+        self.defines: Set[str] = set()
+        self.uses: Set[str] = set()
+        # Free names of function and class bodies, resolved once the whole cell is known
+        self.deferred: Set[str] = set()
+
+    def use(self, name: str) -> None:
+        if name not in self.defines:
+            self.uses.add(name)
+
+    def define(self, name: str) -> None:
+        self.defines.add(name)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.use(node.id)
+        else:
+            self.define(node.id)
+
+    def bind(self, target: ast.expr) -> None:
+        if isinstance(target, ast.Name):
+            self.define(target.id)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self.bind(element)
+        elif isinstance(target, ast.Starred):
+            self.bind(target.value)
+        else:
+            # obj.attr = ... / obj[key] = ... reads obj and the key, then mutates obj
+            self.visit(target)
+            name = _root_name(target)
+            if name is not None:
+                self.define(name)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self.visit(node.value)
+        for target in node.targets:
+            self.bind(target)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self.visit(node.annotation)
+        if node.value is not None:
+            self.visit(node.value)
+            self.bind(node.target)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        self.visit(node.value)
+        name = _root_name(node.target)
+        if name is not None:
+            self.use(name)
+        self.bind(node.target)
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        self.visit(node.value)
+        self.define(node.target.id)
+
+    def visit_For(self, node) -> None:
+        self.visit(node.iter)
+        self.bind(node.target)
+        for statement in node.body + node.orelse:
+            self.visit(statement)
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node) -> None:
+        for item in node.items:
+            self.visit(item.context_expr)
+            if item.optional_vars is not None:
+                self.bind(item.optional_vars)
+        for statement in node.body:
+            self.visit(statement)
+
+    visit_AsyncWith = visit_With
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is not None:
+            self.visit(node.type)
+        if node.name:
+            self.define(node.name)
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_Import(self, node) -> None:
+        for alias in node.names:
+            if alias.name != "*":
+                self.define(alias.asname or alias.name.split(".")[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Global(self, node) -> None:
+        pass
+
+    visit_Nonlocal = visit_Global
+
+    def _scoped(self, local: Set[str], body: Sequence[ast.AST]) -> None:
+        self.deferred.update(_loaded_names(body) - local)
+
+    def visit_FunctionDef(self, node) -> None:
+        for expression in node.decorator_list + node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(expression)
+        self._scoped(_argument_names(node.args) | _local_names(node.body), node.body)
+        self.define(node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        for expression in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(expression)
+        self._scoped(_argument_names(node.args), [node.body])
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        for expression in node.decorator_list + node.bases + [keyword.value for keyword in node.keywords]:
+            self.visit(expression)
+        self._scoped(_local_names(node.body), node.body)
+        self.define(node.name)
+
+    def _visit_comprehension(self, node) -> None:
+        # The first iterable is evaluated in the enclosing scope; loop targets stay local
+        self.visit(node.generators[0].iter)
+        local = {name for generator in node.generators for name in _stored_names(generator.target)}
+        parts = [part for generator in node.generators for part in generator.ifs] + [
+            generator.iter for generator in node.generators[1:]
+        ]
+        parts += [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        for name in _loaded_names(parts) - local:
+            self.use(name)
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _visit_comprehension
+
+
+def scan_names(tree: ast.AST) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Return the (defined, used) top-level names of a parsed cell; builtins are never uses."""
+    scanner = _NameScanner()
+    for statement in getattr(tree, "body", []):
+        scanner.visit(statement)
+    uses = scanner.uses | (scanner.deferred - scanner.defines)
+    return frozenset(scanner.defines), frozenset(uses - _BUILTINS)
+
+
+def build_dataflow_graph(cells: Sequence[Tuple[FrozenSet[str], FrozenSet[str]]]) -> List[Dict[int, List[str]]]:
+    """
+    Given the (defined, used) names of each cell in execution order, return for each cell
+    a mapping from the index of every earlier cell it depends on to the names it reads from it.
+    """
+    last_definition: Dict[str, int] = {}
+    graph: List[Dict[int, List[str]]] = []
+    for index, (defines, uses) in enumerate(cells):
+        dependencies: Dict[int, List[str]] = {}
+        for name in sorted(uses):
+            if name in last_definition:
+                dependencies.setdefault(last_definition[name], []).append(name)
+        graph.append(dict(sorted(dependencies.items())))
+        for name in defines:
+            last_definition[name] = index
+    return graph
@@ -0,0 +1,317 @@
+"""
+File input/output extraction for notebook code cells.
+
+Each cell is parsed once with `ast` (after blanking IPython magics and shell
+escapes) and every call is matched against a table of reader and writer
+APIs. Path arguments are resolved when they are string constants, f-strings,
+`str.format` templates, concatenations, `os.path.join`/`Path` expressions,
+or names assigned one of those in the same cell. Interpolated and other
+non-constant parts become `*`, as do globbed name parts, so
+`f"data/{site}/tides.csv"`, `Path("data") / site / "tides.csv"` and
+`"data/nzd*/tides.csv"` all yield `data/*/tides.csv`. The pattern of a
+`Path(...).glob(pattern)` call is taken relative to its directory.
+
+Results are cached by the SHA-256 of the cell source, so the same cell is
+only scanned once however many times its paths are requested. Cells that
+are not valid Python fall back to the original regex scan.
+
+`analyze_cell` also scans the names the cell defines and uses (see
+`dataflow`) from the same parse, for the dataflow graph between cells.
+"""
+
+import ast
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .dataflow import scan_names
+
+READ = "read"
+WRITE = "write"
+
+# Call name (function or method attribute) -> whether its path argument is read or written
+IO_CALLS: Dict[str, str] = {
+    "read_csv": READ,
+    "read_table": READ,
+    "read_excel": READ,
+    "read_json": READ,
+    "read_parquet": READ,
+    "read_pickle": READ,
+    "read_file": READ,
+    "loadtxt": READ,
+    "genfromtxt": READ,
+    "glob": READ,
+    "iglob": READ,
+    "to_csv": WRITE,
+    "to_excel": WRITE,
+    "to_json": WRITE,
+    "to_parquet": WRITE,
+    "to_pickle": WRITE,
+    "to_file": WRITE,
+    "ExcelWriter": WRITE,
+    "savetxt": WRITE,
+    "savefig": WRITE,
+    "write_html": WRITE,
+    "write_image": WRITE,
+}
+
+# Keyword names under which the APIs above accept their path
+PATH_KEYWORDS = (
+    "filepath_or_buffer", "path_or_buf", "path", "excel_writer", "filename",
+    "fname", "io", "pathname", "file",
+)
+
+_MAGIC_LINE = re.compile(r"^\s*(?:%|!)")
+
+
+_READ_PATTERNS = [
+    r'read_csv\((?:f)?["\']([^"\']+)["\']',
+    r'read_file\((?:f)?["\']([^"\']+)["\']',
+    r'glob\((?:f)?["\']([^"\']+)["\']'
+]
+_WRITE_PATTERNS = [
+    r'to_csv\((?:f)?["\']([^"\']+)["\']',
+    r'to_file\((?:f)?["\']([^"\']+)["\']'
+]
+
+
+class CellIO(NamedTuple):
+    inputs: FrozenSet[str]
+    outputs: FrozenSet[str]
+
+
+class CellAnalysis(NamedTuple):
+    io: CellIO
+    defines: FrozenSet[str]
+    uses: FrozenSet[str]
+    parsed: bool                    # False if the cell is not valid Python; its names are unknown
+
+
+_cache: Dict[str, CellIO] = {}
+_analysis_cache: Dict[str, CellAnalysis] = {}
+_EMPTY = CellIO(frozenset(), frozenset())
+
+
+def _call_pattern(io_calls: Dict[str, str]) -> "re.Pattern[str]":
+    names = sorted(set(io_calls) | {"open"})
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, names)) + r")\b")
+
+
+_IO_CALL_PATTERN = _call_pattern(IO_CALLS)
+
+
+def normalize_interpolated_path(path: str) -> str:
+    """
+    Normalize interpolated or globbed paths by:
+    - Replacing string interpolation like {sitename} with '*'
+    - Replacing any explicit globs like 'nzd*' with '*'
+    - Collapsing multiple adjacent wildcards
+    """
+    # Replace interpolated values like {var} and {} with *
+    path = re.sub(r'{[^}]*}', '*', path)
+
+    # Replace glob patterns like nzd* with *
+    path = re.sub(r'\w*\*\w*', '*', path)
+
+    # Replace any remaining sequences like */*/ to */ and similar
+    path = re.sub(r'\*+', '*', path)
+
+    return path
+
+
+def strip_magics(source: str) -> str:
+    """Blank out IPython magics (%, %%) and shell escapes (!), keeping line numbers."""
+    if "%" not in source and "!" not in source:
+        return source
+    return "\n".join("" if _MAGIC_LINE.match(line) else line for line in source.split("\n"))
+
+
+def _call_name(func: ast.expr) -> Optional[str]:
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+
+class _PathResolver:
+    """Resolve string-valued expressions of one cell to path templates."""
+
+    def __init__(self, stores: Counter, assignments: List[ast.AST]):
+        values: Dict[str, ast.expr] = {}
+        for node in assignments:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+            elif isinstance(node, ast.AnnAssign) and node.value is not None:
+                target, value = node.target, node.value
+            else:
+                continue
+            if isinstance(target, ast.Name):
+                values[target.id] = value
+        # Names rebound anywhere else in the cell (loops, tuple unpacking, reassignment) stay unresolved
+        self._values = {name: value for name, value in values.items() if stores[name] == 1}
+        self._resolving: Set[str] = set()
+
+    def resolve_parts(self, nodes: List[ast.expr]) -> Optional[List[str]]:
+        """Resolve the parts of a joined path, with '*' for parts that do not resolve (None if none do)."""
+        parts = [self.resolve(node) for node in nodes]
+        if all(part is None for part in parts):
+            return None
+        return ["*" if part is None else part for part in parts]
+
+    def resolve(self, node: ast.expr) -> Optional[str]:
+        if isinstance(node, ast.Constant):
+            return node.value if isinstance(node.value, str) else None
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(str(value.value))
+                    continue
+                # {name} resolves when name is a constant path; anything else is interpolated
+                resolved = None
+                if isinstance(value, ast.FormattedValue) and value.format_spec is None and value.conversion == -1:
+                    resolved = self.resolve(value.value)
+                parts.append("*" if resolved is None else resolved)
+            return "".join(parts)
+        if isinstance(node, ast.Name):
+            value = self._values.get(node.id)
+            if value is None or node.id in self._resolving:
+                return None
+            self._resolving.add(node.id)
+            try:
+                return self.resolve(value)
+            finally:
+                self._resolving.discard(node.id)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Div)):
+            parts = self.resolve_parts([node.left, node.right])
+            if parts is None:
+                return None
+            return "".join(parts) if isinstance(node.op, ast.Add) else "/".join(parts)
+        if isinstance(node, ast.Call):
+            name = _call_name(node.func)
+            if name == "format" and isinstance(node.func, ast.Attribute):
+                return self.resolve(node.func.value)
+            if name == "join" and isinstance(node.func, ast.Attribute) and _call_name(node.func.value) == "path":
+                parts = self.resolve_parts(node.args)
+                return "/".join(parts) if parts else None
+            if name in ("Path", "PurePath", "str") and len(node.args) == 1:
+                return self.resolve(node.args[0])
+        return None
+
+
+def _path_argument(call: ast.Call) -> Optional[ast.expr]:
+    if call.args and not isinstance(call.args[0], ast.Starred):
+        return call.args[0]
+    for keyword in call.keywords:
+        if keyword.arg in PATH_KEYWORDS:
+            return keyword.value
+    return None
+
+
+def _open_direction(call: ast.Call) -> str:
+    mode = call.args[1] if len(call.args) > 1 else next(
+        (keyword.value for keyword in call.keywords if keyword.arg == "mode"), None
+    )
+    if isinstance(mode, ast.Constant) and isinstance(mode.value, str) and any(c in mode.value for c in "wax+"):
+        return WRITE
+    return READ
+
+
+def _scan_ast(tree: ast.AST, io_calls: Dict[str, str]) -> CellIO:
+    # One walk over the tree gathers everything the resolver and the call matching need
+    stores: Counter = Counter()
+    assignments: List[ast.AST] = []
+    calls: List[ast.Call] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            calls.append(node)
+        elif isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Store):
+                stores[node.id] += 1
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            assignments.append(node)
+
+    resolver = _PathResolver(stores, assignments)
+    inputs, outputs = set(), set()
+    for node in calls:
+        name = _call_name(node.func)
+        if name == "open" and isinstance(node.func, ast.Name):
+            direction = _open_direction(node)
+        elif name in io_calls:
+            direction = io_calls[name]
+        else:
+            continue
+        argument = _path_argument(node)
+        path = resolver.resolve(argument) if argument is not None else None
+        if not path:
+            continue
+        if name == "glob" and isinstance(node.func, ast.Attribute):
+            # Path(directory).glob(pattern) matches pattern inside directory (glob.glob does not resolve)
+            directory = resolver.resolve(node.func.value)
+            if directory:
+                path = f"{directory.rstrip('/')}/{path}"
+        (inputs if direction == READ else outputs).add(normalize_interpolated_path(path))
+    return CellIO(frozenset(inputs), frozenset(outputs))
+
+
+def _scan_regex(source: str) -> CellIO:
+    inputs, outputs = set(), set()
+    for pattern in _READ_PATTERNS:
+        inputs.update(normalize_interpolated_path(match) for match in re.findall(pattern, source))
+    for pattern in _WRITE_PATTERNS:
+        outputs.update(normalize_interpolated_path(match) for match in re.findall(pattern, source))
+    return CellIO(frozenset(inputs), frozenset(outputs))
+
+
+def _source_key(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def analyze_cell(source: str) -> CellAnalysis:
+    """Parse a cell once and return its file I/O (default IO_CALLS table) and the names it defines and uses."""
+    key = _source_key(source)
+    if key in _analysis_cache:
+        return _analysis_cache[key]
+    try:
+        tree = ast.parse(strip_magics(source))
+    except SyntaxError:
+        result = CellAnalysis(_scan_regex(source), frozenset(), frozenset(), False)
+    else:
+        cell_io = _scan_ast(tree, IO_CALLS) if _IO_CALL_PATTERN.search(source) else _EMPTY
+        result = CellAnalysis(cell_io, *scan_names(tree), True)
+    _analysis_cache[key] = result
+    _cache[key] = result.io
+    return result
+
+
+def extract_cell_io(source: str, io_calls: Optional[Dict[str, str]] = None) -> CellIO:
+    """Return the file paths a cell reads and writes. Results for the default IO_CALLS table are cached."""
+    key = _source_key(source) if io_calls is None else None
+    if key is not None and key in _cache:
+        return _cache[key]
+    pattern = _IO_CALL_PATTERN if io_calls is None else _call_pattern(io_calls)
+    if not pattern.search(source):
+        # Most cells never mention a reader or writer; skip parsing them
+        result = _EMPTY
+    else:
+        try:
+            tree = ast.parse(strip_magics(source))
+        except SyntaxError:
+            result = _scan_regex(source)
+        else:
+            result = _scan_ast(tree, IO_CALLS if io_calls is None else io_calls)
+    if key is not None:
+        _cache[key] = result
+    return result
+
+
+def extract_unique_file_paths(sources: Iterable[str], io_calls: Optional[Dict[str, str]] = None) -> Tuple[Set[str], Set[str]]:
+    """Return the (input, output) file paths used across the given cell sources."""
+    input_paths, output_paths = set(), set()
+    for source in sources:
+        cell_io = extract_cell_io(source, io_calls)
+        input_paths.update(cell_io.inputs)
+        output_paths.update(cell_io.outputs)
+    return input_paths, output_paths
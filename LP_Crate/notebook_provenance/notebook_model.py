@@ -0,0 +1,340 @@
+"""
+Indexed, lazily loaded view of a Jupyter notebook.
+
+`NotebookModel.load` scans the notebook file once without building its
+outputs: a small incremental JSON scanner walks the file (memory-mapped)
+and only decodes the top-level metadata and each code cell's id and
+source. For every output it records its type and the byte range of each
+MIME bundle entry, so a payload such as a Plotly figure is decoded on
+demand, one at a time, straight from the file, or copied out byte for
+byte without being decoded at all.
+"""
+
+import hashlib
+import json
+import mmap
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import nbformat
+
+from hash_cache import CHUNK_SIZE
+from profiling import count, profiled
+
+Span = Tuple[int, int]
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_SCALAR = re.compile(rb"[^,\]}\s]+")
+# "key": (with surrounding whitespace) and the separator or closing bracket after a value
+_MEMBER = re.compile(rb'[ \t\n\r]*("[^"\\]*(?:\\.[^"\\]*)*")[ \t\n\r]*:[ \t\n\r]*', re.DOTALL)
+_NEXT = re.compile(rb"[ \t\n\r]*([,}\]])[ \t\n\r]*")
+
+
+def _skip_whitespace(buf, pos: int) -> int:
+    return _WHITESPACE.match(buf, pos).end()
+
+
+def _decode_string(buf, start: int, end: int) -> str:
+    raw = buf[start + 1:end - 1]
+    # Keys and output types rarely contain escapes; skip the JSON decoder for those
+    return json.loads(buf[start:end]) if b"\\" in raw else raw.decode("utf-8")
+
+
+def _skip_value(buf, pos: int) -> int:
+    """Return the position just after the JSON value starting at pos, without decoding it."""
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        return _STRING.match(buf, pos).end()
+    if first not in (b"{", b"["):
+        return _SCALAR.match(buf, pos).end()
+    depth = 0
+    while True:
+        match = _STRUCTURAL.search(buf, pos)
+        if match is None:
+            raise ValueError("Unterminated JSON value in notebook")
+        token = match.group()
+        if token == b'"':
+            pos = _STRING.match(buf, match.start()).end()
+            continue
+        pos = match.end()
+        depth += 1 if token in (b"{", b"[") else -1
+        if depth == 0:
+            return pos
+
+
+def _expect(buf, pos: int, token: bytes) -> int:
+    pos = _skip_whitespace(buf, pos)
+    if buf[pos:pos + 1] != token:
+        raise ValueError(f"Expected {token!r} at byte {pos} of notebook")
+    return pos + 1
+
+
+def _scan_object(buf, pos: int, on_member: Callable[[str, int], Optional[int]]) -> int:
+    """
+    Walk the JSON object starting at pos and return the position just after it.
+    on_member(key, value_start) may consume the value and return where it ends;
+    returning None skips the value instead, so every byte is scanned once.
+    """
+    pos = _skip_whitespace(buf, _expect(buf, pos, b"{"))
+    if buf[pos:pos + 1] == b"}":
+        return pos + 1
+    while True:
+        member = _MEMBER.match(buf, pos)
+        if member is None:
+            raise ValueError(f"Expected an object key at byte {pos} of notebook")
+        start = member.end()
+        end = on_member(_decode_string(buf, *member.span(1)), start)
+        if end is None:
+            end = _skip_value(buf, start)
+        pos, closed = _next_item(buf, end, b"}")
+        if closed:
+            return pos
+
+
+def _scan_array(buf, pos: int, on_element: Callable[[int, int], int]) -> int:
+    """Walk the JSON array starting at pos; on_element(index, start) consumes each element and returns its end."""
+    pos = _skip_whitespace(buf, _expect(buf, pos, b"["))
+    if buf[pos:pos + 1] == b"]":
+        return pos + 1
+    index = 0
+    while True:
+        end = on_element(index, pos)
+        index += 1
+        pos, closed = _next_item(buf, end, b"]")
+        if closed:
+            return pos
+
+
+def _next_item(buf, end: int, closing: bytes) -> Tuple[int, bool]:
+    """
+    After a value ending at `end`, return (start of the next item, False),
+    or (position after the closing bracket, True).
+    """
+    separator = _NEXT.match(buf, end)
+    token = separator.group(1) if separator else b""
+    if token == b",":
+        return separator.end(), False
+    if token == closing:
+        return separator.start(1) + 1, True
+    raise ValueError(f"Unexpected {token!r} at byte {end} of notebook")
+
+
+def _decode_at(buf, start: int) -> Tuple[Any, int]:
+    end = _skip_value(buf, start)
+    return json.loads(buf[start:end]), end
+
+
+def _join_lines(value: Any) -> Any:
+    # nbformat stores multiline strings either whole or split into a list of lines
+    return "".join(value) if isinstance(value, list) else value
+
+
+@dataclass(slots=True)
+class NotebookOutput:
+    index: int                      # position in the cell's outputs (0-based)
+    output_type: str
+    data_spans: Dict[str, Span]     # MIME type -> byte range of its payload
+    span: Span                      # byte range of the whole output
+    notebook: "NotebookModel" = field(repr=False, compare=False)
+
+    @property
+    def mime_types(self) -> List[str]:
+        return list(self.data_spans)
+
+    def copy_to(self, mime_type: str, target) -> Optional[str]:
+        """
+        Write the payload for one MIME type to target exactly as it appears in the notebook,
+        without decoding it, and return its SHA-256 (None if the output has no such payload).
+        """
+        span = self.data_spans.get(mime_type)
+        return self.notebook._copy(span, target) if span is not None else None
+
+    def sha256(self, mime_type: str) -> Optional[str]:
+        """Return the SHA-256 of the payload for one MIME type as it appears in the notebook, without decoding it."""
+        span = self.data_spans.get(mime_type)
+        return self.notebook._sha256(span) if span is not None else None
+
+    def data(self, mime_type: str) -> Any:
+        """Decode the payload for one MIME type (None if the output has none)."""
+        span = self.data_spans.get(mime_type)
+        if span is None:
+            return None
+        value = self.notebook._load(span)
+        if mime_type == "application/json" or mime_type.endswith("+json"):
+            return value
+        return _join_lines(value)
+
+    def load(self) -> Dict[str, Any]:
+        """Decode the whole output."""
+        output = self.notebook._load(self.span)
+        if "data" in output:
+            output["data"] = {mime: self.data(mime) for mime in output["data"]}
+        elif "text" in output:
+            output["text"] = _join_lines(output["text"])
+        return output
+
+
+@dataclass
+class NotebookCell:
+    index: int                      # position among the notebook's code cells (0-based)
+    cell_id: Optional[str]          # nbformat >= 4.5 cell id, if the notebook has one
+    source: str
+    outputs: List[NotebookOutput] = field(default_factory=list)
+
+    def outputs_with(self, mime_type: str, output_type: Optional[str] = None) -> Iterator[NotebookOutput]:
+        for output in self.outputs:
+            if mime_type in output.data_spans and (output_type is None or output.output_type == output_type):
+                yield output
+
+
+class NotebookModel:
+    """
+    A notebook parsed once, with its code cells indexed by position and by cell id.
+
+    The provenance helpers read everything from this model instead of re-reading
+    the notebook file for each cell. Output payloads are not held in memory;
+    `NotebookOutput.data` decodes them from the file when asked.
+    """
+
+    def __init__(self, path, buf, buffer: Optional[bytes] = None):
+        self.path = path
+        # Notebooks converted from an older format have no file to read payloads back from
+        self._buffer = buffer
+        self.nbformat = 4
+        self.metadata: Dict[str, Any] = {}
+        self.code_cells: List[NotebookCell] = []
+
+        def on_member(key: str, start: int) -> Optional[int]:
+            if key == "cells":
+                return _scan_array(buf, start, lambda index, cell_start: self._scan_cell(buf, cell_start))
+            if key in ("nbformat", "metadata"):
+                value, end = _decode_at(buf, start)
+                setattr(self, key, value)
+                return end
+            return None
+
+        _scan_object(buf, 0, on_member)
+        self._by_id = {cell.cell_id: cell for cell in self.code_cells if cell.cell_id}
+
+    def _scan_cell(self, buf, pos: int) -> int:
+        fields: Dict[str, Any] = {}
+        outputs: List[NotebookOutput] = []
+
+        def on_member(key: str, start: int) -> Optional[int]:
+            if key == "outputs":
+                return _scan_array(buf, start, lambda index, output_start: self._scan_output(buf, index, output_start, outputs))
+            if key in ("cell_type", "id", "source"):
+                fields[key], end = _decode_at(buf, start)
+                return end
+            return None
+
+        end = _scan_object(buf, pos, on_member)
+        if fields.get("cell_type") == "code":
+            self.code_cells.append(NotebookCell(
+                index=len(self.code_cells),
+                cell_id=fields.get("id"),
+                source=_join_lines(fields.get("source", "")),
+                outputs=outputs,
+            ))
+        return end
+
+    def _scan_output(self, buf, index: int, pos: int, outputs: List["NotebookOutput"]) -> int:
+        output_type = ""
+        data_spans: Dict[str, Span] = {}
+
+        def on_data(mime_type: str, start: int) -> int:
+            end = _skip_value(buf, start)
+            # The same few MIME types repeat across thousands of outputs
+            data_spans[sys.intern(mime_type)] = (start, end)
+            return end
+
+        def on_member(key: str, start: int) -> Optional[int]:
+            nonlocal output_type
+            if key == "output_type":
+                end = _skip_value(buf, start)
+                output_type = _decode_string(buf, start, end)
+                return end
+            if key == "data":
+                return _scan_object(buf, start, on_data)
+            return None
+
+        end = _scan_object(buf, pos, on_member)
+        outputs.append(NotebookOutput(index, output_type, data_spans, (pos, end), self))
+        return end
+
+    @classmethod
+    @profiled("NotebookModel.load")
+    def load(cls, notebook_path) -> "NotebookModel":
+        with open(notebook_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                model = cls(notebook_path, buf)
+        if model.nbformat >= 4:
+            return model
+        # Older formats are upgraded by nbformat and scanned from memory
+        with open(notebook_path, "r", encoding="utf-8") as f:
+            buffer = nbformat.writes(nbformat.read(f, as_version=4)).encode("utf-8")
+        return cls(notebook_path, buffer, buffer)
+
+    def _read(self, span: Span) -> bytes:
+        if self._buffer is not None:
+            return self._buffer[span[0]:span[1]]
+        with open(self.path, "rb") as f:
+            f.seek(span[0])
+            return f.read(span[1] - span[0])
+
+    def _chunks(self, span: Span) -> Iterator[bytes]:
+        if self._buffer is not None:
+            yield self._buffer[span[0]:span[1]]
+        else:
+            with open(self.path, "rb") as f:
+                f.seek(span[0])
+                remaining = span[1] - span[0]
+                while remaining:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError(f"{self.path} changed while its outputs were being read")
+                    yield chunk
+                    remaining -= len(chunk)
+        count("bytes_hashed", span[1] - span[0])
+
+    def _copy(self, span: Span, target) -> str:
+        sha256 = hashlib.sha256()
+        with open(target, "wb") as out:
+            for chunk in self._chunks(span):
+                out.write(chunk)
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _sha256(self, span: Span) -> str:
+        sha256 = hashlib.sha256()
+        for chunk in self._chunks(span):
+            sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _load(self, span: Span) -> Any:
+        return json.loads(self._read(span))
+
+    @property
+    def sources(self) -> List[str]:
+        return [cell.source for cell in self.code_cells]
+
+    def cell_at(self, index: int) -> Optional[NotebookCell]:
+        """Return the code cell at a 0-based position among code cells."""
+        if 0 <= index < len(self.code_cells):
+            return self.code_cells[index]
+        return None
+
+    def cell_by_id(self, cell_id: str) -> Optional[NotebookCell]:
+        return self._by_id.get(cell_id)
+
+    def kernel_info(self) -> Dict[str, str]:
+        kernelspec = self.metadata.get("kernelspec", {})
+        return {
+            "name": kernelspec.get("name", "python3"),
+            "display_name": kernelspec.get("display_name", "Python 3"),
+            "version": self.metadata.get("language_info", {}).get("version", "unknown"),
+        }
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 from typing import Any
@@ -8,22 +9,30 @@ from .prospective_helper import (
     create_formal_parameters,
     link_steps_to_code_blocks,
     add_create_actions,
-    add_prov_results
+    add_prov_results,
+    add_cell_dependencies,
+    extract_unique_file_paths,
+    CELL_DEPENDENCIES_FILENAME
 )
-from .provenance_types import ProspectiveIndex
+from .provenance_types import NotebookCellProvenance, ProspectiveIndex
+from .notebook_model import NotebookModel
 
 
-def generate_prospective_entities(crate, notebook_path, crate_output_dir) -> ProspectiveIndex:
+# Bump whenever the generated crates or cell provenance change, to invalidate cached crates
+PROVENANCE_GENERATOR_VERSION = 4
+
+
+def generate_prospective_entities(crate, notebook: NotebookModel, crate_path, scratch_dir, plot_cache=None) -> ProspectiveIndex:
     notebook_file: Any = crate.add_file(
-        source=notebook_path,
+        source=notebook.path,
         properties={
             "@type": ["File", "SoftwareSourceCode", "HowTo"]
         }
     )  # type: ignore
     crate.mainEntity = notebook_file
 
-    software_app = create_software_application(crate, notebook_path)
-    cell_entities = create_code_cell_steps(crate, software_app, notebook_path)
+    software_app = create_software_application(crate, notebook)
+    cell_entities = create_code_cell_steps(crate, software_app, notebook)
 
     crate.update_jsonld({
         "@id": notebook_file.id,
@@ -33,23 +42,74 @@ def generate_prospective_entities(crate, notebook_path, crate_output_dir) -> Pro
     # Gather all source lines and create formal parameters
     source_lines = [cell.source for cell in cell_entities]
     formal_params = create_formal_parameters(crate, source_lines, notebook_file, software_app)
-    cell_prov = link_steps_to_code_blocks(crate, crate_output_dir, notebook_path, notebook_file, cell_entities, formal_params)
-    add_create_actions(crate, cell_entities, notebook_path)
-    add_prov_results(crate, cell_entities, notebook_path, crate_output_dir)
+    cell_prov = link_steps_to_code_blocks(crate, crate_path, notebook, notebook_file, cell_entities, formal_params)
+    add_cell_dependencies(crate, crate_path, notebook_file, cell_entities)
+    add_create_actions(crate, cell_entities, notebook)
+    add_prov_results(crate, cell_entities, notebook, scratch_dir, plot_cache)
 
     crate.mainEntity["targetProduct"] = software_app
 
     return cell_prov
 
 
-def generate_provenance_crate_for_notebook(notebook_path, crate_path):
+def generate_provenance_crate_for_notebook(notebook_path, crate_path, scratch_dir=None, plot_cache=None):
+    """
+    Build the provenance crate of a notebook. Code blocks are written to crate_path right away;
+    Plotly results are staged in scratch_dir (default: the parent of crate_path) until the
+    crate is written.
+    """
+    if scratch_dir is None:
+        scratch_dir = Path(crate_path).parent
     crate = ROCrate()
     crate.name = f"Notebook Provenance Crate ({str(notebook_path).split(os.sep)[-1]})"
-    cell_prov = generate_prospective_entities(crate, notebook_path, crate_path)
+    # Parse the notebook once; every helper reads cells and metadata from this model
+    notebook = NotebookModel.load(notebook_path)
+    cell_prov = generate_prospective_entities(crate, notebook, crate_path, scratch_dir, plot_cache)
 
     return crate, cell_prov
 
 
+def load_cell_provenance(crate_path, notebook_path) -> list[NotebookCellProvenance]:
+    """
+    Rebuild the cell provenance of a previously written notebook provenance crate,
+    as returned by generate_provenance_crate_for_notebook, without re-reading the notebook.
+    """
+    crate = ROCrate(crate_path)
+    steps = sorted(
+        (entity for entity in crate.get_entities() if entity.type == "HowToStep"),
+        key=lambda step: step["position"]
+    )
+    graph_path = Path(crate_path) / CELL_DEPENDENCIES_FILENAME
+    dataflow = {}
+    if graph_path.is_file():
+        with open(graph_path, "r", encoding="utf-8") as f:
+            dataflow = {cell["step"]: cell for cell in json.load(f)["cells"]}
+    cell_entities = []
+    for step in steps:
+        code_file = step["workExample"]
+        with open(Path(crate_path) / code_file.id, "r", encoding="utf-8", newline="") as f:
+            source = f.read()
+        input_paths, output_paths = extract_unique_file_paths([source])
+        create_action = step.get("about")
+        cell_entities.append(NotebookCellProvenance(
+            source=source,
+            howto_step=step,
+            index=step["position"] - 1,
+            create_action=create_action,
+            prov_result=create_action.get("result") if create_action else None,
+            software_app=code_file,
+            input_params=list(code_file.get("input") or []),
+            output_params=list(code_file.get("output") or []),
+            input_files=sorted(input_paths),
+            output_files=sorted(output_paths),
+            notebook_path=notebook_path,
+            defined_names=dataflow.get(step.id, {}).get("defines"),
+            used_names=dataflow.get(step.id, {}).get("uses"),
+            depends_on=dataflow.get(step.id, {}).get("dependsOn"),
+        ))
+    return cell_entities
+
+
 if __name__ == "__main__":
     import argparse
 
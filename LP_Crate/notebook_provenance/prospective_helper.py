@@ -1,43 +1,49 @@
 import re
 import os
-import nbformat
-import json
 import hashlib
+import json
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Any
+from typing import List, Dict, Set, Tuple, Any, Optional
 from rocrate.rocrate import ROCrate
 from rocrate.model.contextentity import ContextEntity
 from .provenance_types import NotebookCellProvenance
+from .notebook_model import NotebookModel, NotebookCell
+from .io_extraction import extract_unique_file_paths, analyze_cell
+from .dataflow import build_dataflow_graph
+from .plotly_encoding import encode_figure, write_figure
+from config import get_plotly_encoding
+from profiling import count, profiled
+
+PLOTLY_MIME_TYPE = "application/vnd.plotly.v1+json"
+CELL_DEPENDENCIES_FILENAME = "cell_dependencies.json"
+TYPED_PLOTLY_DESCRIPTION = "Trace x/y/z arrays are stored as Plotly typed arrays (dtype/bdata)."
 
 
 def parse_notebook_cells(notebook_path: str) -> List[str]:
-    with open(notebook_path, "r", encoding="utf-8") as f:
-        notebook = nbformat.read(f, as_version=4)
-    return [cell["source"] for cell in notebook.cells if cell.cell_type == "code"]
+    return NotebookModel.load(notebook_path).sources
 
 
-def create_code_cell_steps(crate: ROCrate, software_app: ContextEntity, notebook_path: str) -> List[NotebookCellProvenance]:
-    sources = parse_notebook_cells(notebook_path)
+@profiled()
+def create_code_cell_steps(crate: ROCrate, software_app: ContextEntity, notebook: NotebookModel) -> List[NotebookCellProvenance]:
     cell_entities = []
-    for i, src in enumerate(sources):
+    for cell in notebook.code_cells:
+        i = cell.index
         step: Any = crate.add(ContextEntity(crate, f"#step-{i+1}", properties={
             "@type": "HowToStep",
             "position": i + 1,
             "name": f"Code cell {i+1}",
             "tool": {"@id": software_app.id}
         }))  # type: ignore
-        cell_entities.append(NotebookCellProvenance(source=src, howto_step=step))
+        cell_entities.append(NotebookCellProvenance(source=cell.source, howto_step=step, index=i, cell_id=cell.cell_id))
     return cell_entities
 
 
-def create_software_application(crate: ROCrate, notebook_path: str) -> ContextEntity:
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        nb_data = json.load(f)
-        nb_metadata = nb_data.get("metadata", {})
-        kernel_info = nb_metadata.get("kernelspec", {})
-        kernel_name = kernel_info.get("name", "python3")
-        kernel_display_name = kernel_info.get("display_name", "Python 3")
-        kernel_version = nb_metadata.get("language_info", {}).get("version", "unknown")
+@profiled()
+def create_software_application(crate: ROCrate, notebook: NotebookModel) -> ContextEntity:
+    kernel_info = notebook.kernel_info()
+    kernel_name = kernel_info["name"]
+    kernel_display_name = kernel_info["display_name"]
+    kernel_version = kernel_info["version"]
 
     software_app: Any = crate.add(ContextEntity(crate, "#jupyter-kernel", properties={
         "@type": "SoftwareApplication",
@@ -51,75 +57,36 @@ def create_software_application(crate: ROCrate, notebook_path: str) -> ContextEn
     return software_app
 
 
-def extract_unique_file_paths(sources: List[str]) -> Tuple[Set[str], Set[str]]:
-    read_patterns = [
-        r'read_csv\((?:f)?["\']([^"\']+)["\']',
-        r'read_file\((?:f)?["\']([^"\']+)["\']',
-        r'glob\((?:f)?["\']([^"\']+)["\']'
-    ]
-    write_patterns = [
-        r'to_csv\((?:f)?["\']([^"\']+)["\']',
-        r'to_file\((?:f)?["\']([^"\']+)["\']'
-    ]
-
-    input_paths, output_paths = set(), set()
-    for line in sources:
-        for pattern in read_patterns:
-            for match in re.findall(pattern, line):
-                input_paths.add(_normalize_interpolated_path(match))
-        for pattern in write_patterns:
-            for match in re.findall(pattern, line):
-                output_paths.add(_normalize_interpolated_path(match))
-
-    return input_paths, output_paths
-
-
-def _normalize_interpolated_path(path: str) -> str:
+def write_if_changed(path: Path, content: bytes) -> str:
     """
-    Normalize interpolated or globbed paths by:
-    - Replacing string interpolation like {sitename} with '*'
-    - Replacing any explicit globs like 'nzd*' with '*'
-    - Collapsing multiple adjacent wildcards
+    Write content to path unless the file already holds exactly these bytes,
+    and return its SHA-256, computed from memory rather than by reading the file back.
     """
-    # Replace interpolated values like {var} with *
-    path = re.sub(r'{[^}]+}', '*', path)
-
-    # Replace glob patterns like nzd* with *
-    path = re.sub(r'\b\w*\*\w*\b', '*', path)
-
-    # Replace any remaining sequences like */*/ to */ and similar
-    path = re.sub(r'\*+', '*', path)
-
-    return path
-
-
-def file_sha256(filepath: str) -> str:
+    try:
+        unchanged = path.stat().st_size == len(content) and path.read_bytes() == content
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        with open(path, "wb") as f:
+            f.write(content)
+    count("bytes_hashed", len(content))
+    return hashlib.sha256(content).hexdigest()
+
+
+@profiled()
+def link_steps_to_code_blocks(crate: ROCrate, crate_dir: Path, notebook: NotebookModel, notebook_file, cell_entities, formal_params):
     """
-    Compute the SHA256 hash of a file.
-
-    Parameters:
-        filepath (str): Path to the file.
-
-    Returns:
-        str: SHA256 hex digest of the file.
+    Describe each code cell as a code_blocks/cell_N.py file of the crate. The files are written
+    straight into crate_dir, where crate.write finds them in place instead of copying them.
     """
-    sha256 = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
-
-
-def link_steps_to_code_blocks(crate: ROCrate, crate_output_dir: Path, notebook_path, notebook_file, cell_entities, formal_params):
-    code_blocks_dir = Path(crate_output_dir).parent / "code_blocks"
+    code_blocks_dir = Path(crate_dir) / "code_blocks"
     code_blocks_dir.mkdir(parents=True, exist_ok=True)
+    code_filenames = set()
 
     for i, cell in enumerate(cell_entities):
         code_filename = f"cell_{i+1}.py"
         code_path = code_blocks_dir / code_filename
-
-        with open(code_path, "w", encoding="utf-8") as f:
-            f.write(cell.source)
+        code_filenames.add(code_filename)
 
         code_file = crate.add_file(
             source=str(code_path),
@@ -127,7 +94,7 @@ def link_steps_to_code_blocks(crate: ROCrate, crate_output_dir: Path, notebook_p
             properties={
                 "@type": ["SoftwareApplication", "File"],
                 "name": f"Code Cell {i+1}",
-                "sha256": file_sha256(str(code_path)),
+                "sha256": write_if_changed(code_path, cell.source.encode("utf-8")),
             }
         )  # type: ignore
         cell.software_app = code_file
@@ -142,7 +109,7 @@ def link_steps_to_code_blocks(crate: ROCrate, crate_output_dir: Path, notebook_p
         cell.output_files = sorted(set(output_paths))
 
         # Add reference to parent notebook
-        cell.notebook_path = notebook_path
+        cell.notebook_path = notebook.path
 
         # Attach formal parameters to this code file (avoid duplicates, use basename as key)
         code_file["input"] = [  # type: ignore
@@ -156,9 +123,58 @@ def link_steps_to_code_blocks(crate: ROCrate, crate_output_dir: Path, notebook_p
             if os.path.basename(p) in formal_params
         ] if output_paths else []
 
+    # Drop code blocks left behind by an earlier build of a notebook that had more cells
+    for stale in code_blocks_dir.glob("cell_*.py"):
+        if stale.name not in code_filenames:
+            stale.unlink()
     return cell_entities
 
 
+@profiled()
+def add_cell_dependencies(crate: ROCrate, crate_dir: Path, notebook_file, cell_entities: List[NotebookCellProvenance]):
+    """
+    Build the def/use dataflow graph between code cells. Each HowToStep lists the steps it reads
+    names from as isBasedOn, and the full graph (names defined, used and read along each edge)
+    is written to cell_dependencies.json in the crate.
+    """
+    analyses = [analyze_cell(cell.source) for cell in cell_entities]
+    graph = build_dataflow_graph([(analysis.defines, analysis.uses) for analysis in analyses])
+
+    cells = []
+    for cell, analysis, dependencies in zip(cell_entities, analyses, graph):
+        cell.defined_names = sorted(analysis.defines)
+        cell.used_names = sorted(analysis.uses)
+        cell.depends_on = {cell_entities[index].howto_step.id: names for index, names in dependencies.items()}
+        if cell.depends_on:
+            cell.howto_step["isBasedOn"] = [{"@id": step_id} for step_id in cell.depends_on]  # type: ignore
+        cells.append({
+            "step": cell.howto_step.id,
+            "position": cell.howto_step["position"],
+            "code": cell.software_app.id if cell.software_app is not None else None,
+            "parsed": analysis.parsed,
+            "defines": cell.defined_names,
+            "uses": cell.used_names,
+            "dependsOn": cell.depends_on,
+        })
+
+    graph_path = Path(crate_dir) / CELL_DEPENDENCIES_FILENAME
+    content = json.dumps({"notebook": notebook_file.id, "cells": cells}, indent=2).encode("utf-8")
+    crate.add_file(
+        source=str(graph_path),
+        dest_path=CELL_DEPENDENCIES_FILENAME,
+        properties={
+            "@type": "File",
+            "name": "Cell dataflow graph",
+            "description": "Names each code cell defines and uses, and the earlier cells it reads them from.",
+            "encodingFormat": "application/json",
+            "about": {"@id": notebook_file.id},
+            "sha256": write_if_changed(graph_path, content),
+        }
+    )
+    return cell_entities
+
+
+@profiled()
 def create_formal_parameters(crate, source_lines: List[str], notebook_file, software_app, collapse_formal_parameters: bool = True) -> Dict[str, ContextEntity]:
     """
     Create FormalParameter entities for input/output file paths found in the notebook source lines.
@@ -195,20 +211,22 @@ def create_formal_parameters(crate, source_lines: List[str], notebook_file, soft
     return formal_params
 
 
-def get_matching_notebook_cell(cell_entity: NotebookCellProvenance, notebook_path: str) -> Dict:
+def get_matching_notebook_cell(cell_entity: NotebookCellProvenance, notebook: NotebookModel) -> Optional[NotebookCell]:
     """
-    Given a NotebookCellProvenance object and a notebook path, return the matching notebook cell.
-    Assumes that the code in `cell_entity.source` matches exactly the source in the notebook cell.
+    Given a NotebookCellProvenance object and the parsed notebook, return the matching code cell,
+    looked up by cell id when the notebook has ids and by position otherwise.
     """
-    with open(notebook_path, "r", encoding="utf-8") as f:
-        notebook = nbformat.read(f, as_version=4)
-        for cell in notebook.cells:
-            if cell.cell_type == "code" and cell.get("source", "") == cell_entity.source:
-                return cell
-    return {}
+    if cell_entity.cell_id:
+        cell = notebook.cell_by_id(cell_entity.cell_id)
+        if cell is not None:
+            return cell
+    if cell_entity.index is None:
+        return None
+    return notebook.cell_at(cell_entity.index)
 
 
-def add_create_actions(crate: ROCrate, cell_entities: List[NotebookCellProvenance], notebook_path):
+@profiled()
+def add_create_actions(crate: ROCrate, cell_entities: List[NotebookCellProvenance], notebook: NotebookModel):
     """
     Add CreateAction entities for each code cell step, linking them to the notebook file.
     """
@@ -224,49 +242,81 @@ def add_create_actions(crate: ROCrate, cell_entities: List[NotebookCellProvenanc
     return cell_entities
 
 
-def add_prov_results(crate: ROCrate, cell_entities: List[NotebookCellProvenance], notebook_path, crate_output_dir):
+def plotly_payload_hashes(notebook: NotebookModel) -> List[List[Any]]:
+    """
+    Return [code cell index, output index, payload SHA-256] for each Plotly output add_prov_results
+    extracts, the part of the notebook's outputs a provenance crate depends on.
+    """
+    return [
+        [cell.index, output.index, output.sha256(PLOTLY_MIME_TYPE)]
+        for cell in notebook.code_cells
+        for output in cell.outputs_with(PLOTLY_MIME_TYPE, output_type="display_data")
+    ]
+
+
+@profiled()
+def add_prov_results(crate: ROCrate, cell_entities: List[NotebookCellProvenance], notebook: NotebookModel, scratch_dir, plot_cache=None):
     """
     Add ProvResult entities for each CreateAction, scraping the jupyter notebook for Plotly results.
+    With the "typed" Plotly encoding, numeric trace arrays are rewritten as typed arrays and the
+    size reduction is reported; with a plot_cache (see provenance_cache.ProvenanceCache) typed
+    results are reused by payload hash.
     """
-    # Find crate output directory
-    crate_output_dir = Path(crate_output_dir).parent
-    plotly_output_dir = crate_output_dir / "plotly_results"
+    plotly_output_dir = Path(scratch_dir) / "plotly_results"
     plotly_output_dir.mkdir(parents=True, exist_ok=True)
+    typed = get_plotly_encoding() == "typed"
+    original_size = typed_size = 0
 
     for cell in cell_entities:
         # Find the matching cell in the notebook
-        matched_cell = get_matching_notebook_cell(cell, notebook_path)
-        if not matched_cell:
+        matched_cell = get_matching_notebook_cell(cell, notebook)
+        if matched_cell is None:
             continue
 
-        outputs = matched_cell.get("outputs", [])
-        for j, output in enumerate(outputs):
-            if (
-                output.get("output_type") == "display_data" and
-                "application/vnd.plotly.v1+json" in output.get("data", {})
-            ):
-                plot_data = output["data"]["application/vnd.plotly.v1+json"]
-                # Compose result filename
-                result_filename = f"{cell.howto_step.id.strip('#')}_plotly_{j+1}.json"
-                result_path = plotly_output_dir / result_filename
-
-                # Save Plotly JSON to file
-                with open(result_path, "w", encoding="utf-8") as f:
-                    json.dump(plot_data, f)
-
-                # Add file to crate and link as result
-                result_file = crate.add_file(
-                    source=str(result_path),
-                    dest_path=f"plotly_results/{result_filename}",
-                    properties={
-                        "@type": "MediaObject",
-                        "encodingFormat": "application/vnd.plotly.v1+json",
-                        "name": f"Plotly chart from {cell.howto_step.id}"
-                    }
-                )  # type: ignore
-
-                cell.prov_result = result_file
-                if cell.create_action:
-                    cell.create_action["result"] = {"@id": result_file.id}  # type: ignore
+        for output in matched_cell.outputs_with(PLOTLY_MIME_TYPE, output_type="display_data"):
+            j = output.index
+            # Compose result filename
+            result_filename = f"{cell.howto_step.id.strip('#')}_plotly_{j+1}.json"
+            result_path = plotly_output_dir / result_filename
 
+            properties = {
+                "@type": "MediaObject",
+                "encodingFormat": PLOTLY_MIME_TYPE,
+                "name": f"Plotly chart from {cell.howto_step.id}",
+            }
+            if typed:
+                payload_sha256 = output.sha256(PLOTLY_MIME_TYPE) if plot_cache is not None else None
+                cached = plot_cache.get_plot(payload_sha256, result_path) if payload_sha256 is not None else None
+                if cached is not None:
+                    sha256, size = cached
+                else:
+                    figure = output.data(PLOTLY_MIME_TYPE)
+                    encode_figure(figure)
+                    sha256, size = write_figure(figure, result_path)
+                    if payload_sha256 is not None:
+                        plot_cache.put_plot(payload_sha256, result_path)
+                start, end = output.data_spans[PLOTLY_MIME_TYPE]
+                original_size += end - start
+                typed_size += size
+                properties["description"] = TYPED_PLOTLY_DESCRIPTION
+            else:
+                # Copy the Plotly JSON byte range from the notebook to file, hashing it in the same pass
+                sha256 = output.copy_to(PLOTLY_MIME_TYPE, result_path)
+            properties["sha256"] = sha256
+
+            # Add file to crate and link as result
+            result_file = crate.add_file(
+                source=str(result_path),
+                dest_path=f"plotly_results/{result_filename}",
+                properties=properties
+            )  # type: ignore
+
+            cell.prov_result = result_file
+            if cell.create_action:
+                cell.create_action["result"] = {"@id": result_file.id}  # type: ignore
+
+    if original_size:
+        print(f"Plotly results of {Path(notebook.path).name} stored as typed arrays: "
+              f"{original_size / 1024:.1f} KB -> {typed_size / 1024:.1f} KB "
+              f"({100 * (1 - typed_size / original_size):.0f}% smaller)")
     return cell_entities
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Any, Dict
 from rocrate.model.contextentity import ContextEntity
 
@@ -18,6 +18,10 @@ class NotebookCellProvenance:
     output_files: Optional[List[ContextEntity]] = None
     notebook_path: Optional[str] = None
     parent_notebook: Optional[ContextEntity] = None
+    cell_id: Optional[str] = None
+    defined_names: Optional[List[str]] = None
+    used_names: Optional[List[str]] = None
+    depends_on: Optional[Dict[str, List[str]]] = None   # HowToStep id -> names read from that step
 
 
 @dataclass
@@ -25,4 +29,45 @@ class ProspectiveIndex:
     main_workflow: ContextEntity
     software_app: ContextEntity
     steps: List[NotebookCellProvenance]
-    formal_params: Dict[str, ContextEntity]
\ No newline at end of file
+    formal_params: Dict[str, ContextEntity]
+
+
+def _reference(entity: Any) -> Optional[Dict[str, str]]:
+    return {"@id": entity.id} if entity is not None else None
+
+
+@dataclass
+class CellProvenanceResult:
+    """
+    Plain, picklable provenance of one code cell, as returned by notebook provenance
+    worker processes. Entities of the notebook crate are referenced as {"@id": ...}.
+    """
+    source: str
+    howto_step: Dict[str, str]
+    index: Optional[int] = None
+    cell_id: Optional[str] = None
+    create_action: Optional[Dict[str, str]] = None
+    prov_result: Optional[Dict[str, str]] = None
+    software_app: Optional[Dict[str, str]] = None
+    input_params: List[Any] = field(default_factory=list)
+    output_params: List[Any] = field(default_factory=list)
+    input_files: List[str] = field(default_factory=list)
+    output_files: List[str] = field(default_factory=list)
+    notebook_path: Optional[str] = None
+
+    @classmethod
+    def from_cell(cls, cell: NotebookCellProvenance) -> "CellProvenanceResult":
+        return cls(
+            source=cell.source,
+            howto_step={"@id": cell.howto_step.id},
+            index=cell.index,
+            cell_id=cell.cell_id,
+            create_action=_reference(cell.create_action),
+            prov_result=_reference(cell.prov_result),
+            software_app=_reference(cell.software_app),
+            input_params=[_reference(param) for param in cell.input_params or []],
+            output_params=[_reference(param) for param in cell.output_params or []],
+            input_files=list(cell.input_files or []),
+            output_files=list(cell.output_files or []),
+            notebook_path=str(cell.notebook_path) if cell.notebook_path is not None else None,
+        )
@@ -0,0 +1,236 @@
+"""
+Opt-in build profiler for LP_Crate.
+
+Phases are nested with the `phase` context manager or the `profiled`
+decorator; both cost a single flag check while profiling is disabled. When
+enabled, each phase path (e.g. "build;build_e2_2;build_e2_2_crate") records
+its calls, wall time, subprocesses started, bytes hashed and RO-Crate
+entities added. Subprocesses and entities are counted by wrapping
+`subprocess.Popen` and `ROCrate.add` for the duration of the profile.
+
+Worker processes profile on their own when enabled there; `collect` hands
+their data to the parent process, which `merge`s it under its current phase.
+
+`write_report` produces a JSON report and a collapsed-stack file (one
+"a;b;c <microseconds>" line per path, self time only) that flamegraph.pl,
+speedscope and inferno read directly.
+"""
+
+import json
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+from rocrate.rocrate import ROCrate
+
+COUNTERS = ("subprocesses", "bytes_hashed", "entities")
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_stats: dict[tuple[str, ...], dict] = {}
+_started_at: Optional[str] = None
+_original_popen_init = None
+_original_crate_add = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _stack() -> tuple[str, ...]:
+    return getattr(_local, "stack", ())
+
+
+def _entry(path: tuple[str, ...]) -> dict:
+    entry = _stats.get(path)
+    if entry is None:
+        entry = _stats[path] = {"calls": 0, "wall": 0.0, **{name: 0 for name in COUNTERS}}
+    return entry
+
+
+def count(counter: str, amount: int = 1) -> None:
+    """Add `amount` to a counter of the innermost phase of the calling thread."""
+    if not _enabled:
+        return
+    with _lock:
+        _entry(_stack())[counter] += amount
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as a child of the current phase."""
+    if not _enabled:
+        yield
+        return
+    parent = _stack()
+    path = parent + (name,)
+    _local.stack = path
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.stack = parent
+        with _lock:
+            entry = _entry(path)
+            entry["calls"] += 1
+            entry["wall"] += elapsed
+
+
+def profiled(name: Optional[str] = None):
+    """Decorator form of `phase`; the phase name defaults to the function's qualified name."""
+    def decorator(func):
+        phase_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with phase(phase_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    """
+    Return `func` wrapped to run under the caller's current phase, for use in worker threads
+    (whose own phase stack starts empty).
+    """
+    if not _enabled:
+        return func
+    stack = _stack()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = _stack()
+        _local.stack = stack
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.stack = previous
+    return wrapper
+
+
+def collect() -> list[tuple[tuple[str, ...], dict]]:
+    """
+    Return the phase data recorded so far and start afresh, for a worker process to send
+    back with its results (see `merge`).
+    """
+    with _lock:
+        data = [(path, dict(entry)) for path, entry in _stats.items()]
+        _stats.clear()
+    return data
+
+
+def merge(data: list[tuple[tuple[str, ...], dict]]) -> None:
+    """
+    Add phase data collected in another process under the calling thread's current phase.
+    Workers run concurrently, so their phases can add up to more wall time than the parent's.
+    """
+    if not _enabled:
+        return
+    parent = _stack()
+    with _lock:
+        for path, entry in data:
+            target = _entry(parent + tuple(path))
+            for name, value in entry.items():
+                target[name] += value
+
+
+def enable() -> None:
+    """Start a new profile, discarding any previous one."""
+    global _enabled, _started_at, _original_popen_init, _original_crate_add
+    if _enabled:
+        disable()
+    with _lock:
+        _stats.clear()
+    _started_at = datetime.now(timezone.utc).isoformat()
+
+    _original_popen_init = subprocess.Popen.__init__
+    _original_crate_add = ROCrate.add
+
+    def popen_init(self, *args, **kwargs):
+        count("subprocesses")
+        return _original_popen_init(self, *args, **kwargs)
+
+    def crate_add(self, *entities):
+        count("entities", len(entities))
+        return _original_crate_add(self, *entities)
+
+    subprocess.Popen.__init__ = popen_init
+    ROCrate.add = crate_add
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording and restore the wrapped functions; collected data is kept for the report."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    subprocess.Popen.__init__ = _original_popen_init
+    ROCrate.add = _original_crate_add
+
+
+def report() -> dict:
+    """Return the collected profile with inclusive totals and self time per phase path."""
+    with _lock:
+        stats = {path: dict(entry) for path, entry in _stats.items()}
+
+    children_wall: dict[tuple[str, ...], float] = defaultdict(float)
+    inclusive = {path: {name: 0 for name in COUNTERS} for path in stats if path}
+    for path, entry in stats.items():
+        if len(path) > 1:
+            children_wall[path[:-1]] += entry["wall"]
+        for depth in range(1, len(path) + 1):
+            for name in COUNTERS:
+                inclusive[path[:depth]][name] += entry[name]
+
+    phases = []
+    for path in sorted(p for p in stats if p):
+        entry = stats[path]
+        phases.append({
+            "path": ";".join(path),
+            "name": path[-1],
+            "depth": len(path),
+            "calls": entry["calls"],
+            "wall_seconds": round(entry["wall"], 6),
+            # Children running on worker threads can overlap, so self time is clamped at zero
+            "self_seconds": round(max(0.0, entry["wall"] - children_wall[path]), 6),
+            **{name: inclusive[path][name] for name in COUNTERS},
+            **{f"self_{name}": entry[name] for name in COUNTERS},
+        })
+
+    roots = [p for p in phases if p["depth"] == 1]
+    totals = {name: sum(entry[name] for entry in stats.values()) for name in COUNTERS}
+    return {
+        "started": _started_at,
+        "wall_seconds": round(sum(p["wall_seconds"] for p in roots), 6),
+        "totals": totals,
+        "phases": phases,
+    }
+
+
+def write_report(prefix) -> tuple[Path, Path]:
+    """Write <prefix>.json and <prefix>.folded and return their paths."""
+    data = report()
+    prefix = Path(prefix)
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    json_path = prefix.with_name(prefix.name + ".json")
+    folded_path = prefix.with_name(prefix.name + ".folded")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    with open(folded_path, "w", encoding="utf-8") as f:
+        for entry in data["phases"]:
+            micros = int(round(entry["self_seconds"] * 1_000_000))
+            if micros:
+                f.write(f"{entry['path']} {micros}\n")
+    return json_path, folded_path
@@ -0,0 +1,154 @@
+"""
+Persistent cache of notebook provenance crates.
+
+Most of a notebook provenance crate depends only on the notebook's name,
+metadata and code cells (their ids and sources), on the code that generates
+it and on the Plotly encoding. Built crates are therefore stored in the
+configured cache directory under a key derived from those, together with
+their serialized cell provenance and the hashes of the Plotly payloads their
+results were extracted from. Outputs are not part of the key: re-running an
+unchanged notebook restores its crate, with the notebook copy refreshed,
+as long as its Plotly payloads are the same. When they differ the crate is
+rebuilt, and typed-array Plotly results are cached on their own, keyed by
+the SHA-256 of each raw output payload, so only the plots that changed are
+decoded and encoded again.
+
+Without a cache directory nothing is cached.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from config import get_cache_dir, get_plotly_encoding
+from hash_cache import hash_file
+from notebook_provenance.notebook_model import NotebookModel
+from notebook_provenance.notebook_to_provcrate import PROVENANCE_GENERATOR_VERSION
+from notebook_provenance.prospective_helper import plotly_payload_hashes
+from notebook_provenance.provenance_types import CellProvenanceResult
+from profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+
+class ProvenanceCache:
+    DIRNAME = "notebook_provenance"
+    CELLS_FILENAME = "cells.json"
+    PLOTS_FILENAME = "plots.json"
+    CRATE_DIRNAME = "crate"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.root = Path(cache_dir) / self.DIRNAME / f"v{PROVENANCE_GENERATOR_VERSION}"
+        self.crates_dir = self.root / "crates"
+        self.plots_dir = self.root / "plotly_typed"
+        self.crates_dir.mkdir(parents=True, exist_ok=True)
+        self.plots_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def notebook_key(notebook: NotebookModel) -> str:
+        """Key a notebook's crate by everything but its outputs (see the module docstring)."""
+        key = json.dumps({
+            "name": Path(notebook.path).name,
+            "metadata": notebook.metadata,
+            "cells": [[cell.cell_id, cell.source] for cell in notebook.code_cells],
+            "plotly_encoding": get_plotly_encoding(),
+        }, sort_keys=True)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @profiled("ProvenanceCache.restore")
+    def restore(self, key: str, output_dir, notebook: NotebookModel) -> Optional[List[CellProvenanceResult]]:
+        """
+        Copy the cached crate for key into output_dir and return its cell provenance, or None on a miss
+        or if the notebook's Plotly payloads differ from those the cached crate was built from.
+        """
+        entry = self.crates_dir / key
+        try:
+            with open(entry / self.PLOTS_FILENAME, "r", encoding="utf-8") as f:
+                plots = json.load(f)
+            with open(entry / self.CELLS_FILENAME, "r", encoding="utf-8") as f:
+                cells = [CellProvenanceResult(**cell) for cell in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return None
+        if plots != plotly_payload_hashes(notebook):
+            return None
+        output_dir = Path(output_dir)
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        shutil.copytree(entry / self.CRATE_DIRNAME, output_dir)
+        # The crate holds a copy of the notebook, whose other outputs may have changed
+        notebook_path = Path(notebook.path)
+        shutil.copyfile(notebook_path, output_dir / notebook_path.name)
+        for cell in cells:
+            cell.notebook_path = str(notebook_path)
+        return cells
+
+    @profiled("ProvenanceCache.store")
+    def store(self, key: str, output_dir, cells: List[CellProvenanceResult], notebook: NotebookModel) -> None:
+        """Store a freshly written crate, its cell provenance and its Plotly payload hashes under key."""
+        entry = self.crates_dir / key
+        # Assemble the entry next to its final location, then rename it into place in one step
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.crates_dir))
+        replaced = None
+        try:
+            shutil.copytree(output_dir, staging / self.CRATE_DIRNAME)
+            with open(staging / self.CELLS_FILENAME, "w", encoding="utf-8") as f:
+                json.dump([dataclasses.asdict(cell) for cell in cells], f)
+            with open(staging / self.PLOTS_FILENAME, "w", encoding="utf-8") as f:
+                json.dump(plotly_payload_hashes(notebook), f)
+            if entry.exists():
+                # The notebook's Plotly outputs changed since the entry was stored; keep the latest crate
+                replaced = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.crates_dir)) / "entry"
+                os.rename(entry, replaced)
+            os.rename(staging, entry)
+        except OSError as e:
+            # Another build may have stored the same notebook concurrently
+            logger.debug(f"Could not store provenance cache entry {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+        if replaced is not None:
+            shutil.rmtree(replaced.parent, ignore_errors=True)
+
+    def get_plot(self, payload_sha256: str, target) -> Optional[tuple[str, int]]:
+        """Copy the typed Plotly result cached for a payload hash to target and return its (SHA-256, size), or None on a miss."""
+        try:
+            shutil.copyfile(self.plots_dir / f"{payload_sha256}.json", target)
+        except OSError:
+            return None
+        return hash_file(target)
+
+    def put_plot(self, payload_sha256: str, source) -> None:
+        """Cache the typed Plotly result in source under the hash of the payload it was encoded from."""
+        path = self.plots_dir / f"{payload_sha256}.json"
+        if path.exists():
+            return
+        fd, staging = tempfile.mkstemp(prefix=f".{payload_sha256}-", dir=self.plots_dir)
+        os.close(fd)
+        try:
+            shutil.copyfile(source, staging)
+            os.replace(staging, path)
+        except OSError as e:
+            logger.debug(f"Could not store Plotly cache entry {payload_sha256}: {e}")
+            os.unlink(staging)
+
+
+_provenance_cache: Optional[ProvenanceCache] = None
+_provenance_cache_lock = threading.Lock()
+
+
+def get_provenance_cache() -> Optional[ProvenanceCache]:
+    """Return the provenance cache for the configured cache directory, or None if caching is disabled."""
+    global _provenance_cache
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    with _provenance_cache_lock:
+        if _provenance_cache is None or _provenance_cache.cache_dir != cache_dir:
+            _provenance_cache = ProvenanceCache(cache_dir)
+        return _provenance_cache
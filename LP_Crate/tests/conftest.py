@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# LP_Crate modules import each other as top-level modules
+LP_CRATE_DIR = Path(__file__).parent.parent
+if str(LP_CRATE_DIR) not in sys.path:
+    sys.path.insert(0, str(LP_CRATE_DIR))
+
+METADATA_FILENAME = "ro-crate-metadata.json"
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(repo), *args], text=True).strip()
+
+
+def build(*args) -> None:
+    """Run interface_crate.py with the given arguments and a file limit of 2."""
+    subprocess.run(
+        [sys.executable, str(LP_CRATE_DIR / "interface_crate.py"), "--limit", "2", *map(str, args)],
+        check=True, cwd=LP_CRATE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def load_graph(crate_dir: Path) -> list:
+    with open(crate_dir / METADATA_FILENAME, "r", encoding="utf-8") as f:
+        return json.load(f)["@graph"]
+
+
+@pytest.fixture
+def coastsat_repo(tmp_path) -> Path:
+    """A small synthetic CoastSat repository (see benchmarks/synthetic_repo.py)."""
+    repo = tmp_path / "CoastSat"
+    subprocess.run(
+        [sys.executable, str(LP_CRATE_DIR / "benchmarks" / "synthetic_repo.py"), str(repo),
+         "--nz-sites", "2", "--sar-sites", "1", "--pacific-sites", "1", "--rows", "5"],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    return repo
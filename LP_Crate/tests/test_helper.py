@@ -0,0 +1,53 @@
+import hashlib
+
+from conftest import git
+from hash_cache import get_hash_cache
+from helper import CatFile, GitURL
+
+
+def test_cat_file_reports_missing_objects(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    (repo / "a file.txt").write_bytes(b"content\n")
+    git(repo, "add", "a file.txt")
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "add")
+
+    cat_file = CatFile(str(repo))
+    try:
+        assert cat_file.info("HEAD:a file.txt")[1:] == ("blob", 8)
+        assert cat_file.read("HEAD:a file.txt") == b"content\n"
+        # Revs with spaces make git answer "<rev> missing" in three fields or more
+        assert cat_file.info("HEAD:no such.txt") is None
+        assert cat_file.read("HEAD:no such.txt") is None
+        assert cat_file.info("HEAD:no such file.txt") is None
+        assert cat_file.read("HEAD:no such file.txt") is None
+        assert cat_file.info("HEAD:missing") is None
+        # The processes stay usable afterwards
+        assert cat_file.read("HEAD:a file.txt") == b"content\n"
+    finally:
+        cat_file.close()
+
+
+def test_working_tree_hash_ignores_blob_entries(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    git(repo, "remote", "add", "origin", "https://github.com/example/CoastSat.git")
+    # Checked out with CRLF line endings, stored in git with LF
+    (repo / ".gitattributes").write_text("*.txt text eol=crlf\n")
+    (repo / "tides.txt").write_bytes(b"a\nb\n")
+    git(repo, "add", ".")
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "add")
+    (repo / "tides.txt").unlink()
+    git(repo, "checkout", "--", "tides.txt")
+    worktree = (repo / "tides.txt").read_bytes()
+    assert worktree == b"a\r\nb\r\n"
+
+    URL = GitURL(repo_path=str(repo), remote_name="origin")
+    blob_id = git(repo, "rev-parse", "HEAD:tides.txt")
+    # As if the blob had already been hashed for the previous commit
+    get_hash_cache().put_blob(blob_id, hashlib.sha256(b"a\nb\n").hexdigest())
+
+    assert URL.get_file_digest("tides.txt") == (hashlib.sha256(worktree).hexdigest(), len(worktree))
+    assert get_hash_cache().get_blob(blob_id) == hashlib.sha256(b"a\nb\n").hexdigest()
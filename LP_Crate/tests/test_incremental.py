@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import time
+
+from conftest import METADATA_FILENAME, build, git, load_graph
+from e1_crate import PROCESS_RUN_CRATE_VERSION
+from helper import GitURL
+from incremental import DIGESTS_FILENAME, GENERATORS_FILENAME, PreviousBuild
+from notebook_provenance.notebook_to_provcrate import PROVENANCE_GENERATOR_VERSION
+
+
+def test_incremental_build_ignores_previous_file_hashes(coastsat_repo, tmp_path):
+    previous = tmp_path / "previous"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", previous)
+
+    # Give a File entity of the current commit the hash of other content, keeping its size
+    blob_prefix = f"https://github.com/example/CoastSat/blob/{git(coastsat_repo, 'rev-parse', 'HEAD')}/"
+    with open(previous / METADATA_FILENAME, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    entity = next(
+        entity for entity in metadata["@graph"]
+        if entity["@id"].startswith(blob_prefix) and entity.get("sha256")
+    )
+    rel_path = entity["@id"][len(blob_prefix):]
+    expected = hashlib.sha256((coastsat_repo / rel_path).read_bytes()).hexdigest()
+    entity["sha256"] = hashlib.sha256(b"other content").hexdigest()
+    with open(previous / METADATA_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+
+    output = tmp_path / "output"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output, "--incremental", "--previous-crate", previous,
+          "--cache-dir", tmp_path / "cache")
+
+    rebuilt = {entity["@id"]: entity for entity in load_graph(output)}
+    assert rebuilt[entity["@id"]]["sha256"] == expected
+
+
+def test_previous_build_commit_is_read_from_is_based_on(coastsat_repo, tmp_path):
+    # A later commit that does not touch update.sh
+    (coastsat_repo / "notes.txt").write_text("later\n")
+    git(coastsat_repo, "add", "notes.txt")
+    git(coastsat_repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "notes")
+    output = tmp_path / "output"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output)
+
+    entities = {entity["@id"]: entity for entity in load_graph(output)}
+    commit_url = "https://github.com/example/CoastSat/commit/"
+    update_sh_commit = git(coastsat_repo, "log", "-n", "1", "--pretty=format:%H", "--", "update.sh")
+    head = git(coastsat_repo, "rev-parse", "HEAD")
+    assert update_sh_commit != head
+    assert entities["livepublication-interface"]["version"] == commit_url + update_sh_commit
+    assert entities["./"]["isBasedOn"] == {"@id": commit_url + head}
+
+    previous_build = PreviousBuild.load(output, GitURL(repo_path=str(coastsat_repo), remote_name="origin"))
+    assert previous_build is not None and previous_build.commit_hash == head
+
+
+def test_subcrates_of_another_generator_version_are_rebuilt(coastsat_repo, tmp_path):
+    previous = tmp_path / "previous"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", previous)
+
+    entities = {entity["@id"]: entity for entity in load_graph(previous)}
+    generator_versions = json.loads((previous / GENERATORS_FILENAME).read_text())
+    assert generator_versions["batch_processes"] == PROCESS_RUN_CRATE_VERSION
+    assert "version" not in entities[f"batch_processes/{METADATA_FILENAME}"]
+    notebook_dirs = [rel_dir for rel_dir in generator_versions if rel_dir.startswith("notebooks/")]
+    assert notebook_dirs
+    for rel_dir in notebook_dirs:
+        assert generator_versions[rel_dir] == PROVENANCE_GENERATOR_VERSION
+        assert "version" not in entities[f"{rel_dir}/{METADATA_FILENAME}"]
+        # Copied through with the crate if it is reused
+        (previous / rel_dir / "marker").touch()
+    stale, current = notebook_dirs[0], notebook_dirs[1:]
+    generator_versions[stale] = PROVENANCE_GENERATOR_VERSION - 1
+    (previous / GENERATORS_FILENAME).write_text(json.dumps(generator_versions))
+
+    output = tmp_path / "output"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output, "--incremental", "--previous-crate", previous)
+    assert not (output / stale / "marker").exists()
+    assert all((output / rel_dir / "marker").exists() for rel_dir in current)
+    assert json.loads((output / GENERATORS_FILENAME).read_text())[stale] == PROVENANCE_GENERATOR_VERSION
+
+
+def test_recorded_digests_are_reused_only_for_unchanged_files(coastsat_repo, tmp_path):
+    previous = tmp_path / "previous"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", previous)
+
+    digests = json.loads((previous / DIGESTS_FILENAME).read_text())
+    unchanged, modified = sorted(path for path in digests["files"] if path.endswith(".csv"))[:2]
+    for rel_path in (unchanged, modified):
+        # Replace the recorded digests so reuse shows up in the crate
+        digests["files"][rel_path]["sha256"] = hashlib.sha256(rel_path.encode()).hexdigest()
+    (previous / DIGESTS_FILENAME).write_text(json.dumps(digests))
+
+    # A nightly commit touching other files; the modified file keeps its size
+    with open(coastsat_repo / "notes.txt", "w") as f:
+        f.write("later\n")
+    content = (coastsat_repo / modified).read_bytes()
+    (coastsat_repo / modified).write_bytes(content[:-2] + (b"8\n" if content.endswith(b"9\n") else b"9\n"))
+    git(coastsat_repo, "add", ".")
+    git(coastsat_repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "nightly")
+    for path in coastsat_repo.rglob("*.csv"):
+        # Outside the hash cache's window for racy writes
+        os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+    output = tmp_path / "output"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output, "--incremental", "--previous-crate", previous)
+
+    blob_prefix = f"https://github.com/example/CoastSat/blob/{git(coastsat_repo, 'rev-parse', 'HEAD')}/"
+    hashes = {
+        entity["@id"]: entity["sha256"]
+        for crate_dir in (output, output / "batch_processes")
+        for entity in load_graph(crate_dir) if entity.get("sha256")
+    }
+    assert hashes[blob_prefix + unchanged] == hashlib.sha256(unchanged.encode()).hexdigest()
+    assert hashes[blob_prefix + modified] == hashlib.sha256((coastsat_repo / modified).read_bytes()).hexdigest()
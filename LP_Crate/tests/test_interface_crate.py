@@ -0,0 +1,74 @@
+import hashlib
+import json
+import subprocess
+import sys
+
+import config
+import profiling
+from conftest import LP_CRATE_DIR, METADATA_FILENAME, build
+from interface_crate import build_notebook_crates
+
+
+def test_repeated_notebook_crates_do_not_share_files(coastsat_repo, tmp_path):
+    output = tmp_path / "output"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output)
+
+    # update.sh runs tidal_correction.ipynb twice; the second step reuses the first step's crate
+    first, second = output / "notebooks" / "tidal_correction-1", output / "notebooks" / "tidal_correction-2"
+    files = sorted(path.relative_to(first) for path in first.rglob("*") if path.is_file())
+    assert files == sorted(path.relative_to(second) for path in second.rglob("*") if path.is_file())
+    for rel_path in files:
+        assert (first / rel_path).read_bytes() == (second / rel_path).read_bytes()
+        assert not (first / rel_path).samefile(second / rel_path)
+
+    # Rewriting a file of one crate in place leaves the other alone
+    code_block = first / "code_blocks" / "cell_1.py"
+    original = (second / "code_blocks" / "cell_1.py").read_bytes()
+    with open(code_block, "wb") as f:
+        f.write(b"print('changed')\n")
+    assert (second / "code_blocks" / "cell_1.py").read_bytes() == original
+
+
+def test_build_summaries_are_recorded_in_the_manifest(coastsat_repo, tmp_path):
+    output, summaries = tmp_path / "output", tmp_path / "summaries"
+    build("--coastsat-dir", coastsat_repo, "--output-dir", output, "--summaries", summaries)
+
+    manifest = json.loads((summaries / "summary-manifest.json").read_text())["summaries"]
+    assert manifest["batch-processes-summary.json"]["input"] == f"batch_processes/{METADATA_FILENAME}"
+    assert set(manifest) == {path.name for path in summaries.glob("*-summary.json")}
+    for filename, entry in manifest.items():
+        assert entry["sha256"] == hashlib.sha256((output / entry["input"]).read_bytes()).hexdigest()
+        assert entry["size"] == (summaries / filename).stat().st_size
+
+    # The standalone tool finds nothing left to summarize
+    result = subprocess.run(
+        [sys.executable, str(LP_CRATE_DIR / "tools" / "generate_all_summaries.py"), str(output), str(summaries)],
+        check=True, capture_output=True, text=True, cwd=LP_CRATE_DIR / "tools",
+    )
+    assert "All summaries are up to date" in result.stdout
+
+
+def test_pooled_notebook_builds_are_profiled(coastsat_repo, tmp_path):
+    names = ("linear_models", "slope_estimation", "tidal_correction")
+    jobs = []
+    for name in names:
+        (tmp_path / name).mkdir()
+        jobs.append((str(tmp_path / name), str(coastsat_repo), str(coastsat_repo / f"{name}.ipynb")))
+
+    max_processes = config.get_max_processes()
+    config.set_max_processes(3)
+    profiling.enable()
+    try:
+        with profiling.phase("build_notebook_crates"):
+            results = build_notebook_crates(jobs)
+    finally:
+        profiling.disable()
+        config.set_max_processes(max_processes)
+
+    assert all(results)
+    phases = {entry["path"]: entry for entry in profiling.report()["phases"]}
+    worker_phase = phases["build_notebook_crates;build_e2_2_crate"]
+    assert worker_phase["calls"] == len(jobs)
+    assert worker_phase["wall_seconds"] > 0
+    assert worker_phase["entities"] > 0 and worker_phase["bytes_hashed"] > 0
+    assert any(path.startswith("build_notebook_crates;build_e2_2_crate;") for path in phases)
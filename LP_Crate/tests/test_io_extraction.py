@@ -0,0 +1,29 @@
+import pytest
+
+from notebook_provenance.io_extraction import extract_cell_io, normalize_interpolated_path
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("data/{site}/tides.csv", "data/*/tides.csv"),
+    ("data/{}/tides.csv", "data/*/tides.csv"),
+    ("data/{0}-{1}.csv", "data/*-*.csv"),
+    ("data/nzd*/tides.csv", "data/*/tides.csv"),
+])
+def test_normalize_interpolated_path(path, expected):
+    assert normalize_interpolated_path(path) == expected
+
+
+@pytest.mark.parametrize("source, inputs", [
+    ('df = pd.read_csv("data/{}/tides.csv".format(site))', {"data/*/tides.csv"}),
+    ('df = pd.read_excel(os.path.join("data", site, "x.xlsx"))', {"data/*/x.xlsx"}),
+    ('df = pd.read_csv(Path("data") / site / "x.csv")', {"data/*/x.csv"}),
+    ('df = pd.read_csv("data/" + site + "/x.csv")', {"data/*/x.csv"}),
+    ('files = Path("data").glob("*.csv")', {"data/*.csv"}),
+    ('data_dir = Path("data")\nfiles = data_dir.glob("*/tides.csv")', {"data/*/tides.csv"}),
+    ('files = glob.glob("data/*/tides.csv")', {"data/*/tides.csv"}),
+    # Nothing constant to go on
+    ('df = pd.read_csv(os.path.join(base, name))', set()),
+    ('df = pd.read_csv(Path(base) / name)', set()),
+])
+def test_extract_cell_io_resolves_paths(source, inputs):
+    assert extract_cell_io(source).inputs == inputs
@@ -0,0 +1,42 @@
+import base64
+import struct
+
+from notebook_provenance.plotly_encoding import _dtype, encode_array
+
+
+def decode(encoded):
+    data = base64.b64decode(encoded["bdata"])
+    typecode = {"i1": "b", "u1": "B", "i2": "h", "u2": "H", "i4": "i", "u4": "I", "f8": "d"}[encoded["dtype"]]
+    return list(struct.unpack(f"<{len(data) // struct.calcsize(typecode)}{typecode}", data))
+
+
+def test_small_integers_use_the_narrowest_dtype():
+    values = list(range(100))
+    encoded = encode_array(values)
+    assert encoded["dtype"] == "i1"
+    assert decode(encoded) == values
+
+
+def test_floats_round_trip():
+    values = [i / 7 for i in range(50)]
+    encoded = encode_array(values)
+    assert encoded["dtype"] == "f8"
+    assert decode(encoded) == values
+
+
+def test_exact_integers_among_floats_are_encoded():
+    values = [2 ** 53, 1 / 3] * 20
+    encoded = encode_array(values)
+    assert encoded["dtype"] == "f8"
+    assert decode(encoded) == values
+
+
+def test_inexact_integers_among_floats_stay_a_list():
+    assert _dtype([2 ** 53 + 1, 0.5]) is None
+    assert encode_array([2 ** 53 + 1, 1 / 3] * 20) is None
+    assert encode_array([-(2 ** 53) - 1, 1 / 3] * 20) is None
+
+
+def test_non_numeric_arrays_stay_a_list():
+    assert encode_array([1, None, 2]) is None
+    assert encode_array([True, False] * 20) is None
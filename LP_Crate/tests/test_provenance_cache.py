@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import config
+import e2_2_crate
+from notebook_provenance import prospective_helper
+
+
+def write_notebook(path, plot_values, stream_text):
+    figure = {"data": [{"type": "scatter", "x": list(range(len(plot_values))), "y": plot_values}], "layout": {}}
+    notebook = {
+        "nbformat": 4,
+        "nbformat_minor": 5,
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3"}},
+        "cells": [
+            {"cell_type": "code", "id": "load", "metadata": {}, "execution_count": 1,
+             "source": ["import pandas as pd\n", "df = pd.read_csv('data/sites.csv')\n"],
+             "outputs": [{"output_type": "stream", "name": "stdout", "text": [stream_text]}]},
+            {"cell_type": "code", "id": "plot", "metadata": {}, "execution_count": 2,
+             "source": ["fig.show()\n"],
+             "outputs": [{"output_type": "display_data", "metadata": {},
+                          "data": {"application/vnd.plotly.v1+json": figure, "text/plain": ["Figure"]}}]},
+        ],
+    }
+    path.write_text(json.dumps(notebook), encoding="utf-8")
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    cache_dir, encoding = config.get_cache_dir(), config.get_plotly_encoding()
+    config.set_cache_dir(str(tmp_path / "cache"))
+    config.set_plotly_encoding("typed")
+    yield tmp_path / "cache"
+    config.set_cache_dir(cache_dir)
+    config.set_plotly_encoding(encoding)
+
+
+generate_provenance_crate_for_notebook = e2_2_crate.generate_provenance_crate_for_notebook
+
+
+def build(notebook_path, output_dir, monkeypatch, rebuilt):
+    def generate_and_record(*args, **kwargs):
+        rebuilt.append(output_dir)
+        return generate_provenance_crate_for_notebook(*args, **kwargs)
+
+    monkeypatch.setattr(e2_2_crate, "generate_provenance_crate_for_notebook", generate_and_record)
+    return e2_2_crate.build_e2_2_crate(str(output_dir), str(notebook_path.parent), str(notebook_path),
+                                       str(output_dir.parent))
+
+
+def test_output_only_changes_restore_the_cached_crate(cache_dir, tmp_path, monkeypatch):
+    notebook_path = tmp_path / "analysis.ipynb"
+    rebuilt = []
+    write_notebook(notebook_path, [1, 2, 3], "3 sites\n")
+    first = build(notebook_path, tmp_path / "first", monkeypatch, rebuilt)
+
+    # Re-running the notebook changed a text output, not its plots
+    write_notebook(notebook_path, [1, 2, 3], "3 sites, 2 updated\n")
+    second = build(notebook_path, tmp_path / "second", monkeypatch, rebuilt)
+    assert rebuilt == [tmp_path / "first"]
+    assert [cell.howto_step for cell in second] == [cell.howto_step for cell in first]
+    assert (tmp_path / "second" / "analysis.ipynb").read_bytes() == notebook_path.read_bytes()
+
+
+def test_plotly_changes_rebuild_the_crate_reusing_unchanged_plots(cache_dir, tmp_path, monkeypatch):
+    notebook_path = tmp_path / "analysis.ipynb"
+    rebuilt = []
+    write_notebook(notebook_path, [1, 2, 3], "3 sites\n")
+    build(notebook_path, tmp_path / "first", monkeypatch, rebuilt)
+    plot = tmp_path / "first" / "plotly_results" / "step-2_plotly_1.json"
+
+    write_notebook(notebook_path, [1, 2, 4], "3 sites\n")
+    build(notebook_path, tmp_path / "second", monkeypatch, rebuilt)
+    assert rebuilt == [tmp_path / "first", tmp_path / "second"]
+    changed_plot = tmp_path / "second" / "plotly_results" / "step-2_plotly_1.json"
+    assert changed_plot.read_bytes() != plot.read_bytes()
+
+    # A code change rebuilds the crate, but the unchanged plot is not encoded again
+    write_notebook(notebook_path, [1, 2, 4], "3 sites\n")
+    notebook = json.loads(notebook_path.read_text(encoding="utf-8"))
+    notebook["cells"][0]["source"].append("df = df.dropna()\n")
+    notebook_path.write_text(json.dumps(notebook), encoding="utf-8")
+
+    def encode_figure(figure):
+        raise AssertionError("cached Plotly result was encoded again")
+
+    monkeypatch.setattr(prospective_helper, "encode_figure", encode_figure)
+    build(notebook_path, tmp_path / "third", monkeypatch, rebuilt)
+    assert rebuilt[-1] == tmp_path / "third"
+    assert (tmp_path / "third" / "plotly_results" / "step-2_plotly_1.json").read_bytes() == changed_plot.read_bytes()
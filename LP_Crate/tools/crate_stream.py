@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Stream the @graph of an RO-Crate metadata file one entity at a time.
+
+The summary tools only keep counters and a handful of example entities, so
+they do not need the whole ro-crate-metadata.json in memory. `CrateStream`
+reads the file in chunks and decodes each @graph item on its own with the
+json module's scanner. Items that do not fit in LARGE_ITEM_CHARS (typically
+the root dataset, whose hasPart lists every file) are decoded member by
+member instead, and any array in them with more than MAX_ARRAY_ITEMS
+elements is only counted: it becomes a `LongArray` that knows its length and
+is read back from the file if it is ever needed. Peak memory therefore does
+not grow with the number of entities in the crate.
+"""
+
+import codecs
+import json
+import re
+from collections import deque
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Bytes read from the metadata file at a time
+CHUNK_SIZE = 1024 * 1024
+# Items whose text is longer than this are decoded member by member
+LARGE_ITEM_CHARS = 1024 * 1024
+# Arrays in large items with more elements than this are counted, not decoded
+MAX_ARRAY_ITEMS = 10
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The "," or closing bracket after a value, by closing bracket
+_SEPARATORS = {closing: re.compile(rf"[ \t\n\r]*([,\{closing}])[ \t\n\r]*") for closing in "]}"}
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_DECODER = json.JSONDecoder()
+_scan = _DECODER.scan_once
+
+
+class LongArray:
+    """An array that was counted but not decoded. `load()` reads it back from the metadata file."""
+
+    __slots__ = ("path", "span", "count")
+
+    def __init__(self, path, span: Tuple[int, int], count: int):
+        self.path = path
+        self.span = span
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"LongArray({self.count} items)"
+
+    def load(self) -> List[Any]:
+        with open(self.path, "rb") as f:
+            f.seek(self.span[0])
+            return json.loads(f.read(self.span[1] - self.span[0]))
+
+
+# Use in place of `list` when checking whether a streamed value is an array
+ARRAY_TYPES = (list, LongArray)
+
+
+class CrateStream:
+    """
+    Iterate over the @graph items of an ro-crate-metadata.json file.
+
+        with CrateStream(path) as crate:
+            for item in crate.items():
+                ...
+            context = crate.context
+
+    `context` holds the decoded @context once it has been read (it normally
+    precedes @graph, and is always set after `items()` is exhausted).
+    """
+
+    def __init__(self, path, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.context: Any = None
+        self._chunk_size = chunk_size
+        self._file = None
+
+    def __enter__(self) -> "CrateStream":
+        self._file = open(self.path, "rb")
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._data = ""         # decoded text not yet consumed, from self._pos on
+        self._pos = 0
+        self._base = 0          # byte offset of self._data[0] in the file
+        self._eof = False
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+
+    # --- Reading ---
+
+    def _fill(self) -> bool:
+        """Drop the consumed text and append the next chunk of the file; False once nothing is left."""
+        if self._eof:
+            return False
+        consumed = self._data[:self._pos]
+        self._base += len(consumed) if consumed.isascii() else len(consumed.encode("utf-8"))
+        chunk = self._file.read(self._chunk_size)
+        self._eof = not chunk
+        self._data = self._data[self._pos:] + self._utf8.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    def _offset(self) -> int:
+        """Byte offset of the current position in the file."""
+        consumed = self._data[:self._pos]
+        return self._base + (len(consumed) if consumed.isascii() else len(consumed.encode("utf-8")))
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end of the file)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._data, self._pos).end()
+            if self._pos < len(self._data):
+                return self._data[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, tokens: str) -> str:
+        token = self._peek()
+        if not token or token not in tokens:
+            raise ValueError(f"Expected one of {tokens!r} at byte {self._offset()} of {self.path}")
+        self._pos += 1
+        return token
+
+    def _try_decode(self) -> Tuple[bool, Any]:
+        """Decode the value at the current position if the text read so far holds all of it."""
+        try:
+            value, end = _DECODER.raw_decode(self._data, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            return False, None
+        if self._truncated(value, end):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _truncated(self, value: Any, end: int) -> bool:
+        """Whether a value decoded up to `end` may continue in the next chunk (a number cut short)."""
+        if self._eof:
+            return False
+        if end == len(self._data):
+            return True
+        return (isinstance(value, (int, float)) and not isinstance(value, bool)
+                and _NUMBER_TAIL.match(self._data, end).end() == len(self._data))
+
+    def _decode(self) -> Any:
+        self._peek()
+        while True:
+            done, value = self._try_decode()
+            if done:
+                return value
+            self._fill()
+
+    def _next_value(self) -> Any:
+        """Decode the value at the current position; the fast path for values well inside the text read so far."""
+        try:
+            value, end = _scan(self._data, self._pos)
+        except (StopIteration, json.JSONDecodeError):
+            return self._decode()
+        if self._truncated(value, end):
+            return self._decode()
+        self._pos = end
+        return value
+
+    def _separator(self, closing: str) -> str:
+        """Consume the "," or closing bracket after a value and return it."""
+        separator = _SEPARATORS[closing].match(self._data, self._pos)
+        if separator is None:
+            return self._expect("," + closing)
+        self._pos = separator.end()
+        return separator[1]
+
+    # --- Structure ---
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(":")
+            if key == "@graph":
+                yield from self._graph_items()
+            elif key == "@context":
+                self.context = self._decode()
+            else:
+                self._decode()
+            if self._expect(",}") == "}":
+                return
+
+    def _graph_items(self) -> Iterator[Dict[str, Any]]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._item()
+            if self._separator("]") == "]":
+                return
+
+    def _item(self) -> Any:
+        try:
+            item, end = _scan(self._data, self._pos)
+        except (StopIteration, json.JSONDecodeError):
+            pass
+        else:
+            if not self._truncated(item, end):
+                self._pos = end
+                return item
+        self._peek()
+        while True:
+            done, item = self._try_decode()
+            if done:
+                return item
+            if len(self._data) - self._pos >= LARGE_ITEM_CHARS and self._data[self._pos] == "{":
+                return self._large_item()
+            self._fill()
+
+    def _large_item(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {}
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return item
+        while True:
+            key = self._decode()
+            self._expect(":")
+            item[key] = self._array() if self._peek() == "[" else self._next_value()
+            if self._separator("}") == "}":
+                return item
+
+    def _array(self) -> Any:
+        start = self._offset()
+        self._expect("[")
+        elements: List[Any] = []
+        count = 0
+        if self._peek() == "]":
+            self._pos += 1
+            return elements
+        while True:
+            element = self._next_value()
+            count += 1
+            if count <= MAX_ARRAY_ITEMS:
+                elements.append(element)
+            if self._separator("]") == "]":
+                break
+        if count <= MAX_ARRAY_ITEMS:
+            return elements
+        return LongArray(self.path, (start, self._offset()), count)
+
+
+def _plain(value: Any, sort_keys: bool) -> Any:
+    if isinstance(value, dict):
+        keys = sorted(value) if sort_keys else value
+        return {key: _plain(value[key], sort_keys) for key in keys}
+    if isinstance(value, (list, tuple)):
+        return [_plain(element, sort_keys) for element in value]
+    return value
+
+
+class CrateGraph:
+    """
+    The `CrateStream` interface over metadata already in memory, such as the
+    {"@context", "@graph"} document rocrate's `ROCrate.metadata.generate()` builds.
+    Items are yielded as they would read back from the file: tuples become lists,
+    and with sort_keys object members come in the order json.dump(sort_keys=True)
+    writes them.
+    """
+
+    def __init__(self, metadata: Dict[str, Any], sort_keys: bool = False):
+        self.context = metadata.get("@context")
+        self._graph = metadata.get("@graph", [])
+        self._sort_keys = sort_keys
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        for item in self._graph:
+            yield _plain(item, self._sort_keys)
+
+
+class Sample:
+    """
+    Keep the first `keep_all` items and the last `tail` items of a stream, plus its length.
+    Enough to show every item of a short stream, or the first and last few of a long one.
+    """
+
+    def __init__(self, keep_all: int, tail: int):
+        self.keep_all = keep_all
+        self.head: List[Any] = []
+        self.tail: deque = deque(maxlen=tail)
+        self.count = 0
+
+    def append(self, item: Any) -> None:
+        if len(self.head) < self.keep_all:
+            self.head.append(item)
+        self.tail.append(item)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def all(self) -> List[Any]:
+        """Every item; only valid while the stream is no longer than keep_all."""
+        assert self.count <= self.keep_all
+        return list(self.head)
+
+    def first(self, n: int) -> List[Any]:
+        return self.head[:n]
+
+    def last(self, n: int) -> List[Any]:
+        return list(self.tail)[-n:] if n else []
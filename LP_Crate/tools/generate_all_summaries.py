@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Generate every RO-Crate metadata summary of an interface crate in one run.
+
+Summarizes the interface crate itself, batch_processes/ and each
+notebooks/*/ crate in a single process pool, writes the summaries straight
+to the output directory and builds summary-overview.md from the sizes the
+workers report, instead of starting a Python interpreter per generator and
+copying the results around.
+
+summary-manifest.json in the output directory records, for each summary,
+the SHA-256 of the ro-crate-metadata.json it was made from and the version
+of its summarizer. A later run only summarizes crates whose metadata or
+summarizer changed (or whose summary is missing), and leaves the rest and
+summary-overview.md alone when nothing changed. --force ignores the manifest.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from crate_stream import CrateStream
+from generate_batch_summary import create_batch_summary
+from generate_interface_summary import create_enhanced_summary
+from generate_notebook_summary import create_notebook_summary
+from summary_json import dump_summary
+
+METADATA_FILENAME = "ro-crate-metadata.json"
+OVERVIEW_FILENAME = "summary-overview.md"
+MANIFEST_FILENAME = "summary-manifest.json"
+INTERFACE_SUMMARY = "interface-crate-summary.json"
+BATCH_SUMMARY = "batch-processes-summary.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+SUMMARIZERS = {
+    "interface": create_enhanced_summary,
+    "batch": create_batch_summary,
+    "notebook": create_notebook_summary,
+}
+
+# Bump a summarizer's version whenever its output changes (summary_json.py layout included),
+# so summaries made by the previous version are regenerated
+SUMMARIZER_VERSIONS = {
+    "interface": 1,
+    "batch": 1,
+    "notebook": 1,
+}
+
+OVERVIEW_HEADER = """# RO-Crate Metadata Summaries Overview
+
+This directory contains summarized versions of all RO-Crate metadata files from the LivePublication system.
+
+## Summary Files
+
+### Interface Crate
+- **interface-crate-summary.json** - Main interface crate with workflow steps and formal parameters
+  - Contains workflow steps, formal parameters, and experiment components (E1, E2.1, E2.2, E3)
+  - Typical size reduction: 75-80%
+
+### Batch Processes
+- **batch-processes-summary.json** - Batch processing workflow overview
+  - Focuses on CreateAction entities and file pattern analysis
+  - Achieves 99.9%+ size reduction due to high file count
+
+### Notebook Provenance
+- **notebook-*-summary.json** - Individual notebook workflow summaries
+  - Each preserves complete workflow structure with HowToSteps and formal parameters
+  - Size reduction: 40-65% while maintaining computational narrative
+
+## Generation Details
+
+"""
+
+
+def notebook_summary_name(notebook_dir_name: str) -> str:
+    return f"notebook-{notebook_dir_name}-summary.json"
+
+
+def find_summary_jobs(interface_crate: Path) -> List[Tuple[str, Path, str]]:
+    """Return (kind, metadata file, summary filename) for every crate to summarize."""
+    jobs = [("interface", interface_crate / METADATA_FILENAME, INTERFACE_SUMMARY)]
+    batch_metadata = interface_crate / "batch_processes" / METADATA_FILENAME
+    if batch_metadata.exists():
+        jobs.append(("batch", batch_metadata, BATCH_SUMMARY))
+    else:
+        print(f"Warning: Batch processes metadata not found at {batch_metadata}")
+    notebooks_dir = interface_crate / "notebooks"
+    if notebooks_dir.is_dir():
+        for notebook_dir in sorted(notebooks_dir.iterdir()):
+            metadata = notebook_dir / METADATA_FILENAME
+            if metadata.exists():
+                jobs.append(("notebook", metadata, notebook_summary_name(notebook_dir.name)))
+    else:
+        print(f"Warning: Notebooks directory not found at {notebooks_dir}")
+    return jobs
+
+
+def summarize(kind: str, input_path: Path, output_path: Path) -> Dict[str, Any]:
+    """Summarize one crate into output_path and return its sizes and entity count."""
+    with CrateStream(input_path) as crate:
+        summary = SUMMARIZERS[kind](crate)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        dump_summary(summary, f)
+    return {
+        "input_size": input_path.stat().st_size,
+        "output_size": output_path.stat().st_size,
+        "entities": len(summary["@graph"]),
+    }
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_manifest(output_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Return the manifest entries of the summaries in output_dir, by summary filename."""
+    try:
+        with open(output_dir / MANIFEST_FILENAME, 'r', encoding='utf-8') as f:
+            return json.load(f)["summaries"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_manifest(output_dir: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    manifest_path = output_dir / MANIFEST_FILENAME
+    staging = manifest_path.with_suffix(".tmp")
+    with open(staging, 'w', encoding='utf-8') as f:
+        json.dump({"summaries": dict(sorted(entries.items()))}, f, indent=1)
+    os.replace(staging, manifest_path)
+
+
+def is_current(entry: Dict[str, Any], record: Dict[str, Any], output_path: Path) -> bool:
+    """Whether a manifest entry describes output_path as summarized from the input and summarizer in record."""
+    if any(entry.get(key) != value for key, value in record.items()):
+        return False
+    try:
+        return output_path.stat().st_size == entry.get("size")
+    except OSError:
+        return False
+
+
+def write_overview(output_dir: Path, interface_crate: Path, sizes: Dict[str, int]) -> Path:
+    overview_path = output_dir / OVERVIEW_FILENAME
+    lines = [
+        f"Generated on: {time.strftime('%a %b %d %H:%M:%S %Z %Y')}",
+        f"Source interface crate: {interface_crate}",
+        "",
+        "## File Sizes",
+        "",
+    ]
+    lines += [f"- **{filename}**: {size} bytes" for filename, size in sorted(sizes.items())]
+    with open(overview_path, 'w', encoding='utf-8') as f:
+        f.write(OVERVIEW_HEADER + "\n".join(lines) + "\n")
+    return overview_path
+
+
+def main():
+    """Main function to generate all summaries."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(
+        description="Generate summaries of the interface crate, its batch processes and every notebook crate"
+    )
+    parser.add_argument(
+        "interface_crate",
+        nargs="?",
+        default=str(script_dir / "../interface.crate"),
+        help="Path to interface.crate directory (default: ../interface.crate/)"
+    )
+    parser.add_argument(
+        "output_dir",
+        nargs="?",
+        default=str(script_dir / "../summaries"),
+        help="Directory to store all summary files (default: ../summaries/)"
+    )
+    parser.add_argument(
+        "--processes", "-p",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of crates to summarize at once (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--force", "-f",
+        action="store_true",
+        help=f"Regenerate every summary, ignoring {MANIFEST_FILENAME}"
+    )
+    args = parser.parse_args()
+
+    interface_crate = Path(args.interface_crate).resolve()
+    if not (interface_crate / METADATA_FILENAME).exists():
+        print(f"Error: Interface crate metadata not found: {interface_crate / METADATA_FILENAME}")
+        return 1
+    output_dir = Path(args.output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Interface crate path: {interface_crate}")
+    print(f"Output directory: {output_dir}")
+    print()
+
+    previous = load_manifest(output_dir)
+    entries: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for kind, input_path, filename in find_summary_jobs(interface_crate):
+        record = {
+            "input": input_path.relative_to(interface_crate).as_posix(),
+            "sha256": file_sha256(input_path),
+            "summarizer": SUMMARIZER_VERSIONS[kind],
+        }
+        if not args.force and filename in previous and is_current(previous[filename], record, output_dir / filename):
+            entries[filename] = previous[filename]
+        else:
+            pending.append((kind, input_path, filename, record))
+
+    # Summaries of crates that no longer exist
+    removed = sorted(set(previous) - {filename for _, _, filename, _ in pending} - set(entries))
+    for filename in removed:
+        (output_dir / filename).unlink(missing_ok=True)
+        print(f"  - {filename}: crate no longer present, summary removed")
+
+    if entries:
+        print(f"  {len(entries)} summaries unchanged")
+    if not pending and not removed and (output_dir / OVERVIEW_FILENAME).exists():
+        print("All summaries are up to date")
+        return 0
+
+    # Start the largest crates first so they do not end up running alone at the end
+    pending.sort(key=lambda job: job[1].stat().st_size, reverse=True)
+    failed = 0
+    if pending:
+        max_processes = max(1, min(args.processes, len(pending)))
+        with ProcessPoolExecutor(max_workers=max_processes) as executor:
+            futures = {
+                filename: executor.submit(summarize, kind, input_path, output_dir / filename)
+                for kind, input_path, filename, _ in pending
+            }
+            for kind, input_path, filename, record in sorted(pending, key=lambda job: job[2]):
+                try:
+                    stats = futures[filename].result()
+                except Exception as e:
+                    print(f"  ✗ {filename}: error summarizing {input_path}: {e}")
+                    failed += 1
+                    continue
+                entries[filename] = {**record, "size": stats["output_size"]}
+                reduction = (stats["input_size"] - stats["output_size"]) / stats["input_size"] * 100
+                print(f"  ✓ {filename}: {stats['input_size']:,} -> {stats['output_size']:,} bytes "
+                      f"({reduction:.1f}% reduction, {stats['entities']} entities)")
+
+    save_manifest(output_dir, entries)
+    sizes = {filename: entry["size"] for filename, entry in entries.items()}
+    overview_path = write_overview(output_dir, interface_crate, sizes)
+    print(f"  ✓ Generated: {overview_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
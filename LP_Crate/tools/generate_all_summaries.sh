@@ -31,13 +31,16 @@ Generated Files:
   - batch-processes-summary.json         (Batch processing overview)
   - notebook-*-summary.json              (Individual notebook summaries)
   - summary-overview.md                  (Overview report with file sizes)
+  - summary-manifest.json                (Input hashes for incremental reruns)
 
-The script will:
-1. Generate interface crate summary (99.9% size reduction)
-2. Generate batch processes summary (100% size reduction)  
-3. Generate all notebook summaries (40-65% size reduction)
-4. Copy all summaries to output directory with descriptive names
-5. Create an overview report with generation details
+The script runs generate_all_summaries.py, which will:
+1. Summarize the interface crate, batch processes and every notebook crate
+   in parallel worker processes
+2. Write all summaries straight to the output directory with descriptive names
+3. Create an overview report with generation details
+
+Summaries whose crate metadata has not changed since the last run (per
+summary-manifest.json in the output directory) are skipped.
 
 For individual generators, see:
   ./generate_interface_summary.sh --help
@@ -86,134 +89,4 @@ if [ ! -f "$INTERFACE_CRATE_PATH/ro-crate-metadata.json" ]; then
     exit 1
 fi
 
-INTERFACE_CRATE_PATH="$(cd "$INTERFACE_CRATE_PATH" && pwd)"
-OUTPUT_DIR="$(mkdir -p "$OUTPUT_DIR" && cd "$OUTPUT_DIR" && pwd)"
-
-echo "==============================================="
-echo "RO-Crate Metadata Summary Generator"
-echo "==============================================="
-echo "Interface crate path: $INTERFACE_CRATE_PATH"
-echo "Output directory: $OUTPUT_DIR"
-echo
-
-# Function to copy summary file with better naming
-copy_summary() {
-    local source_file="$1"
-    local dest_name="$2"
-    
-    if [ -f "$source_file" ]; then
-        cp "$source_file" "$OUTPUT_DIR/$dest_name"
-        echo "  ✓ Copied to: $OUTPUT_DIR/$dest_name"
-    else
-        echo "  ✗ Warning: $source_file not found"
-    fi
-}
-
-# Generate interface crate summary
-echo "1. Generating Interface Crate Summary..."
-echo "----------------------------------------"
-cd "$SCRIPT_DIR"
-python3 generate_interface_summary.py --input "$INTERFACE_CRATE_PATH/ro-crate-metadata.json" --output "$INTERFACE_CRATE_PATH/ro-crate-metadata.summary.json"
-
-# Copy interface summary
-copy_summary "$INTERFACE_CRATE_PATH/ro-crate-metadata.summary.json" "interface-crate-summary.json"
-echo
-
-# Generate batch processes summary  
-echo "2. Generating Batch Processes Summary..."
-echo "----------------------------------------"
-BATCH_INPUT="$INTERFACE_CRATE_PATH/batch_processes/ro-crate-metadata.json"
-BATCH_OUTPUT="$INTERFACE_CRATE_PATH/batch_processes/ro-crate-metadata.summary.json"
-
-if [ -f "$BATCH_INPUT" ]; then
-    python3 generate_batch_summary.py --input "$BATCH_INPUT" --output "$BATCH_OUTPUT"
-    copy_summary "$BATCH_OUTPUT" "batch-processes-summary.json"
-else
-    echo "  Warning: Batch processes metadata not found at $BATCH_INPUT"
-fi
-echo
-
-# Generate notebook summaries
-echo "3. Generating Notebook Summaries..."
-echo "-----------------------------------"
-NOTEBOOKS_DIR="$INTERFACE_CRATE_PATH/notebooks"
-
-if [ -d "$NOTEBOOKS_DIR" ]; then
-    python3 generate_notebook_summary.py --interface-crate "$INTERFACE_CRATE_PATH" --all
-    
-    # Copy notebook summaries with descriptive names
-    echo "  Copying notebook summaries..."
-    for notebook_dir in "$NOTEBOOKS_DIR"/*; do
-        if [ -d "$notebook_dir" ]; then
-            notebook_name="$(basename "$notebook_dir")"
-            summary_file="$notebook_dir/ro-crate-metadata.summary.json"
-            copy_summary "$summary_file" "notebook-${notebook_name}-summary.json"
-        fi
-    done
-else
-    echo "  Warning: Notebooks directory not found at $NOTEBOOKS_DIR"
-fi
-echo
-
-# Generate overview report
-echo "4. Generating Overview Report..."
-echo "--------------------------------"
-
-OVERVIEW_FILE="$OUTPUT_DIR/summary-overview.md"
-
-cat > "$OVERVIEW_FILE" << 'EOF'
-# RO-Crate Metadata Summaries Overview
-
-This directory contains summarized versions of all RO-Crate metadata files from the LivePublication system.
-
-## Summary Files
-
-### Interface Crate
-- **interface-crate-summary.json** - Main interface crate with workflow steps and formal parameters
-  - Contains workflow steps, formal parameters, and experiment components (E1, E2.1, E2.2, E3)
-  - Typical size reduction: 75-80%
-
-### Batch Processes  
-- **batch-processes-summary.json** - Batch processing workflow overview
-  - Focuses on CreateAction entities and file pattern analysis
-  - Achieves 99.9%+ size reduction due to high file count
-
-### Notebook Provenance
-- **notebook-*-summary.json** - Individual notebook workflow summaries
-  - Each preserves complete workflow structure with HowToSteps and formal parameters
-  - Size reduction: 40-65% while maintaining computational narrative
-
-## Generation Details
-
-EOF
-
-# Add generation timestamp and source path
-echo "Generated on: $(date)" >> "$OVERVIEW_FILE"
-echo "Source interface crate: $INTERFACE_CRATE_PATH" >> "$OVERVIEW_FILE"
-echo "" >> "$OVERVIEW_FILE"
-echo "## File Sizes" >> "$OVERVIEW_FILE"
-echo "" >> "$OVERVIEW_FILE"
-
-for file in "$OUTPUT_DIR"/*.json; do
-    if [ -f "$file" ]; then
-        filename=$(basename "$file")
-        size=$(stat -f%z "$file" 2>/dev/null || stat -c%s "$file" 2>/dev/null || echo "unknown")
-        echo "- **$filename**: $size bytes" >> "$OVERVIEW_FILE"
-    fi
-done
-
-echo "  ✓ Generated: $OVERVIEW_FILE"
-echo
-
-# Final summary
-echo "==============================================="
-echo "Summary Generation Complete!"
-echo "==============================================="
-echo "Source: $INTERFACE_CRATE_PATH"
-echo "Output: $OUTPUT_DIR"
-echo
-echo "Files generated:"
-ls -la "$OUTPUT_DIR" | grep -E '\.(json|md)$' | awk '{print "  " $9 " (" $5 " bytes)"}'
-echo
-echo "Use these summaries for documentation, analysis, or"
-echo "as lightweight representations of the full metadata."
+exec python3 "$SCRIPT_DIR/generate_all_summaries.py" "$INTERFACE_CRATE_PATH" "$OUTPUT_DIR"
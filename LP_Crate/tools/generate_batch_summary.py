@@ -13,73 +13,8 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List
 
-
-def compact_simple_objects(json_str: str) -> str:
-    """
-    Post-process JSON string to inline simple objects and arrays.
-    Converts patterns like:
-    
-    "key": [
-     {
-      "@id": "value"
-     }
-    ],
-    
-    To: "key": [{"@id": "value"}],
-    
-    And:
-    
-    "@type": [
-     "FormalParameter"
-    ],
-    
-    To: "@type": ["FormalParameter"],
-    """
-    import re
-    
-    # Pattern 1: Simple single-property objects in arrays
-    pattern1 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*}\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern1.sub(r'\1: [{\2: \3}],', json_str)
-    
-    # Pattern 2: Simple single-property objects (not in arrays)
-    pattern2 = re.compile(
-        r'("[\w@-]+"):\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*},?',
-        re.MULTILINE
-    )
-    json_str = pattern2.sub(r'\1: {\2: \3},', json_str)
-    
-    # Pattern 3: Simple single-string arrays
-    # Matches: "key": [\n  "value"\n ],
-    pattern3 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*("[^"]*")\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern3.sub(r'\1: [\2],', json_str)
-    
-    # Pattern 4: Multi-string arrays on separate lines (common for @type arrays)
-    # Matches: "key": [\n  "value1",\n  "value2",\n  "value3"\n ],
-    pattern4 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n((?:\s*"[^"]*",?\s*\n)+)\s*\],?',
-        re.MULTILINE
-    )
-    
-    def inline_array_items(match):
-        key = match.group(1)
-        items_text = match.group(2)
-        # Extract all quoted strings from the items
-        items = re.findall(r'"[^"]*"', items_text)
-        items_str = ', '.join(items)
-        return f'{key}: [{items_str}],'
-    
-    json_str = pattern4.sub(inline_array_items, json_str)
-    
-    # Clean up any trailing commas before closing brackets/braces
-    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
-    
-    return json_str
+from crate_stream import ARRAY_TYPES, CrateStream, Sample
+from summary_json import dump_summary
 
 
 def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
@@ -96,23 +31,20 @@ def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
     return type_counts
 
 
-def create_batch_summary(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a batch processes summary focused on workflow overview."""
-    summary = {
-        "@context": data.get("@context"),
-        "@graph": []
-    }
-    
-    graph = data.get("@graph", [])
-    
+def create_batch_summary(crate: CrateStream) -> Dict[str, Any]:
+    """
+    Create a batch processes summary focused on workflow overview.
+    Entities are read one at a time from the crate; files are only counted and sampled.
+    """
     # Track what we've processed
     workflow_entities = []
     action_entities = []
     formal_parameters = []
-    files = []
-    other_entities = []
+    files = Sample(keep_all=10, tail=3)
+    file_patterns = {}
+    other_count = 0
     
-    for item in graph:
+    for item in crate.items():
         item_id = item.get("@id", "")
         item_types = item.get("@type", [])
         if isinstance(item_types, str):
@@ -126,14 +58,14 @@ def create_batch_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             
             # Summarize large hasPart arrays
             summary_item = item.copy()
-            if "hasPart" in summary_item and isinstance(summary_item["hasPart"], list):
+            if "hasPart" in summary_item and isinstance(summary_item["hasPart"], ARRAY_TYPES):
                 part_count = len(summary_item["hasPart"])
                 if part_count > 10:  # Only summarize if more than 10 items
                     summary_item["hasPart"] = f"... {part_count} items ..."
             
             # Summarize large input/output arrays for actions
             for key in ["object", "result", "input", "output"]:
-                if key in summary_item and isinstance(summary_item[key], list):
+                if key in summary_item and isinstance(summary_item[key], ARRAY_TYPES):
                     if len(summary_item[key]) > 10:
                         summary_item[key] = f"... {len(summary_item[key])} items ..."
             
@@ -153,11 +85,24 @@ def create_batch_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             }
             formal_parameters.append(formal_param)
         
-        # Count files and other entities
+        # Count files (grouped by type/pattern) and other entities
         elif "File" in item_types:
             files.append(item)
+            if "transect_time_series.csv" in item_id:
+                file_patterns["transect_time_series"] = file_patterns.get("transect_time_series", 0) + 1
+            elif ".csv" in item_id:
+                file_patterns["other_csv"] = file_patterns.get("other_csv", 0) + 1
+            elif ".json" in item_id:
+                file_patterns["json"] = file_patterns.get("json", 0) + 1
+            else:
+                file_patterns["other"] = file_patterns.get("other", 0) + 1
         else:
-            other_entities.append(item)
+            other_count += 1
+    
+    summary = {
+        "@context": crate.context,
+        "@graph": []
+    }
     
     # Add workflow entities first (root dataset, etc.)
     summary["@graph"].extend(workflow_entities)
@@ -171,31 +116,16 @@ def create_batch_summary(data: Dict[str, Any]) -> Dict[str, Any]:
     
     # Add file examples with summary (similar to notebook workflow steps)
     if files:
-        # Group files by type/pattern for the summary
-        file_patterns = {}
-        for file_item in files:
-            file_id = file_item.get("@id", "")
-            if "transect_time_series.csv" in file_id:
-                file_patterns["transect_time_series"] = file_patterns.get("transect_time_series", 0) + 1
-            elif ".csv" in file_id:
-                file_patterns["other_csv"] = file_patterns.get("other_csv", 0) + 1
-            elif ".json" in file_id:
-                file_patterns["json"] = file_patterns.get("json", 0) + 1
-            else:
-                file_patterns["other"] = file_patterns.get("other", 0) + 1
-        
         # Apply the same pattern as notebook summaries: first few + summary + last few
         if len(files) <= 10:
             # For small numbers, show all files
-            summary["@graph"].extend(files)
+            summary["@graph"].extend(files.all())
         else:
             # For large numbers, show first 3, summary of middle files, last 3
-            first_files = files[:3]
-            last_files = files[-3:]
             collapsed_count = len(files) - 6  # Total minus first 3 and last 3
             
             # Add first 3 files
-            summary["@graph"].extend(first_files)
+            summary["@graph"].extend(files.first(3))
             
             # Create summary for the collapsed middle files
             file_summary = {
@@ -212,13 +142,13 @@ def create_batch_summary(data: Dict[str, Any]) -> Dict[str, Any]:
                 summary["@graph"].append(file_summary)
             
             # Add last 3 files
-            summary["@graph"].extend(last_files)
+            summary["@graph"].extend(files.last(3))
     
     # Add other entities count summary
-    if other_entities:
+    if other_count:
         summary["@graph"].append({
             "@id": "... other entities ...",
-            "count": len(other_entities)
+            "count": other_count
         })
     
     return summary
@@ -259,28 +189,16 @@ def main():
         return 1
     
     try:
-        # Load the original metadata
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Create batch summary
-        summary = create_batch_summary(data)
+        # Stream the original metadata into a batch summary
+        with CrateStream(input_path) as crate:
+            summary = create_batch_summary(crate)
         
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write summary
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=1, ensure_ascii=False, separators=(',', ': '))
-        
-        # Post-process to inline simple objects
-        with open(output_path, 'r', encoding='utf-8') as f:
-            json_content = f.read()
-        
-        compact_content = compact_simple_objects(json_content)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(compact_content)
+            dump_summary(summary, f)
         
         # Print statistics
         original_size = input_path.stat().st_size
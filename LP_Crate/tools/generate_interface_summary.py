@@ -13,75 +13,8 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List
 
-
-def compact_simple_objects(json_str: str) -> str:
-    """
-    Post-process JSON string to inline simple objects and arrays.
-    Converts patterns like:
-    
-    "key": [
-     {
-      "@id": "value"
-     }
-    ],
-    
-    To: "key": [{"@id": "value"}],
-    
-    And:
-    
-    "@type": [
-     "FormalParameter"
-    ],
-    
-    To: "@type": ["FormalParameter"],
-    """
-    import re
-    
-    # Pattern 1: Simple single-property objects in arrays
-    # Matches: "key": [\n {whitespace}\n {whitespace}"@id": "value"\n {whitespace}\n ],
-    pattern1 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*}\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern1.sub(r'\1: [{\2: \3}],', json_str)
-    
-    # Pattern 2: Simple single-property objects (not in arrays)
-    # Matches: "key": {\n {whitespace}"@id": "value"\n },
-    pattern2 = re.compile(
-        r'("[\w@-]+"):\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*},?',
-        re.MULTILINE
-    )
-    json_str = pattern2.sub(r'\1: {\2: \3},', json_str)
-    
-    # Pattern 3: Simple single-string arrays
-    # Matches: "key": [\n  "value"\n ],
-    pattern3 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*("[^"]*")\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern3.sub(r'\1: [\2],', json_str)
-    
-    # Pattern 4: Multi-string arrays on separate lines (common for @type arrays)
-    # Matches: "key": [\n  "value1",\n  "value2",\n  "value3"\n ],
-    pattern4 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n((?:\s*"[^"]*",?\s*\n)+)\s*\],?',
-        re.MULTILINE
-    )
-    
-    def inline_array_items(match):
-        key = match.group(1)
-        items_text = match.group(2)
-        # Extract all quoted strings from the items
-        items = re.findall(r'"[^"]*"', items_text)
-        items_str = ', '.join(items)
-        return f'{key}: [{items_str}],'
-    
-    json_str = pattern4.sub(inline_array_items, json_str)
-    
-    # Clean up any trailing commas before closing brackets/braces
-    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
-    
-    return json_str
+from crate_stream import ARRAY_TYPES, CrateStream, Sample
+from summary_json import dump_summary
 
 
 def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
@@ -98,22 +31,23 @@ def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
     return type_counts
 
 
-def create_enhanced_summary(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create an enhanced summary that enumerates workflows and formal parameters."""
-    summary = {
-        "@context": data.get("@context"),
-        "@graph": []
-    }
-    
-    graph = data.get("@graph", [])
+def create_enhanced_summary(crate: CrateStream) -> Dict[str, Any]:
+    """
+    Create an enhanced summary that enumerates workflows and formal parameters.
+    Entities are read one at a time from the crate; only counters and example entities are kept.
+    """
+    graph = []
     
     # Track what we've processed
+    core_entities = []
     workflow_steps = []
-    formal_parameters = []
-    other_entities = []
-    files = []
+    formal_parameters = Sample(keep_all=10, tail=3)
+    required_count = 0
+    files = Sample(keep_all=10, tail=3)
+    file_types = {}
+    other_count = 0
     
-    for item in graph:
+    for item in crate.items():
         item_id = item.get("@id", "")
         item_types = item.get("@type", [])
         if isinstance(item_types, str):
@@ -146,6 +80,8 @@ def create_enhanced_summary(data: Dict[str, Any]) -> Dict[str, Any]:
                 "valueRequired": item.get("valueRequired", False)
             }
             formal_parameters.append(formal_param)
+            if formal_param["valueRequired"]:
+                required_count += 1
         
         # Keep important entities as-is (root dataset, main entity, etc.)
         elif (item_id in ["./", "ro-crate-metadata.json", "livepublication-interface"] or 
@@ -153,37 +89,44 @@ def create_enhanced_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             
             # Summarize hasPart arrays for these entities
             summary_item = item.copy()
-            if "hasPart" in summary_item and isinstance(summary_item["hasPart"], list):
+            if "hasPart" in summary_item and isinstance(summary_item["hasPart"], ARRAY_TYPES):
                 part_count = len(summary_item["hasPart"])
                 summary_item["hasPart"] = f"... {part_count} items ..."
             
-            summary["@graph"].append(summary_item)
+            core_entities.append(summary_item)
         
-        # Collect files and other entities for counting
+        # Count files (by type) and other entities
         elif "File" in item_types:
             files.append(item)
+            file_type = item.get("@type", [])
+            if isinstance(file_type, list):
+                file_type = ", ".join(file_type)
+            file_types[file_type] = file_types.get(file_type, 0) + 1
         else:
-            other_entities.append(item)
+            other_count += 1
+    
+    summary = {
+        "@context": crate.context,
+        "@graph": graph
+    }
+    graph.extend(core_entities)
     
     # Add enumerated workflow steps
-    summary["@graph"].extend(workflow_steps)
+    graph.extend(workflow_steps)
     
     # Add formal parameters with examples (similar to workflow steps pattern)
     if formal_parameters:
         if len(formal_parameters) <= 10:
             # For small numbers, show all parameters
-            summary["@graph"].extend(formal_parameters)
+            graph.extend(formal_parameters.all())
         else:
             # For large numbers, show first 3, summary of middle parameters, last 3
-            first_params = formal_parameters[:3]
-            last_params = formal_parameters[-3:]
             collapsed_count = len(formal_parameters) - 6  # Total minus first 3 and last 3
             
             # Add first 3 parameters
-            summary["@graph"].extend(first_params)
+            graph.extend(formal_parameters.first(3))
             
             # Create summary for the collapsed middle parameters
-            required_count = sum(1 for p in formal_parameters if p.get("valueRequired", False))
             optional_count = len(formal_parameters) - required_count
             
             params_summary = {
@@ -198,32 +141,22 @@ def create_enhanced_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add summary only if there are actually middle parameters to collapse
             if collapsed_count > 0:
-                summary["@graph"].append(params_summary)
+                graph.append(params_summary)
             
             # Add last 3 parameters
-            summary["@graph"].extend(last_params)
+            graph.extend(formal_parameters.last(3))
     
     # Add file examples with summary (similar to batch processes pattern)
     if files:
         if len(files) <= 10:
             # For small numbers, show all files
-            summary["@graph"].extend(files)
+            graph.extend(files.all())
         else:
             # For large numbers, show first 3, summary of middle files, last 3
-            first_files = files[:3]
-            last_files = files[-3:]
             collapsed_count = len(files) - 6  # Total minus first 3 and last 3
             
             # Add first 3 files
-            summary["@graph"].extend(first_files)
-            
-            # Analyze file types for the summary
-            file_types = {}
-            for file_item in files:
-                file_type = file_item.get("@type", [])
-                if isinstance(file_type, list):
-                    file_type = ", ".join(file_type)
-                file_types[file_type] = file_types.get(file_type, 0) + 1
+            graph.extend(files.first(3))
             
             file_summary = {
                 "@id": "... files ...",
@@ -236,16 +169,16 @@ def create_enhanced_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add summary only if there are actually middle files to collapse
             if collapsed_count > 0:
-                summary["@graph"].append(file_summary)
+                graph.append(file_summary)
             
             # Add last 3 files
-            summary["@graph"].extend(last_files)
+            graph.extend(files.last(3))
     
     # Add other entities count summary
-    if other_entities:
-        summary["@graph"].append({
+    if other_count:
+        graph.append({
             "@id": "... other entities ...",
-            "count": len(other_entities)
+            "count": other_count
         })
     
     return summary
@@ -286,28 +219,16 @@ def main():
         return 1
     
     try:
-        # Load the original metadata
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Create enhanced summary
-        summary = create_enhanced_summary(data)
+        # Stream the original metadata into an enhanced summary
+        with CrateStream(input_path) as crate:
+            summary = create_enhanced_summary(crate)
         
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write summary
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=1, ensure_ascii=False, separators=(',', ': '))
-        
-        # Post-process to inline simple objects
-        with open(output_path, 'r', encoding='utf-8') as f:
-            json_content = f.read()
-        
-        compact_content = compact_simple_objects(json_content)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(compact_content)
+            dump_summary(summary, f)
         
         # Print statistics
         original_size = input_path.stat().st_size
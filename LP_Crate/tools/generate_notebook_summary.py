@@ -13,73 +13,8 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List
 
-
-def compact_simple_objects(json_str: str) -> str:
-    """
-    Post-process JSON string to inline simple objects and arrays.
-    Converts patterns like:
-    
-    "key": [
-     {
-      "@id": "value"
-     }
-    ],
-    
-    To: "key": [{"@id": "value"}],
-    
-    And:
-    
-    "@type": [
-     "FormalParameter"
-    ],
-    
-    To: "@type": ["FormalParameter"],
-    """
-    import re
-    
-    # Pattern 1: Simple single-property objects in arrays
-    pattern1 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*}\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern1.sub(r'\1: [{\2: \3}],', json_str)
-    
-    # Pattern 2: Simple single-property objects (not in arrays)
-    pattern2 = re.compile(
-        r'("[\w@-]+"):\s*{\s*\n\s*("@id"):\s*("[^"]*")\s*\n\s*},?',
-        re.MULTILINE
-    )
-    json_str = pattern2.sub(r'\1: {\2: \3},', json_str)
-    
-    # Pattern 3: Simple single-string arrays
-    # Matches: "key": [\n  "value"\n ],
-    pattern3 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n\s*("[^"]*")\s*\n\s*\],?',
-        re.MULTILINE
-    )
-    json_str = pattern3.sub(r'\1: [\2],', json_str)
-    
-    # Pattern 4: Multi-string arrays on separate lines (common for @type arrays)
-    # Matches: "key": [\n  "value1",\n  "value2",\n  "value3"\n ],
-    pattern4 = re.compile(
-        r'("[\w@-]+"):\s*\[\s*\n((?:\s*"[^"]*",?\s*\n)+)\s*\],?',
-        re.MULTILINE
-    )
-    
-    def inline_array_items(match):
-        key = match.group(1)
-        items_text = match.group(2)
-        # Extract all quoted strings from the items
-        items = re.findall(r'"[^"]*"', items_text)
-        items_str = ', '.join(items)
-        return f'{key}: [{items_str}],'
-    
-    json_str = pattern4.sub(inline_array_items, json_str)
-    
-    # Clean up any trailing commas before closing brackets/braces
-    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
-    
-    return json_str
+from crate_stream import ARRAY_TYPES, CrateStream, Sample
+from summary_json import dump_summary
 
 
 def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
@@ -96,26 +31,26 @@ def count_items_by_type(graph: List[Dict[str, Any]]) -> Dict[str, int]:
     return type_counts
 
 
-def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a notebook summary focused on workflow and provenance."""
-    summary = {
-        "@context": data.get("@context"),
-        "@graph": []
-    }
-    
-    graph = data.get("@graph", [])
-    
+def create_notebook_summary(crate: CrateStream) -> Dict[str, Any]:
+    """
+    Create a notebook summary focused on workflow and provenance.
+    Entities are read one at a time from the crate; only counters and example entities are kept.
+    """
     # Track what we've processed
     core_entities = []  # Root dataset, metadata, main notebook
-    workflow_steps = []  # HowToSteps
+    workflow_steps = Sample(keep_all=6, tail=3)  # HowToSteps (first and last few)
+    step_tools = set()
+    step_actions = set()
     formal_parameters = []  # FormalParameters
     jupyter_kernel = None
-    create_actions = []  # CreateActions (limited)
-    code_cells = []  # SoftwareApplication + File entities
+    create_actions = Sample(keep_all=6, tail=3)  # CreateActions (limited)
+    code_cell_count = 0  # SoftwareApplication + File entities
+    input_counts = {}
+    output_counts = {}
     media_objects = []  # MediaObject entities (plots, etc.)
-    other_entities = []
+    other_count = 0
     
-    for item in graph:
+    for item in crate.items():
         item_id = item.get("@id", "")
         item_types = item.get("@type", [])
         if isinstance(item_types, str):
@@ -131,21 +66,28 @@ def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
             else:
                 # Summarize step arrays for notebooks
                 summary_item = item.copy()
-                if "step" in summary_item and isinstance(summary_item["step"], list):
+                if "step" in summary_item and isinstance(summary_item["step"], ARRAY_TYPES):
                     step_count = len(summary_item["step"])
                     summary_item["step"] = f"... {step_count} steps ..."
                 
                 # Summarize hasPart arrays
-                if "hasPart" in summary_item and isinstance(summary_item["hasPart"], list):
+                if "hasPart" in summary_item and isinstance(summary_item["hasPart"], ARRAY_TYPES):
                     part_count = len(summary_item["hasPart"])
                     if part_count > 10:  # Only summarize if many items
                         summary_item["hasPart"] = f"... {part_count} items ..."
                 
                 core_entities.append(summary_item)
         
-        # Enumerate workflow steps (keep full details)
+        # Enumerate workflow steps (keep full details of the first and last few)
         elif "HowToStep" in item_types:
             workflow_steps.append(item)
+            tool_id = item.get("tool", {}).get("@id", "")
+            if tool_id:
+                step_tools.add(tool_id)
+            
+            about_id = item.get("about", {}).get("@id", "")
+            if about_id:
+                step_actions.add(about_id)
         
         # Enumerate formal parameters (keep full details)
         elif "FormalParameter" in item_types:
@@ -155,17 +97,27 @@ def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
         elif "CreateAction" in item_types:
             create_actions.append(item)
         
-        # Count code cells
+        # Count code cells and their input/output patterns
         elif ("SoftwareApplication" in item_types and "File" in item_types and 
               item_id.startswith("code_blocks/")):
-            code_cells.append(item)
+            code_cell_count += 1
+            input_count = len(item.get("input", []))
+            output_count = len(item.get("output", []))
+            
+            input_counts[input_count] = input_counts.get(input_count, 0) + 1
+            output_counts[output_count] = output_counts.get(output_count, 0) + 1
         
         # Keep media objects (plots, charts, etc.)
         elif "MediaObject" in item_types:
             media_objects.append(item)
         
         else:
-            other_entities.append(item)
+            other_count += 1
+    
+    summary = {
+        "@context": crate.context,
+        "@graph": []
+    }
     
     # Add core entities first
     summary["@graph"].extend(core_entities)
@@ -174,55 +126,28 @@ def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
     if jupyter_kernel:
         summary["@graph"].append(jupyter_kernel)
     
-    # Add collapsed workflow steps summary instead of individual steps
+    # Add workflow steps, collapsing the middle ones if there are many
     if workflow_steps:
-        # Analyze workflow step patterns
-        step_positions = [step.get("position", 0) for step in workflow_steps]
-        step_names = [step.get("name", "Unknown") for step in workflow_steps]
-        step_tools = set()
-        step_actions = set()
-        
-        for step in workflow_steps:
-            tool_id = step.get("tool", {}).get("@id", "")
-            if tool_id:
-                step_tools.add(tool_id)
-            
-            about_id = step.get("about", {}).get("@id", "")
-            if about_id:
-                step_actions.add(about_id)
-        
-        # Create summary representation
-        workflow_summary = {
-            "@id": "... workflow steps ...",
-            "@type": "HowToStepSummary",
-            "count": len(workflow_steps),
-            "position_range": [min(step_positions), max(step_positions)] if step_positions else [0, 0],
-            "step_pattern": f"{step_names[0]} to {step_names[-1]}" if len(step_names) > 1 else step_names[0] if step_names else "No steps",
-            "tools_used": list(step_tools),
-            "actions_referenced": len(step_actions),
-            "note": f"Collapsed {len(workflow_steps)} HowToStep entities for readability"
-        }
-        
         # Keep first and last few steps if there are many
         if len(workflow_steps) <= 6:
             # For small numbers, show all steps individually
-            summary["@graph"].extend(workflow_steps)
+            summary["@graph"].extend(workflow_steps.all())
         else:
             # For large numbers, show first 2, summary of middle steps, last 2
-            first_steps = workflow_steps[:2]
-            last_steps = workflow_steps[-2:]
+            first_steps = workflow_steps.first(3)
+            last_steps = workflow_steps.last(3)
             collapsed_count = len(workflow_steps) - 4  # Total minus first 2 and last 2
             
             # Add first 2 steps
-            summary["@graph"].extend(first_steps)
+            summary["@graph"].extend(first_steps[:2])
             
             # Create summary for the collapsed middle steps
             workflow_summary = {
                 "@id": "... workflow steps ...",
                 "@type": "HowToStepSummary", 
                 "count": collapsed_count,
-                "position_range": [workflow_steps[2].get("position", 0), workflow_steps[-3].get("position", 0)] if len(workflow_steps) > 4 else [0, 0],
-                "step_pattern": f"{workflow_steps[2].get('name', 'Unknown')} to {workflow_steps[-3].get('name', 'Unknown')}" if len(workflow_steps) > 4 else "No middle steps",
+                "position_range": [first_steps[2].get("position", 0), last_steps[0].get("position", 0)],
+                "step_pattern": f"{first_steps[2].get('name', 'Unknown')} to {last_steps[0].get('name', 'Unknown')}",
                 "tools_used": list(step_tools),
                 "actions_referenced": len(step_actions),
                 "note": f"Collapsed {collapsed_count} middle HowToStep entities (showing first 2 and last 2)"
@@ -233,7 +158,7 @@ def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
                 summary["@graph"].append(workflow_summary)
             
             # Add last 2 steps
-            summary["@graph"].extend(last_steps)
+            summary["@graph"].extend(last_steps[1:])
     
     # Add enumerated formal parameters
     summary["@graph"].extend(formal_parameters)
@@ -241,45 +166,34 @@ def create_notebook_summary(data: Dict[str, Any]) -> Dict[str, Any]:
     # Add limited CreateActions (first 3 and last 3 if more than 6)
     if create_actions:
         if len(create_actions) <= 6:
-            summary["@graph"].extend(create_actions)
+            summary["@graph"].extend(create_actions.all())
         else:
-            summary["@graph"].extend(create_actions[:3])
+            summary["@graph"].extend(create_actions.first(3))
             summary["@graph"].append({
                 "@id": "... create actions ...",
                 "count": len(create_actions) - 6,
                 "note": f"Showing first 3 and last 3 of {len(create_actions)} CreateActions"
             })
-            summary["@graph"].extend(create_actions[-3:])
+            summary["@graph"].extend(create_actions.last(3))
     
     # Add media objects (plots, charts)
     if media_objects:
         summary["@graph"].extend(media_objects)
     
     # Add code cell count summary
-    if code_cells:
-        # Analyze code cell patterns
-        input_counts = {}
-        output_counts = {}
-        
-        for cell in code_cells:
-            input_count = len(cell.get("input", []))
-            output_count = len(cell.get("output", []))
-            
-            input_counts[input_count] = input_counts.get(input_count, 0) + 1
-            output_counts[output_count] = output_counts.get(output_count, 0) + 1
-        
+    if code_cell_count:
         summary["@graph"].append({
             "@id": "... code cells ...",
-            "count": len(code_cells),
+            "count": code_cell_count,
             "input_distribution": input_counts,
             "output_distribution": output_counts
         })
     
     # Add other entities count summary
-    if other_entities:
+    if other_count:
         summary["@graph"].append({
             "@id": "... other entities ...",
-            "count": len(other_entities)
+            "count": other_count
         })
     
     return summary
@@ -385,28 +299,16 @@ def main():
             continue
         
         try:
-            # Load the original metadata
-            with open(input_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Create notebook summary
-            summary = create_notebook_summary(data)
+            # Stream the original metadata into a notebook summary
+            with CrateStream(input_path) as crate:
+                summary = create_notebook_summary(crate)
             
             # Ensure output directory exists
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
             # Write summary
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(summary, f, indent=1, ensure_ascii=False, separators=(',', ': '))
-            
-            # Post-process to inline simple objects
-            with open(output_path, 'r', encoding='utf-8') as f:
-                json_content = f.read()
-            
-            compact_content = compact_simple_objects(json_content)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(compact_content)
+                dump_summary(summary, f)
             
             # Print statistics
             original_size = input_path.stat().st_size
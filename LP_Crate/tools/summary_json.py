@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+JSON layout of the summary files.
+
+Summaries are indented by one space per level, as json.dump(indent=1)
+would write them, except that a few short values are kept on one line:
+
+    "about": {"@id": "#step-1"},
+    "input": [{"@id": "#param-1"}],
+    "@type": ["File", "FormalParameter"],
+
+that is, an object whose only member is a string "@id", an array holding
+just such an object, and an array of strings. As in the post-processing
+pass this replaces, these are only inlined as the value of an object
+member whose name consists of word characters, "@" and "-", and only when
+none of the strings contains a double quote.
+"""
+
+import json
+import re
+from typing import Any, Iterator
+
+from crate_stream import LongArray
+
+INDENT = " "
+
+_INLINE_KEY = re.compile(r"[\w@-]+")
+_scalar = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _key(key: Any) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return _scalar(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _plain_string(value: Any) -> bool:
+    return isinstance(value, str) and '"' not in value
+
+
+def _id_reference(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and _plain_string(value.get("@id"))
+
+
+def _inline(value: Any) -> bool:
+    """Whether a member value is written on one line."""
+    if isinstance(value, dict):
+        return _id_reference(value)
+    if isinstance(value, (list, tuple)) and value:
+        if len(value) == 1 and _id_reference(value[0]):
+            return True
+        return all(_plain_string(element) for element in value)
+    return False
+
+
+def _encode_inline(value: Any) -> str:
+    if isinstance(value, dict):
+        return '{"@id": ' + _scalar(value["@id"]) + "}"
+    return "[" + ", ".join(map(_encode_inline if isinstance(value[0], dict) else _scalar, value)) + "]"
+
+
+def _encode(value: Any, indent: str) -> Iterator[str]:
+    if isinstance(value, dict):
+        if not value:
+            yield "{}"
+            return
+        inner = indent + INDENT
+        separator = "{\n"
+        for key, member in value.items():
+            key = _key(key)
+            if isinstance(member, LongArray):
+                member = member.load()
+            yield separator + inner + _scalar(key) + ": "
+            if _INLINE_KEY.fullmatch(key) and _inline(member):
+                yield _encode_inline(member)
+            else:
+                yield from _encode(member, inner)
+            separator = ",\n"
+        yield "\n" + indent + "}"
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            yield "[]"
+            return
+        inner = indent + INDENT
+        separator = "[\n"
+        for element in value:
+            if isinstance(element, LongArray):
+                element = element.load()
+            yield separator + inner
+            yield from _encode(element, inner)
+            separator = ",\n"
+        yield "\n" + indent + "]"
+    else:
+        yield _scalar(value)
+
+
+def dump_summary(summary: Any, fp) -> None:
+    """Write a summary to an open text file in a single pass."""
+    fp.writelines(_encode(summary, ""))